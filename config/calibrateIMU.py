@@ -1,6 +1,10 @@
 import smbus2
 import time
 
+import numpy as np
+
+from src.drivers.compass_calibration import CompassCalibration
+
 
 def calibrate():
     bus = smbus2.SMBus(1)
@@ -9,7 +13,7 @@ def calibrate():
     try:
         # Initialize QMC5883L
         bus.write_byte_data(address, 0x0B, 0x01)
-        bus.write_byte_data(address, 0x09, 0x1D)
+        bus.write_byte_data(address, 0x09, 0x15)
     except Exception as e:
         print("Error conectando con la brújula:", e)
         return
@@ -28,59 +32,46 @@ def calibrate():
 
     print("\n¡GIRA AHORA! (Capturando datos durante 20 segundos...)")
 
-    min_x, max_x = 32767, -32768
-    min_y, max_y = 32767, -32768
-    min_z, max_z = 32767, -32768
+    calibration = CompassCalibration.load()
+    calibration.clear_samples()
+    raw_xyz = []
 
     start_time = time.time()
 
     while time.time() - start_time < 20.0:
         try:
-            data = bus.read_i2c_block_data(address, 0x00, 6)
-            x = convert(data[0], data[1])
-            y = convert(data[2], data[3])
-            z = convert(data[4], data[5])
-
-            if x < min_x:
-                min_x = x
-            if x > max_x:
-                max_x = x
-            if y < min_y:
-                min_y = y
-            if y > max_y:
-                max_y = y
-            if z < min_z:
-                min_z = z
-            if z > max_z:
-                max_z = z
-
-            time.sleep(0.05)
-        except:
+            # Status (0x06) first, as in IMU._read_raw: reading the data
+            # registers clears DRDY
+            status = bus.read_byte_data(address, 0x06)
+            if status & 0x01:
+                data = bus.read_i2c_block_data(address, 0x00, 6)
+                x = convert(data[0], data[1])
+                y = convert(data[2], data[3])
+                z = convert(data[4], data[5])
+                raw_xyz.append((x, y, z))
+                calibration.add_sample((y, z))
+
+            time.sleep(0.02)
+        except Exception:
             pass
 
     print("\n¡TIEMPO TERMINDADO! Puedes dejar de girar.\n")
 
-    # Calculate ranges to see which axes to ignore
-    range_x = max_x - min_x
-    range_y = max_y - min_y
-    range_z = max_z - min_z
-
-    print(f"Rango de movimiento Eje X: {range_x}")
-    print(f"Rango de movimiento Eje Y: {range_y}")
-    print(f"Rango de movimiento Eje Z: {range_z}")
-
-    print("-" * 30)
-    print("NUEVOS OFFSETS (Copia esto para tu código):")
-    print(f"offset_x = {(max_x + min_x) / 2.0}")
-    print(f"offset_y = {(max_y + min_y) / 2.0}")
-    print(f"offset_z = {(max_z + min_z) / 2.0}")
+    if raw_xyz:
+        # Ranges show which axes actually rotate (X should barely move)
+        ranges = np.ptp(np.array(raw_xyz), axis=0)
+        print(f"Rango de movimiento Eje X: {ranges[0]}")
+        print(f"Rango de movimiento Eje Y: {ranges[1]}")
+        print(f"Rango de movimiento Eje Z: {ranges[2]}")
+        print("-" * 30)
 
-    # Calculate scales
-    average_range = (range_x + range_y + range_z) / 3.0
-    print(f"scale_x = {average_range / range_x if range_x > 0 else 0:.4f}")
-    print(f"scale_y = {average_range / range_y if range_y > 0 else 0:.4f}")
-    print(f"scale_z = {average_range / range_z if range_z > 0 else 0:.4f}")
+    if calibration.fit():
+        calibration.save()
+        print("Calibración guardada. El asistente la cargará al iniciar.")
+    else:
+        print("La calibración no es válida, se mantiene la anterior.")
 
 
 if __name__ == "__main__":
+    # Run from the project root: python -m config.calibrateIMU
     calibrate()
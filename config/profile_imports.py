@@ -0,0 +1,105 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+from src.core.boot_metrics import DEFAULT_PATH, read_history
+
+MILESTONES = ("imports_done", "core_ready", "first_hazard_alert", "all_done")
+
+
+def profile_imports(module):
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns [(name, self_us, cumulative_us)] in import order.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=Path.cwd(),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # Header line
+        rows.append((parts[2].rstrip(), self_us, cumulative_us))
+
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        print(f"[Imports] import {module} failed: {error[-1] if error else '?'}")
+    return rows
+
+
+def print_profile(module, rows, top):
+    if not rows:
+        return
+    total = sum(self_us for _, self_us, _ in rows)
+    print(f"import {module}: {len(rows)} modules, {total / 1000:.0f} ms")
+
+    # What the module imports directly (the name is indented by nesting depth)
+    print("\nSlowest direct imports (cumulative):")
+    # Children are listed before their parent: walk back from the module
+    direct = []
+    for name, self_us, cumulative_us in reversed(rows[:-1]):
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((name, self_us, cumulative_us))
+    for name, _, cumulative_us in sorted(direct, key=lambda r: -r[2])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name.strip()}")
+
+    # Self time grouped by package, e.g. all of torch.* together
+    packages = {}
+    for name, self_us, _ in rows:
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print("\nPackages by own import time:")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+
+def print_history(path, last):
+    history = read_history(path)
+    if not history:
+        print(f"No boots recorded in {path}")
+        return
+    print(f"\nBoot milestones (s since process start), {path}:")
+    print(f"  {'boot':<20}" + "".join(f"{m:>20}" for m in MILESTONES))
+    for boot, milestones in list(history.items())[-last:]:
+        cells = "".join(
+            f"{milestones[m]:>20.2f}" if m in milestones else f"{'-':>20}"
+            for m in MILESTONES
+        )
+        print(f"  {boot:<20}{cells}")
+
+
+if __name__ == "__main__":
+    # Import-time profile of the entry point, run from the repository root:
+    #   python -m config.profile_imports
+    #   python -m config.profile_imports src.core.ocr.paddle_ocr --top 10
+    #   python -m config.profile_imports --history
+    parser = argparse.ArgumentParser(description="Import-time and boot benchmark")
+    parser.add_argument("modules", nargs="*", default=["main"])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--history", action="store_true", help="show the recorded boot milestones"
+    )
+    parser.add_argument("--last", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.history:
+        print_history(DEFAULT_PATH, args.last)
+    else:
+        for module in args.modules:
+            print_profile(module, profile_imports(module), args.top)
+            print()
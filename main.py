@@ -7,15 +7,19 @@ from pathlib import Path
 
 from src.core.object_detection.object_detector import ObjectDetector
 from src.core.hole_detector import HoleDetector
-from src.core.menu_controller import MenuController
-from src.core.ocr.paddle_ocr import OCR
+from src.core.menu_controller import MenuController, MENU_TEXT, BUTTONS_TEXT
 from src.drivers.audio_driver import Audio
 from src.core.priority_queue import AudioPriorityQueue
 from src.drivers.camera_driver import CameraDriver
 from src.drivers.hailo_driver import HailoDriver
-from src.core.navigation import Navigation
 from src.core.aerial_obstacle_detector import AerialObstacleDetector
+from src.core.depth_fusion import DepthFusionBuffer
+from src.core.motion_compensation import HeadingCompensator
+from src.core.tof_fusion import TofDepthFusion
 from src.ui.audio_interface import AudioInterface
+from src.core.startup import StartupOrchestrator
+from src.core.boot_metrics import BootMetrics
+from src.core.warm_cache import WarmCache
 
 
 base_path = Path.cwd()
@@ -30,10 +34,27 @@ depth_model_path = str(base_path / "assets" / "scdepthv3.hef")
 
 video_w, video_h = 1280, 960
 
+# Run depth inference on one camera frame out of every N. The fused depth map
+# keeps the detectors stable between inferences, so the Hailo chip has more
+# time for object detection.
+depth_inference_stride = 2
 
-audio_driver = Audio()
-audio_interface = AudioInterface(audio_driver)
-audio_queue = AudioPriorityQueue(audio_interface)
+# Horizontal field of view of the global shutter camera (degrees)
+camera_hfov_deg = 66.0
+
+# Open the voice menu by saying the wake phrase ("hola asistente") as well as
+# with both buttons. Costs a few percent of one core while people talk nearby.
+wake_word_enabled = False
+
+# Fixed messages synthesized into the warm cache once everything is up, so
+# they play without waiting for Piper (other phrases are cached when spoken)
+prewarm_phrases = [
+    "Detección de obstáculos activa.",
+    "El menú de voz todavía se está cargando.",
+    "La navegación todavía se está iniciando.",
+    MENU_TEXT,
+    BUTTONS_TEXT,
+]
 
 
 # Añade 'depth_driver' a los argumentos del hilo
@@ -43,10 +64,19 @@ def frame_producer_thread(
     aerial_obstacle_detector,
     hole_detector,
     depth_driver,
-    navigation,
+    depth_fusion,
+    tof_driver,
+    tof_fusion,
+    get_heading,
 ):
 
     depth_h, depth_w, _ = depth_driver.get_input_shape()
+    frame_count = 0
+
+    # Re-aligns the fused depth map with the world after head turns
+    heading_compensator = HeadingCompensator(
+        depth_fusion.shape[1], hfov_deg=camera_hfov_deg
+    )
 
     while True:
         try:
@@ -57,22 +87,39 @@ def frame_producer_thread(
                 object_detector.process_frame(frame)
                 raw_detections = object_detector.getRawDetections()
 
+                frame_count += 1
+                if frame_count % depth_inference_stride != 0:
+                    continue
+
                 # --- B: Depth Inference ---
                 frame_resized = cv2.resize(frame, (depth_w, depth_h))
                 raw_output = depth_driver.infer(frame_resized)
                 depth_array = depth_driver.extract_depth_map(raw_output)
 
                 if depth_array is not None:
+                    # Compass heading, None until navigation is up
+                    heading = get_heading()
+
+                    # Shift the previous estimate by the turn since the last
+                    # depth frame, then fuse the new map once; both
+                    # detectors read the result
+                    heading_compensator.align(depth_fusion, heading)
+                    depth_fusion.update(depth_array)
+
+                    # Calibrate relative depth to mm with the latest ToF frame
+                    if tof_driver is not None:
+                        tof_fusion.update(depth_fusion.mean, tof_driver.latest())
+
                     # --- C: Distribute depth matrix ---
                     aerial_obstacle_detector.process_frame(
                         frame_resized,
                         depth_array,
                         raw_detections,
-                        current_heading=navigation.compass,
+                        current_heading=heading,
                     )
 
                     hole_detector.process_frame(
-                        frame_resized, depth_array, current_heading=navigation.compass
+                        frame_resized, depth_array, current_heading=heading
                     )
 
         except Exception as e:
@@ -80,109 +127,268 @@ def frame_producer_thread(
             break
 
 
-if __name__ == "__main__":
-    # ******** Initialize hardware drivers and core components
+# ******** Component factories, see StartupOrchestrator
+def start_audio():
+    # Cues and spoken phrases are kept between boots in assets/warm_cache
+    audio_driver = Audio(warm_cache=WarmCache(), cached_phrases=prewarm_phrases)
+    audio_interface = AudioInterface(audio_driver)
+    audio_queue = AudioPriorityQueue(audio_interface)
+    Thread(
+        target=audio_interface.consume_queue_forever,
+        args=(audio_queue,),
+        daemon=True,
+    ).start()
+    return audio_queue
 
-    try:
-        # Initialize camera drivers
-        global_shutter_camera = CameraDriver(camera_num=0, enable_af=False)
-        owlsight64mp_camera = CameraDriver(camera_num=1, enable_af=True)
 
-        # Initialize Hailo driver for object detection
-        object_detection_driver = HailoDriver(detection_model_path, labels_path)
-        object_detection_driver.start()
+def start_detection_model():
+    # Initialize Hailo driver for object detection
+    object_detection_driver = HailoDriver(detection_model_path, labels_path)
+    object_detection_driver.start()
+    return object_detection_driver
 
-        # Get model input shape for camera configuration
-        model_h, model_w, _ = object_detection_driver.get_input_shape()
 
-        # Configure cameras with model input shape
-        global_shutter_camera.configure(video_w, video_h, model_w, model_h)
-        owlsight64mp_camera.configure(video_w, video_h, model_w, model_h)
+def start_cameras(object_detection_driver):
+    global_shutter_camera = CameraDriver(camera_num=0, enable_af=False)
+    owlsight64mp_camera = CameraDriver(camera_num=1, enable_af=True)
 
-        # Start camera streams (no preview)
-        global_shutter_camera.start(preview=False)
-        owlsight64mp_camera.start(preview=False)
-    except Exception as e:
-        print(f"[Main]: Error initializing camera and model: {e}")
+    # Configure cameras with model input shape
+    model_h, model_w, _ = object_detection_driver.get_input_shape()
+    global_shutter_camera.configure(video_w, video_h, model_w, model_h)
+    owlsight64mp_camera.configure(video_w, video_h, model_w, model_h)
 
-    # Initialize OCR driver
-    try:
-        ocr_driver = OCR(
-            owlsight64mp_camera,
-            audio_queue,
-            det_model_path=str(base_path / "assets" / "ocr_det.hef"),
-        )
-    except Exception as e:
-        print(f"[Main]: Error initializing OCR: {e}")
-        ocr_driver = None
+    # Start camera streams (no preview)
+    global_shutter_camera.start(preview=False)
+    owlsight64mp_camera.start(preview=False)
+    return global_shutter_camera, owlsight64mp_camera
+
+
+def start_depth_model(_object_detection_driver):
+    # Requires the detection model only so both Hailo models load one at a time
+    depth_driver = HailoDriver(depth_model_path, labels_path="")
+    depth_driver.start()
+    return depth_driver
 
-    # Initialize depth model driver
-    try:
-        depth_driver = HailoDriver(depth_model_path, labels_path="")
-        depth_driver.start()
-    except Exception as e:
-        print(f"[Main]: Error initializing Depth Model: {e}")
-        depth_driver = None
 
-    # Initialize depth detector
+def start_tof():
+    # Optional: gives the depth map a metric scale
+    from src.drivers.tof_driver import Tof
+
+    tof_driver = Tof(sensor_height_mm=1220)
+    tof_driver.start_acquisition()
+    return tof_driver
+
+
+def start_hazard_detectors(audio_queue, depth_driver):
+    # Temporal fusion of depth maps shared by both depth detectors
+    depth_fusion = DepthFusionBuffer(shape=(256, 320))
+    tof_fusion = TofDepthFusion(camera_hfov_deg=camera_hfov_deg)
+
     aerial_obstacle_detector = AerialObstacleDetector(
         hailo_driver=depth_driver,
         audio_queue=audio_queue,
         user_height_mm=1400,
         camera_height_mm=1100,
+        depth_fusion=depth_fusion,
+        frame_stride=1,
+        hfov_deg=camera_hfov_deg,
+        tof_fusion=tof_fusion,
     )
 
-    # Initialize object detector
-    object_detector = ObjectDetector(
-        global_shutter_camera, object_detection_driver, audio_queue
-    )
-
-    # Initialize obstacle detector
     hole_detector = HoleDetector(
         hailo_driver=depth_driver,
         audio_queue=audio_queue,
         user_height_mm=1780,
         camera_height_mm=1220,
+        hfov_deg=camera_hfov_deg,
+        depth_fusion=depth_fusion,
+        tof_fusion=tof_fusion,
     )
+    return {
+        "depth_fusion": depth_fusion,
+        "tof_fusion": tof_fusion,
+        "aerial": aerial_obstacle_detector,
+        "hole": hole_detector,
+    }
 
-    # Initialize navigation logic
-    navigation = Navigation(audio_queue)
 
-    # Initialize menu controller
-    menuController = MenuController(
-        object_detector,
-        navigation,
-        hole_detector,
-        audio_queue,
-        ocr_driver,
-        aerial_obstacle_detector,
-    )
+def start_object_detector(cameras, object_detection_driver, audio_queue):
+    global_shutter_camera, _ = cameras
+    return ObjectDetector(global_shutter_camera, object_detection_driver, audio_queue)
 
-    t_audio = Thread(
-        target=audio_interface.consume_queue_forever,
-        args=(audio_queue,),
-        daemon=True,
-    )
+
+def start_vision(
+    cameras, object_detector, hazards, depth_driver, tof_driver, startup
+):
+    global_shutter_camera, _ = cameras
     t_camera = Thread(
         target=frame_producer_thread,
         args=(
             global_shutter_camera,
             object_detector,
-            aerial_obstacle_detector,
-            hole_detector,
+            hazards["aerial"],
+            hazards["hole"],
             depth_driver,
-            navigation,
+            hazards["depth_fusion"],
+            tof_driver,
+            hazards["tof_fusion"],
+            lambda: getattr(startup.get("navigation"), "compass", None),
         ),
         daemon=True,
     )
+    t_camera.start()
+    return t_camera
 
-    t_navigation = Thread(target=navigation.thread_update_location, daemon=True)
-    t_imu = Thread(target=navigation.thread_update_imu, daemon=True)
 
-    t_audio.start()
-    t_camera.start()
-    t_navigation.start()
-    t_imu.start()
+def start_connectivity():
+    from src.core.connectivity_monitor import ConnectivityMonitor
+
+    connectivity = ConnectivityMonitor()
+    connectivity.start()
+    return connectivity
+
+
+def start_navigation(audio_queue, connectivity):
+    # Background components import their modules here, once the hazard
+    # detectors are running, instead of when main.py is loaded
+    from src.core.navigation import Navigation
+
+    navigation = Navigation(audio_queue, connectivity=connectivity)
+    Thread(target=navigation.thread_update_location, daemon=True).start()
+    Thread(target=navigation.thread_update_imu, daemon=True).start()
+    Thread(target=navigation.thread_update_filter, daemon=True).start()
+    return navigation
+
+
+def start_ocr(cameras, audio_queue, _depth_driver, connectivity):
+    # Waits for the depth model so the OCR detector is the last Hailo model
+    from src.core.ocr.paddle_ocr import OCR
+
+    _, owlsight64mp_camera = cameras
+    return OCR(
+        owlsight64mp_camera,
+        audio_queue,
+        det_model_path=str(base_path / "assets" / "ocr_det.hef"),
+        connectivity=connectivity,
+    )
+
+
+def start_voice(audio_queue):
+    from src.ui.voice_interface import VoiceInterface
+
+    return VoiceInterface(audio_queue)
+
+
+def announce_core_ready(startup):
+    audio_queue = startup.get("audio")
+    if audio_queue is None:
+        return
+    if startup.is_ready("vision"):
+        message = "Detección de obstáculos activa."
+    else:
+        message = "Error al iniciar la detección de obstáculos."
+    audio_queue.put(audio_queue.VOICE_MENU, message)
+
+
+def prewarm_speech(startup):
+    audio_queue = startup.get("audio")
+    if audio_queue is None:
+        return
+    Thread(
+        target=audio_queue.audio_interface.prewarm,
+        args=(prewarm_phrases,),
+        daemon=True,
+    ).start()
+
+
+def attach_to_menu(startup, attribute):
+    """on_ready callback that hands a late component to the menu."""
+
+    def attach(value):
+        menu = startup.get("menu")
+        if menu is None:
+            return
+        if attribute == "voice_interface":
+            menu.set_voice_interface(value)
+        else:
+            setattr(menu, attribute, value)
+
+    return attach
+
+
+if __name__ == "__main__":
+    # Boot benchmark, see logs/boot_metrics.jsonl
+    boot = BootMetrics()
+    boot.mark("imports_done")
+
+    startup = StartupOrchestrator()
+
+    def track_first_alert(audio_queue):
+        audio_queue.on_first_alert = lambda: boot.mark("first_hazard_alert")
+
+    # Core: audio and hazard detection, loaded first and in parallel
+    startup.add("audio", start_audio, core=True, on_ready=track_first_alert)
+    startup.add("detection_model", start_detection_model, core=True)
+    startup.add("cameras", start_cameras, ["detection_model"], core=True)
+    startup.add("depth_model", start_depth_model, ["detection_model"], core=True)
+    startup.add("tof", start_tof, core=True)
+    startup.add(
+        "hazards", start_hazard_detectors, ["audio", "depth_model"], core=True
+    )
+    startup.add(
+        "object_detector",
+        start_object_detector,
+        ["cameras", "detection_model", "audio"],
+        core=True,
+    )
+    startup.add(
+        "vision",
+        lambda *args: start_vision(*args, startup),
+        ["cameras", "object_detector", "hazards", "depth_model", "tof"],
+        core=True,
+    )
+    # Buttons work as soon as the detectors exist
+    startup.add(
+        "menu",
+        lambda object_detector, hazards, audio_queue: MenuController(
+            object_detector,
+            None,
+            hazards["hole"],
+            audio_queue,
+            None,
+            hazards["aerial"],
+            wake_word=wake_word_enabled,
+        ),
+        ["object_detector", "hazards", "audio"],
+        core=True,
+    )
+
+    # Background: loaded once the safety features are live
+    startup.add("connectivity", start_connectivity)
+    startup.add(
+        "navigation",
+        start_navigation,
+        ["audio", "connectivity"],
+        on_ready=attach_to_menu(startup, "navigation"),
+    )
+    startup.add(
+        "ocr",
+        start_ocr,
+        ["cameras", "audio", "depth_model", "connectivity"],
+        on_ready=attach_to_menu(startup, "ocr"),
+    )
+    startup.add(
+        "voice",
+        start_voice,
+        ["audio"],
+        on_ready=attach_to_menu(startup, "voice_interface"),
+    )
+
+    startup.on_core_ready(lambda: boot.mark("core_ready"))
+    startup.on_core_ready(lambda: announce_core_ready(startup))
+    startup.on_all_done(lambda: boot.mark("all_done"))
+    startup.on_all_done(lambda: prewarm_speech(startup))
+    startup.start()
 
     try:
         while True:
@@ -190,3 +396,4 @@ if __name__ == "__main__":
 
     except KeyboardInterrupt:
         print("[Main] Stopped Main")
+        print(startup.report())
@@ -6,14 +6,27 @@ from pathlib import Path
 
 class AerialObstacleDetector:
     def __init__(
-        self, hailo_driver, audio_queue, user_height_mm=1780, camera_height_mm=1220
+        self,
+        hailo_driver,
+        audio_queue,
+        user_height_mm=1780,
+        camera_height_mm=1220,
+        depth_fusion=None,
+        frame_stride=3,
+        hfov_deg=66.0,
+        tof_fusion=None,
     ):
         self.hailo_driver = hailo_driver
         self.audio_queue = audio_queue
+        self.depth_fusion = depth_fusion
+        self.tof_fusion = tof_fusion
+        self.hfov_deg = hfov_deg
 
         # Main switch
         self.is_active = False
         self.frame_counter = 0
+        # Analyze one depth frame out of every 'frame_stride'
+        self.frame_stride = frame_stride
 
         # --- STATE VARIABLES (Anti-Spam) ---
         self.danger_streak = 0
@@ -25,7 +38,15 @@ class AerialObstacleDetector:
         self.last_obstacle_heading = None
 
         self.model_h, self.model_w, _ = self.hailo_driver.get_input_shape()
+        # Relative threshold used until the ToF sensor calibrates the depth.
+        # It keeps the original comparison (values ABOVE it block the
+        # tunnel), which is the tuned behaviour without ToF. The metric path
+        # below reads scdepthv3 as depth (high = far) like the hole detector
+        # and TofDepthFusion; the two polarities have not been reconciled on
+        # recorded frames yet, so neither threshold is changed blindly.
         self.proximity_threshold = 8000.0
+        # Absolute threshold used once the ToF sensor has calibrated the depth
+        self.proximity_mm = 1500.0
         self._calibrate_geometry(user_height_mm, camera_height_mm)
 
     def _calibrate_geometry(self, user_height, camera_height):
@@ -105,9 +126,18 @@ class AerialObstacleDetector:
             return False, 0.0
 
         self.frame_counter += 1
-        if self.frame_counter % 3 != 0:
+        if self.frame_counter % self.frame_stride != 0:
             return False, 0.0
 
+        # Use the fused map and drop flickering pixels when fusion is enabled
+        stable_tunnel = True
+        if self.depth_fusion is not None and self.depth_fusion.is_ready:
+            depth_array = self.depth_fusion.mean
+            stable_tunnel = self.depth_fusion.stable[
+                self.rect_y : self.rect_y + self.rect_height,
+                self.rect_x : self.rect_x + self.rect_width,
+            ]
+
         # 1. Extract tunnel
         high_tunnel = depth_array[
             self.rect_y : self.rect_y + self.rect_height,
@@ -115,8 +145,13 @@ class AerialObstacleDetector:
         ]
 
         # 2. Calculate Blockage (Adjusted to 25% to avoid ghosts)
+        if self.tof_fusion is not None and self.tof_fusion.is_calibrated:
+            # Metric depth: anything closer than proximity_mm blocks the tunnel
+            near_pixels = self.tof_fusion.to_metric(high_tunnel) < self.proximity_mm
+        else:
+            near_pixels = high_tunnel > self.proximity_threshold
         high_blockage = (
-            np.sum(high_tunnel > self.proximity_threshold) / high_tunnel.size
+            np.sum(near_pixels & stable_tunnel) / high_tunnel.size
         ) * 100
         has_danger = high_blockage > 25.0
 
@@ -128,6 +163,8 @@ class AerialObstacleDetector:
         # 4. TURN DETECTION (Immediate Reset)
         # ==========================================
         # If we were muted looking at a wall, and IMU tells us you turned...
+        # Small turns keep the obstacle confirmed: the fused depth map is
+        # shifted with the heading, so the obstacle stays put in the world.
         if (
             current_heading is not None
             and self.is_currently_blocked
@@ -136,8 +173,8 @@ class AerialObstacleDetector:
             # Calculate exact angular difference (handles 360 to 0 wrap)
             diff = (current_heading - self.last_obstacle_heading + 180) % 360 - 180
 
-            # If you turned more than 45 degrees left or right:
-            if abs(diff) > 45.0:
+            # If the obstacle has left the camera's field of view:
+            if abs(diff) > self.hfov_deg / 2.0:
                 self.is_currently_blocked = False
                 self.last_alarm_time = 0.0  # Reset clock to beep IMMEDIATELY
                 self.danger_streak = 0
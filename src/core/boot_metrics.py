@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH = Path.cwd() / "logs" / "boot_metrics.jsonl"
+
+
+def process_age():
+    """
+    Seconds since this process was created, so interpreter start-up and
+    module imports are counted too. None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; starttime is field 22 of the file
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class BootMetrics:
+    """
+    Boot benchmark: seconds from process start to each milestone.
+
+    Milestones are marked once (the first call wins) and appended to
+    logs/boot_metrics.jsonl as {"boot", "milestone", "s"} records, one boot
+    per start-up, so the numbers can be compared across versions with
+    `python -m config.profile_imports --history`.
+
+    The most important one is "first_hazard_alert": how long a user who
+    switches the device on is walking without any obstacle warning.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self.boot = time.strftime("%Y-%m-%dT%H:%M:%S")
+        age = process_age()
+        # Monotonic time at which the process started
+        self.origin = time.monotonic() - (age if age is not None else 0.0)
+        self.milestones = {}
+        self.lock = threading.Lock()
+
+    def mark(self, name):
+        """Records a milestone; returns its time in seconds since boot."""
+        with self.lock:
+            if name in self.milestones:
+                return self.milestones[name]
+            seconds = time.monotonic() - self.origin
+            self.milestones[name] = seconds
+
+        print(f"[Boot] {name} at {seconds:.2f} s")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                record = {"boot": self.boot, "milestone": name, "s": round(seconds, 3)}
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"[Boot] Could not write {self.path}: {e}")
+        return seconds
+
+
+def read_history(path=DEFAULT_PATH):
+    """{boot: {milestone: seconds}} in file order."""
+    history = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                history.setdefault(record["boot"], {})[record["milestone"]] = record["s"]
+    except OSError:
+        pass
+    return history
@@ -0,0 +1,135 @@
+import socket
+import threading
+import time
+
+# Public DNS resolvers: a TCP connect to port 53 needs no HTTP stack and
+# answers in one round trip
+DEFAULT_PROBES = (("8.8.8.8", 53), ("1.1.1.1", 53))
+
+
+class ConnectivityMonitor:
+    """
+    Internet access, probed in the background.
+
+    Callers read the cached state with is_online() instead of making a
+    blocking request before every network call, so offline users never
+    wait for a timeout. While online the probe runs every `online_interval_s`;
+    after a failure it retries with exponential backoff, from
+    `min_backoff_s` up to `max_backoff_s`, to save power and radio time when
+    there is no signal for a while.
+
+    Network code reports its own results with report_success() and
+    report_failure(); a failure marks the link as down at once and
+    restarts the backoff.
+    """
+
+    def __init__(
+        self,
+        probes=DEFAULT_PROBES,
+        timeout_s=1.5,
+        online_interval_s=30.0,
+        min_backoff_s=2.0,
+        max_backoff_s=120.0,
+    ):
+        self.probes = probes
+        self.timeout_s = timeout_s
+        self.online_interval_s = online_interval_s
+        self.min_backoff_s = min_backoff_s
+        self.max_backoff_s = max_backoff_s
+
+        self.online = False  # Offline until the first probe succeeds
+        self.checked = threading.Event()
+        self.wake = threading.Event()
+        self.backoff_s = min_backoff_s
+        self.last_change = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    def is_online(self):
+        return self.online
+
+    def wait_until_checked(self, timeout=None):
+        """Blocks until the first probe finished; returns is_online()."""
+        self.checked.wait(timeout)
+        return self.online
+
+    def check_now(self):
+        """Probes again without waiting for the current interval."""
+        self.wake.set()
+
+    def report_success(self):
+        self._set_online(True)
+
+    def report_failure(self):
+        if self.online:
+            # Confirm with a probe now, then back off from the start
+            self.backoff_s = self.min_backoff_s
+            self.wake.set()
+        self._set_online(False)
+
+    def probe(self):
+        """One blocking probe: True if any probe host accepts a connection."""
+        for host, port in self.probes:
+            try:
+                with socket.create_connection((host, port), timeout=self.timeout_s):
+                    return True
+            except OSError:
+                continue
+        return False
+
+    def _loop(self):
+        while self.running:
+            online = self.probe()
+            self._set_online(online)
+            self.checked.set()
+
+            if online:
+                self.backoff_s = self.min_backoff_s
+                delay = self.online_interval_s
+            else:
+                delay = self.backoff_s
+                self.backoff_s = min(self.backoff_s * 2, self.max_backoff_s)
+
+            self.wake.wait(delay)
+            self.wake.clear()
+
+    def _set_online(self, online):
+        if online == self.online:
+            return
+        self.online = online
+        self.last_change = time.monotonic()
+        print(f"[Connectivity] {'Online' if online else 'Offline'}.")
+
+
+if __name__ == "__main__":
+    # Watch the link state, e.g. while toggling Wi-Fi:
+    #   python -m src.core.connectivity_monitor
+    monitor = ConnectivityMonitor(online_interval_s=5.0, max_backoff_s=16.0)
+    monitor.start()
+    start = time.monotonic()
+    state = "online" if monitor.wait_until_checked() else "offline"
+    print(f"First probe: {state} after {time.monotonic() - start:.2f} s")
+
+    # is_online() is a plain attribute read
+    calls = 100_000
+    start = time.perf_counter()
+    for _ in range(calls):
+        monitor.is_online()
+    print(f"is_online(): {(time.perf_counter() - start) / calls * 1e9:.0f} ns per call")
+
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        monitor.stop()
@@ -0,0 +1,146 @@
+import time
+import numpy as np
+
+
+class DepthFusionBuffer:
+    """
+    Temporal fusion of scdepthv3 depth maps.
+
+    Keeps a fixed ring buffer of the most recent raw maps plus an
+    exponentially weighted running mean and variance per pixel. Every array
+    is allocated once in __init__ and updated in place, so fusing a frame does
+    not allocate memory on the vision thread.
+
+    The detectors read `mean` instead of the raw frame and use `stable` to
+    ignore pixels whose depth flickers between frames.
+    """
+
+    def __init__(self, shape=(256, 320), history=4, alpha=0.35, flicker_ratio=0.15):
+        """
+        shape: (height, width) of the depth maps.
+        history: number of raw maps kept in the ring buffer.
+        alpha: weight of the newest frame in the running estimate.
+        flicker_ratio: max standard deviation, relative to the mean, for a
+            pixel to be considered stable.
+        """
+        self.shape = tuple(shape)
+        self.history = history
+        self.alpha = alpha
+        self.flicker_ratio = flicker_ratio
+
+        self.frames = np.zeros((history, *self.shape), dtype=np.float32)
+        self.index = 0
+        self.count = 0
+        self.timestamp = 0.0
+
+        self.mean = np.zeros(self.shape, dtype=np.float32)
+        self.variance = np.zeros(self.shape, dtype=np.float32)
+        self.stable = np.ones(self.shape, dtype=bool)
+
+        # Scratch buffers reused by update() and shift()
+        self._delta = np.empty(self.shape, dtype=np.float32)
+        self._increment = np.empty(self.shape, dtype=np.float32)
+
+        # Columns uncovered by the last shift(); they have no history, so the
+        # next frame seeds them directly instead of blending with stale data.
+        self._reseed_cols = None
+
+    @property
+    def is_ready(self):
+        return self.count > 0
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+        self.variance.fill(0.0)
+        self.stable.fill(True)
+        self._reseed_cols = None
+
+    def shift(self, dx):
+        """
+        Moves the fused estimate dx pixels to the right (negative = left) so it
+        stays aligned with the world after the camera rotates. The raw frames
+        in the ring buffer are left untouched.
+        """
+        width = self.shape[1]
+        if dx == 0 or self.count == 0:
+            return
+        if abs(dx) >= width:
+            self.reset()
+            return
+
+        for array in (self.mean, self.variance):
+            # Copy through the scratch buffer: overlapping in-place slices
+            # would make NumPy allocate a temporary.
+            if dx > 0:
+                np.copyto(self._delta[:, dx:], array[:, :-dx])
+                np.copyto(array[:, dx:], self._delta[:, dx:])
+            else:
+                np.copyto(self._delta[:, :dx], array[:, -dx:])
+                np.copyto(array[:, :dx], self._delta[:, :dx])
+
+        if dx > 0:
+            uncovered = (0, dx)
+        else:
+            uncovered = (width + dx, width)
+        self.stable[:, uncovered[0] : uncovered[1]] = False
+
+        # Merge with a pending region if two shifts happen between frames
+        if self._reseed_cols is not None:
+            uncovered = (
+                min(uncovered[0], self._reseed_cols[0]),
+                max(uncovered[1], self._reseed_cols[1]),
+            )
+        self._reseed_cols = uncovered
+
+    def update(self, depth_array):
+        """Adds a new depth map and refreshes the fused estimate in place."""
+        slot = self.frames[self.index]
+        np.copyto(slot, depth_array, casting="unsafe")
+        self.index = (self.index + 1) % self.history
+        self.count += 1
+        self.timestamp = time.time()
+
+        if self.count == 1:
+            np.copyto(self.mean, slot)
+            self.variance.fill(0.0)
+            self.stable.fill(True)
+            return self.mean
+
+        # Incremental exponentially weighted mean and variance:
+        #   delta = x - mean
+        #   mean += alpha * delta
+        #   var   = (1 - alpha) * (var + alpha * delta^2)
+        np.subtract(slot, self.mean, out=self._delta)
+        np.multiply(self._delta, self.alpha, out=self._increment)
+        np.add(self.mean, self._increment, out=self.mean)
+        np.multiply(self._delta, self._increment, out=self._delta)
+        np.add(self.variance, self._delta, out=self.variance)
+        np.multiply(self.variance, 1.0 - self.alpha, out=self.variance)
+
+        # A pixel is stable when std <= flicker_ratio * |mean|, compared in
+        # squared form to avoid a sqrt over the whole map.
+        np.multiply(self.mean, self.flicker_ratio, out=self._increment)
+        np.square(self._increment, out=self._increment)
+        np.less_equal(self.variance, self._increment, out=self.stable)
+
+        if self._reseed_cols is not None:
+            start, stop = self._reseed_cols
+            self.mean[:, start:stop] = slot[:, start:stop]
+            self.variance[:, start:stop] = 0.0
+            # Newly seen columns need a second frame before they count
+            self.stable[:, start:stop] = False
+            self._reseed_cols = None
+        return self.mean
+
+    def latest(self):
+        """Most recent raw depth map (a view into the ring buffer)."""
+        if self.count == 0:
+            return None
+        return self.frames[(self.index - 1) % self.history]
+
+    def frame(self, age):
+        """Raw depth map from `age` updates ago (0 = latest)."""
+        if age >= min(self.count, self.history):
+            return None
+        return self.frames[(self.index - 1 - age) % self.history]
@@ -0,0 +1,204 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path.cwd() / "assets" / "geo_cache.sqlite"
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lon, precision=8):
+    """
+    Standard geohash of a position. Precision 8 is a ~38 x 19 m cell,
+    precision 7 a ~153 x 153 m cell.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_range[0] = mid
+            else:
+                value <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+class GeoCache:
+    """
+    Persistent SQLite cache for network answers keyed by geohash cells.
+
+    Entries have a kind ("address", "route"), a key and a JSON value. Reads
+    honour a TTL; callers can still ask for expired entries when the network
+    is down, since an old answer beats no answer. The least recently used
+    entries are evicted beyond `max_entries`; reads only note their access
+    time in memory, written to disk with the next put() or close(), so a
+    lookup never waits for an SD card write.
+    """
+
+    ADDRESS_PRECISION = 8  # Street-level: ~38 m cells
+    ROUTE_PRECISION = 7  # Same block: ~150 m cells
+    ADDRESS_TTL_S = 30 * 24 * 3600
+    ROUTE_TTL_S = 7 * 24 * 3600
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.touched = {}  # (kind, key) -> last access not yet written
+
+        # One connection shared by the voice and prewarm threads
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed)")
+        self.db.commit()
+
+    def get(self, kind, key, max_age_s=None):
+        """Cached value, or None if missing or older than max_age_s."""
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value, created FROM entries WHERE kind = ? AND key = ?",
+                (kind, key),
+            ).fetchone()
+            if row is None or (max_age_s is not None and now - row[1] > max_age_s):
+                self.misses += 1
+                return None
+            self.touched[(kind, key)] = now
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, kind, key, value):
+        now = time.time()
+        with self.lock:
+            # Access times first, so the eviction below sees them
+            self._flush_touched()
+            self.touched.pop((kind, key), None)
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(value), now, now),
+            )
+            count = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count > self.max_entries:
+                self.db.execute(
+                    """DELETE FROM entries WHERE rowid IN (
+                        SELECT rowid FROM entries ORDER BY accessed LIMIT ?)""",
+                    (count - self.max_entries,),
+                )
+            self.db.commit()
+
+    def _flush_touched(self):
+        # Caller holds self.lock and commits
+        if self.touched:
+            self.db.executemany(
+                "UPDATE entries SET accessed = ? WHERE kind = ? AND key = ?",
+                [(t, kind, key) for (kind, key), t in self.touched.items()],
+            )
+            self.touched.clear()
+
+    def contains(self, kind, key):
+        """True if the entry exists, whatever its age (no LRU update)."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT 1 FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return row is not None
+
+    def is_fresh(self, kind, key, max_age_s):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT created FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= max_age_s
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    def address_key(self, lat, lon):
+        return geohash(lat, lon, self.ADDRESS_PRECISION)
+
+    def route_key(self, lat, lon, destination):
+        return f"{geohash(lat, lon, self.ROUTE_PRECISION)}>{destination}"
+
+    # ------------------------------------------------------------------
+    # Reverse geocoding
+    # ------------------------------------------------------------------
+    def get_address(self, lat, lon, allow_stale=False):
+        max_age = None if allow_stale else self.ADDRESS_TTL_S
+        return self.get("address", self.address_key(lat, lon), max_age)
+
+    def put_address(self, lat, lon, message):
+        self.put("address", self.address_key(lat, lon), message)
+
+    # ------------------------------------------------------------------
+    # Routes (origin cell -> favorite)
+    # ------------------------------------------------------------------
+    def get_route(self, lat, lon, destination, allow_stale=False):
+        max_age = None if allow_stale else self.ROUTE_TTL_S
+        return self.get("route", self.route_key(lat, lon, destination), max_age)
+
+    def put_route(self, lat, lon, destination, waypoints):
+        self.put("route", self.route_key(lat, lon, destination), waypoints)
+
+    def close(self):
+        with self.lock:
+            self._flush_touched()
+            self.db.commit()
+            self.db.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Known value from the geohash reference implementation
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = GeoCache(Path(tmp) / "cache.sqlite", max_entries=100)
+        cache.put_address(8.297861, -62.717013, "en la calle de casa")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            cache.get_address(8.297870, -62.717020)  # Same ~38 m cell
+        print(f"Cached address lookup: {(time.perf_counter() - start):.3f} ms")
+        print(f"Hit: {cache.get_address(8.297870, -62.717020)!r}")
+
+        for i in range(150):
+            cache.put_address(8.0 + i * 0.01, -62.0, f"lugar {i}")
+        total = cache.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        print(f"Entries after LRU eviction: {total}")
@@ -0,0 +1,276 @@
+import time
+import numpy as np
+
+
+class GroundPlaneEstimator:
+    """
+    Fits the floor plane to a depth map and measures how far other pixels sit
+    below it, in millimetres.
+
+    The depth model only gives relative depth, so the fitted plane is expressed
+    in model units. The known camera height fixes the scale: the distance from
+    the camera to the plane IS the camera height, so one model unit equals
+    camera_height_mm / plane_distance millimetres.
+    """
+
+    def __init__(
+        self,
+        model_w,
+        model_h,
+        camera_height_mm,
+        hfov_deg=66.0,
+        grid_step=8,
+        roi_top_ratio=0.45,
+        hypotheses=64,
+        inlier_tolerance=0.03,
+        min_inlier_ratio=0.35,
+        max_tilt_deg=40.0,
+        smoothing=0.3,
+        seed=None,
+    ):
+        self.model_w = model_w
+        self.model_h = model_h
+        self.camera_height_mm = float(camera_height_mm)
+        self.hypotheses = hypotheses
+        self.inlier_tolerance = inlier_tolerance
+        self.min_inlier_ratio = min_inlier_ratio
+        self.min_normal_y = np.cos(np.radians(max_tilt_deg))
+        self.smoothing = smoothing
+        self.rng = np.random.default_rng(seed)
+
+        # Pinhole intrinsics derived from the horizontal field of view.
+        # Pixels are square, so the same focal length is used for both axes.
+        self.focal_px = (model_w / 2.0) / np.tan(np.radians(hfov_deg) / 2.0)
+        self.cx = (model_w - 1) / 2.0
+        self.cy = (model_h - 1) / 2.0
+
+        # The floor is only visible in the lower part of the image, so the
+        # plane is fitted on a sparse grid over that band. Rays are
+        # precomputed once because the grid never changes.
+        roi_top = int(model_h * roi_top_ratio)
+        self.grid_v, self.grid_u = np.mgrid[
+            roi_top:model_h:grid_step, grid_step // 2 : model_w : grid_step
+        ]
+        self.grid_v = self.grid_v.ravel()
+        self.grid_u = self.grid_u.ravel()
+        self.grid_rays = self._rays(self.grid_u, self.grid_v)
+
+        # Plane state: unit normal pointing DOWN towards the floor (+y in
+        # camera coordinates) and distance from the camera to the plane.
+        self.normal = None
+        self.distance = None
+        self.inlier_ratio = 0.0
+        self.last_fit_ms = 0.0
+
+    def _rays(self, u, v):
+        """Camera-space rays with z = 1 for the given pixel coordinates."""
+        rays = np.empty((u.size, 3), dtype=np.float32)
+        rays[:, 0] = (u - self.cx) / self.focal_px
+        rays[:, 1] = (v - self.cy) / self.focal_px
+        rays[:, 2] = 1.0
+        return rays
+
+    def region_rays(self, y, x, height, width):
+        """Precomputes rays for a fixed rectangular image region."""
+        v, u = np.mgrid[y : y + height, x : x + width]
+        return self._rays(u.ravel(), v.ravel())
+
+    @property
+    def is_valid(self):
+        return self.normal is not None and self.inlier_ratio >= self.min_inlier_ratio
+
+    @property
+    def mm_per_unit(self):
+        if self.distance is None or self.distance <= 0:
+            return 0.0
+        return self.camera_height_mm / self.distance
+
+    @property
+    def pitch_deg(self):
+        """Camera pitch below the horizon implied by the current plane."""
+        if self.normal is None:
+            return 0.0
+        return float(np.degrees(np.arctan2(self.normal[2], self.normal[1])))
+
+    def update(self, depth_array):
+        """
+        Fits the plane on the current frame and blends it into the running
+        estimate. Returns True when the estimate is trustworthy.
+        """
+        start = time.perf_counter()
+
+        depth = depth_array[self.grid_v, self.grid_u].astype(np.float32)
+        valid = np.isfinite(depth) & (depth > 0)
+        if np.count_nonzero(valid) < 3:
+            self.inlier_ratio = 0.0
+            return False
+
+        points = self.grid_rays[valid] * depth[valid, None]
+
+        # Work in units of the median depth so the inlier tolerance does not
+        # depend on the (arbitrary) scale of the depth model output.
+        scale = float(np.median(points[:, 2]))
+        if scale <= 0:
+            self.inlier_ratio = 0.0
+            return False
+        points = points / scale
+
+        normals, distances = self._hypotheses(points, scale)
+        if normals is None:
+            self.inlier_ratio = 0.0
+            return False
+
+        # Score every hypothesis at once: (N points x K planes)
+        residuals = np.abs(points @ normals.T - distances)
+        inlier_counts = np.count_nonzero(residuals < self.inlier_tolerance, axis=0)
+        best = int(np.argmax(inlier_counts))
+        inliers = residuals[:, best] < self.inlier_tolerance
+
+        normal, distance = self._refine(points[inliers])
+        if normal is None:
+            self.inlier_ratio = 0.0
+            return False
+
+        # Re-score the refined plane so the validity check uses its own inliers
+        self.inlier_ratio = float(
+            np.count_nonzero(np.abs(points @ normal - distance) < self.inlier_tolerance)
+            / points.shape[0]
+        )
+        distance *= scale
+
+        if self.normal is None:
+            self.normal, self.distance = normal, distance
+        else:
+            # Exponential smoothing keeps the plane steady while walking
+            blended = (1.0 - self.smoothing) * self.normal + self.smoothing * normal
+            self.normal = blended / np.linalg.norm(blended)
+            self.distance = (
+                1.0 - self.smoothing
+            ) * self.distance + self.smoothing * distance
+
+        self.last_fit_ms = (time.perf_counter() - start) * 1000.0
+        return self.is_valid
+
+    def _hypotheses(self, points, scale):
+        """Builds K random plane hypotheses plus the previous plane."""
+        count = points.shape[0]
+        idx = self.rng.integers(0, count, size=(self.hypotheses, 3))
+        p0, p1, p2 = points[idx[:, 0]], points[idx[:, 1]], points[idx[:, 2]]
+
+        normals = np.cross(p1 - p0, p2 - p0)
+        norms = np.linalg.norm(normals, axis=1)
+        keep = norms > 1e-9
+        normals = normals[keep] / norms[keep, None]
+        p0 = p0[keep]
+
+        # Orient every normal towards the floor (+y)
+        normals *= np.where(normals[:, 1:2] < 0, -1.0, 1.0)
+
+        # Reject walls and other steep surfaces up front
+        level = normals[:, 1] >= self.min_normal_y
+        normals = normals[level]
+        distances = np.einsum("ij,ij->i", normals, p0[level])
+
+        if self.normal is not None:
+            # The last accepted plane competes as a hypothesis, so a good fit
+            # survives frames where random sampling is unlucky.
+            normals = np.vstack([normals, self.normal])
+            distances = np.append(distances, self.distance / scale)
+
+        if normals.shape[0] == 0:
+            return None, None
+        return normals, distances
+
+    def _refine(self, inlier_points):
+        """Least-squares plane through the inliers (smallest principal axis)."""
+        if inlier_points.shape[0] < 3:
+            return None, None
+        centroid = inlier_points.mean(axis=0)
+        _, _, vt = np.linalg.svd(inlier_points - centroid, full_matrices=False)
+        normal = vt[-1]
+        if normal[1] < 0:
+            normal = -normal
+        if normal[1] < self.min_normal_y:
+            return None, None
+        return normal, float(normal @ centroid)
+
+    def height_below_plane(self, depth_values, rays, mm_per_unit=None):
+        """
+        Signed distance in mm from the floor plane for the given pixels.
+        Positive values are BELOW the floor (holes, steps down), negative
+        values are above it (obstacles, steps up).
+
+        mm_per_unit overrides the scale derived from the camera height, e.g.
+        with a scale measured by the ToF sensor.
+        """
+        if self.normal is None:
+            return np.zeros(len(rays), dtype=np.float32)
+        if mm_per_unit is None:
+            mm_per_unit = self.mm_per_unit
+        points = rays * depth_values.reshape(-1, 1)
+        return (points @ self.normal - self.distance) * mm_per_unit
+
+
+def synthetic_depth(
+    model_w,
+    model_h,
+    camera_height_mm,
+    pitch_deg,
+    hfov_deg=66.0,
+    hole=None,
+    units_per_mm=7.3,
+    noise=0.005,
+    seed=0,
+):
+    """
+    Renders a depth map of a flat floor seen by a pitched camera.
+    hole: optional (y, x, height, width, depth_mm) rectangle that is lowered.
+    """
+    rng = np.random.default_rng(seed)
+    estimator = GroundPlaneEstimator(model_w, model_h, camera_height_mm, hfov_deg)
+    rays = estimator.region_rays(0, 0, model_h, model_w)
+
+    pitch = np.radians(pitch_deg)
+    normal = np.array([0.0, np.cos(pitch), np.sin(pitch)], dtype=np.float32)
+    along = rays @ normal
+
+    heights = np.full(model_h * model_w, float(camera_height_mm), dtype=np.float32)
+    if hole is not None:
+        y, x, h, w, depth_mm = hole
+        mask = np.zeros((model_h, model_w), dtype=bool)
+        mask[y : y + h, x : x + w] = True
+        heights[mask.ravel()] += depth_mm
+
+    # Pixels looking above the horizon see "infinity" (clipped far away)
+    with np.errstate(divide="ignore"):
+        depth = np.where(along > 1e-3, heights / along, 25000.0)
+    depth = np.minimum(depth, 25000.0)
+    depth *= 1.0 + rng.normal(0.0, noise, depth.shape)
+    return (depth * units_per_mm).reshape(model_h, model_w).astype(np.float32)
+
+
+if __name__ == "__main__":
+    # Synthetic-depth harness: a camera 1220 mm high, pitched 30° down, looking
+    # at a floor with a 400 mm deep hole straight ahead.
+    W, H = 320, 256
+    exam = (120, 90, 60, 140)
+
+    estimator = GroundPlaneEstimator(W, H, camera_height_mm=1220, seed=1)
+    exam_rays = estimator.region_rays(*exam)
+
+    for label, hole in [("flat floor", None), ("hole ahead", (*exam, 400.0))]:
+        depth = synthetic_depth(W, H, 1220, pitch_deg=30.0, hole=hole)
+        timings = []
+        for _ in range(50):
+            estimator.update(depth)
+            timings.append(estimator.last_fit_ms)
+
+        y, x, h, w = exam
+        below = estimator.height_below_plane(depth[y : y + h, x : x + w], exam_rays)
+        print(f"--- {label} ---")
+        print(f"Valid plane:       {estimator.is_valid}")
+        print(f"Inlier ratio:      {estimator.inlier_ratio:.2f}")
+        print(f"Camera pitch:      {estimator.pitch_deg:.1f}°")
+        print(f"mm per unit:       {estimator.mm_per_unit:.3f}")
+        print(f"Exam zone drop:    {np.median(below):.0f} mm (median)")
+        print(f"Fit time:          {np.median(timings):.2f} ms (median)")
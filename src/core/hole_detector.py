@@ -3,6 +3,8 @@ import time
 from pathlib import Path
 import cv2
 
+from src.core.ground_plane import GroundPlaneEstimator
+
 
 class HoleDetector:
     def __init__(
@@ -11,9 +13,20 @@ class HoleDetector:
         audio_queue,
         user_height_mm=1000,
         camera_height_mm=850,  # Ajustado a ~85cm
+        hfov_deg=66.0,
+        depth_fusion=None,
+        tof_fusion=None,
     ):
         self.hailo_driver = hailo_driver
         self.audio_queue = audio_queue
+        self.depth_fusion = depth_fusion
+        self.tof_fusion = tof_fusion
+        self.camera_height_mm = camera_height_mm
+        self.hfov_deg = hfov_deg
+
+        # Metric thresholds below the fitted floor plane
+        self.step_threshold_mm = 120.0  # Curb or step down
+        self.drop_threshold_mm = 300.0  # Real hole
 
         self.is_active = False
 
@@ -45,6 +58,18 @@ class HoleDetector:
         self.exam_y = 120
         self.exam_height = 60
 
+        # Floor plane fitted on the depth map. The camera height turns the
+        # relative depth of scdepthv3 into millimetres below the floor.
+        self.ground_plane = GroundPlaneEstimator(
+            self.model_w,
+            self.model_h,
+            camera_height_mm=self.camera_height_mm,
+            hfov_deg=self.hfov_deg,
+        )
+        self.exam_rays = self.ground_plane.region_rays(
+            self.exam_y, self.rect_x, self.exam_height, self.rect_width
+        )
+
     def toggle_radar(self):
         self.is_active = not self.is_active
         state = "ACTIVATED" if self.is_active else "DEACTIVATED"
@@ -55,6 +80,13 @@ class HoleDetector:
         if not self.is_active or depth_array is None:
             return False
 
+        # Prefer the temporally fused map: it is steadier than a single frame
+        # and its per-pixel variance tells us which pixels are flickering.
+        stable = None
+        if self.depth_fusion is not None and self.depth_fusion.is_ready:
+            depth_array = self.depth_fusion.mean
+            stable = self.depth_fusion.stable
+
         # 1. Extraer zonas
         reference_ground = depth_array[
             self.ref_y : self.ref_y + self.ref_height,
@@ -66,14 +98,42 @@ class HoleDetector:
             self.rect_x : self.rect_x + self.rect_width,
         ]
 
+        if stable is not None:
+            stable_zone = stable[
+                self.exam_y : self.exam_y + self.exam_height,
+                self.rect_x : self.rect_x + self.rect_width,
+            ]
+        else:
+            stable_zone = True
+
         # 2. MATEMÁTICA CORREGIDA (BLANCO = LEJOS = NÚMEROS ALTOS)
         feet_average = np.mean(reference_ground)
+        hazard_kind = "relative"
+
+        if self.ground_plane.update(depth_array):
+            # Metric path: how many millimetres below the floor plane each
+            # pixel of the exam zone is. Robust to camera pitch.
+            # With the ToF sensor calibrated, its measured scale replaces the
+            # one implied by the configured camera height.
+            mm_per_unit = None
+            if self.tof_fusion is not None and self.tof_fusion.is_calibrated:
+                mm_per_unit = self.tof_fusion.scale
+            below_floor = self.ground_plane.height_below_plane(
+                exam_zone, self.exam_rays, mm_per_unit=mm_per_unit
+            )
+            below_floor = below_floor.reshape(exam_zone.shape)
+            drop_pixels = np.sum((below_floor > self.drop_threshold_mm) & stable_zone)
+            step_pixels = np.sum((below_floor > self.step_threshold_mm) & stable_zone)
+            danger_pixels = step_pixels
+            hazard_kind = "drop" if drop_pixels >= step_pixels / 2 else "step"
+        else:
+            # Fallback when the floor is not visible enough to fit a plane:
+            # Si el parche de adelante tiene valores un 35% MÁS ALTOS que tus pies, es un hueco.
+            hole_threshold = feet_average * 1.35
 
-        # Si el parche de adelante tiene valores un 35% MÁS ALTOS que tus pies, es un hueco.
-        hole_threshold = feet_average * 1.35
+            # IMPORTANTE: Ahora sí buscamos píxeles MAYORES (>) al umbral (más blancos/lejanos)
+            danger_pixels = np.sum((exam_zone > hole_threshold) & stable_zone)
 
-        # IMPORTANTE: Ahora sí buscamos píxeles MAYORES (>) al umbral (más blancos/lejanos)
-        danger_pixels = np.sum(exam_zone > hole_threshold)
         hole_percentage = (danger_pixels / exam_zone.size) * 100
 
         # Si más del 20% es "vacío", hay hueco
@@ -82,13 +142,17 @@ class HoleDetector:
         # ==========================================
         # 3. TURN DETECTION (IMU)
         # ==========================================
+        # The fused depth map follows the heading (HeadingCompensator), so a
+        # confirmed hole keeps its place in the world during small turns and
+        # does not need to be confirmed again. It is only forgotten once the
+        # user has turned far enough for it to leave the camera's view.
         if (
             current_heading is not None
             and self.is_currently_blocked
             and self.last_hole_heading is not None
         ):
             diff = (current_heading - self.last_hole_heading + 180) % 360 - 180
-            if abs(diff) > 45.0:
+            if abs(diff) > self.hfov_deg / 2.0:
                 self.is_currently_blocked = False
                 self.last_alarm_time = 0.0
                 self.danger_streak = 0
@@ -158,7 +222,7 @@ class HoleDetector:
 
             filename = (
                 debug_dir
-                / f"hole_{timestamp}_perc{hole_percentage:.1f}_ref{feet_average:.1f}.jpg"
+                / f"hole_{timestamp}_{hazard_kind}_perc{hole_percentage:.1f}_ref{feet_average:.1f}.jpg"
             )
             cv2.imwrite(str(filename), depth_color)
 
@@ -1,14 +1,145 @@
 from gpiozero import Button
 import time
-import difflib
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from src.ui.voice_interface import VoiceInterface
+from src.ui.wake_word import WAKE_PHRASE, WakeWordSpotter
 
 # pyright: reportAttributeAccessIssue=false
 
+BTN_1 = "btn_1"
+BTN_2 = "btn_2"
+
+MENU_TEXT = (
+    "Este es el menú de ayuda. Puedes decir los siguientes comandos. "
+    "Número uno. Di Menú. para listar qué puedo hacer por ti. "
+    "Número dos. Di Dónde estoy. para conocer tu posición actual en el mapa. "
+    "Número tres. Di Calibrar. para ajustar la brújula"
+    "Número cuatro. Di Huecos. para activar o desactivar la detección de huecos en el piso. "
+    "Número cinco. Di Aéreo. para activar o desactivar la detección de obstáculos aéreo. "
+    "Número seis. Di Botones. para aprender para qué sirve cada botón. "
+    "Número siete. Di Sonidos. para escuchar una demostración de las alarmas. "
+    "Para continuar. vuelve a presionar los botones y di un comando."
+    "Para continuar. vuelve a presionar los botones y di un comando."
+)
+
+BUTTONS_TEXT = (
+    "Este sistema se controla con dos botones principales. "
+    "Presionar el botón izquierdo una vez te dirá los obstáculos que tienes enfrente y la dirección con respecto a las agujas del reloj. "
+    "Presionarlo dos veces activará el buscador de asientos libres. "
+    "Presionar el botón derecho una vez leerá los textos o letreros que tengas frente a ti. "
+    "Presionarlo dos veces activará el modo de lectura continua, ideal para leer letreros mientras caminas. "
+    "Por último, mantener presionados ambos botones al mismo tiempo activará este menú de voz. "
+)
+
+
+# Spoken phrases of the voice menu grammar -> command id. Accented and plain
+# spellings are both listed; words missing from the model are skipped by Vosk
+COMMAND_PHRASES = {
+    "menú": "menu",
+    "menu": "menu",
+    "dónde estoy": "donde estoy",
+    "donde estoy": "donde estoy",
+    "calibrar": "calibrar",
+    "calibrar brújula": "calibrar",
+    "huecos": "huecos",
+    "aéreo": "aereo",
+    "aereo": "aereo",
+    "quiero ir": "quiero ir",
+    "cancelar ruta": "cancelar ruta",
+    "guardar ubicación": "guardar ubicación",
+    "guardar ubicacion": "guardar ubicación",
+    "botones": "botones",
+    "sonidos": "sonidos",
+}
+
+# Commands that need Navigation (GPS, compass, favorites)
+NAVIGATION_COMMANDS = {
+    "donde estoy",
+    "calibrar",
+    "quiero ir",
+    "cancelar ruta",
+    "guardar ubicación",
+}
+
+CONFIRM_PHRASES = {
+    "sí": "yes",
+    "si": "yes",
+    "claro": "yes",
+    "no": "no",
+    "cancelar": "no",
+}
+
+
+def _sound(position, sound_type):
+    return {"action": "sound", "position": position, "sound_type": sound_type}
+
+
+def _pause(seconds):
+    return {"action": "pause", "seconds": seconds}
+
+
+# Sound demo as a script for the audio thread: the messages share one
+# priority, so the queue plays them in order without anyone waiting on them
+SOUND_DEMO = [
+    "A continuación escucharás una demostración de los sonidos del sistema. "
+    "Presta atención al tono y de qué lado provienen.",
+    # Demo: Huecos
+    "El siguiente sonido indica un hueco o escalón hacia abajo en el suelo.",
+    _sound("center", "hole"),
+    _pause(1.5),
+    # Demo: Aéreo
+    "Este sonido te avisa de un obstáculo aéreo a la altura de tu cabeza o pecho.",
+    _sound("center", "aerial"),
+    _pause(1.5),
+    # Demo: Buscador de Asientos / Sonares
+    "Cuando actives el buscador de asientos. "
+    "Si escuchas el pitido solo por tu audífono izquierdo, significa que la silla está a tu izquierda.",
+    _sound("left", "sonar"),
+    _sound("left", "sonar"),
+    _sound("left", "sonar"),
+    "Si el pitido suena solo por la derecha, la silla está a tu derecha.",
+    _sound("right", "sonar"),
+    _sound("right", "sonar"),
+    _sound("right", "sonar"),
+    "Y si el pitido suena en el centro, en ambos oídos al mismo tiempo, significa que vas por buen camino y la silla está justo frente a ti. "
+    "El pitido se hará más rápido a medida que te acerques.",
+    # Sonar Centro (Simulando acercamiento con dos pitidos rápidos)
+    _sound("center", "sonar"),
+    _pause(0.5),
+    _sound("center", "sonar"),
+    _pause(1.5),
+    # Demo: Vehículos
+    "Finalmente, si te acercas a un vehículo, te avisaré rapidamente de la siguiente manera:",
+    {"action": "fast_voice", "text": "Carro"},
+]
+
 
 class MenuController:
+    """
+    Two-button menu.
+
+    gpiozero callbacks only post press events to a queue. A single event
+    thread turns them into clicks, double clicks and the both-buttons chord
+    using deadlines instead of sleeps or timers. The voice menu is a small
+    state machine (command -> destination / save name -> confirmation) that
+    runs on a worker, and slow actions (routing, geocoding, OCR) are handed
+    to a thread pool so their audio prompts play while they run.
+
+    With `wake_word=True` saying the wake phrase also opens the voice menu,
+    and a command said in the same breath is executed directly.
+
+    The buttons work as soon as the detectors exist. Navigation, OCR and the
+    voice interface may arrive later from the startup orchestrator: until
+    then the commands that need them say that they are still loading.
+    """
+
+    MIN_CONFIDENCE = 0.5  # Grammar matches below this are treated as not understood
+    DOUBLE_CLICK_S = 0.6  # Second click within this time is a double click
+    CHORD_S = 0.15  # Both buttons pressed within this time is the voice menu
+    CHORD_COOLDOWN_S = 1.0  # Presses ignored after the voice menu ends
+
     def __init__(
         self,
         object_detector,
@@ -17,6 +148,8 @@ class MenuController:
         audio_queue,
         ocr,
         aerial_obstacle_detector=None,
+        wake_word=False,
+        voice_interface=None,
     ):
 
         self.object_detector = object_detector
@@ -26,61 +159,167 @@ class MenuController:
         self.navigation = navigation
         self.aerial_obstacle_detector = aerial_obstacle_detector
 
-        # Initialize Voice Interface for STT commands
-        self.voice_interface = VoiceInterface(audio_queue)
-
-        # bounce_time is set to 0.1 seconds to prevent multiple triggers from a single press
+        # Voice Interface for STT commands, see set_voice_interface
+        self.voice_interface = None
+        self.wake_word = wake_word
+        self.wake_spotter = None
+
+        # Routing, geocoding, OCR and the voice conversation itself
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="menu")
+        self.ocr_future = None
+        self.voice_future = None
+
+        # Voice menu states: name -> (listen(context), handler(heard, context) returning
+        # the next state). Commands, destinations and confirmations are decoded
+        # against small grammars; only the name of a new place is free text
+        self.voice_states = {
+            "command": (self._listen_command, self._on_command),
+            "destination": (self._listen_destination, self._on_destination),
+            "save_name": (self._listen_free_text, self._on_save_name),
+            "save_confirm": (self._listen_confirmation, self._on_save_confirm),
+        }
+        self.commands = {
+            "menu": self._cmd_menu,
+            "donde estoy": self._cmd_where_am_i,
+            "calibrar": self._cmd_calibrate,
+            "huecos": self._cmd_holes,
+            "aereo": self._cmd_aerial,
+            "quiero ir": self._cmd_go_to,
+            "cancelar ruta": self._cmd_cancel_route,
+            "guardar ubicación": self._cmd_save_location,
+            "botones": self._cmd_buttons,
+            "sonidos": self._cmd_sounds,
+        }
+
+        # Button state, only touched by the event thread
+        self.events = queue.Queue()
+        self.last_press = {BTN_1: 0.0, BTN_2: 0.0}
+        self.pending_click = {BTN_1: None, BTN_2: None}  # Time of an undecided click
+        self.last_voice_end = 0.0
+
+        # bounce_time is set to 0.05 seconds to prevent multiple triggers from a single press
         self.btn_1 = Button(27, bounce_time=0.05)
         self.btn_2 = Button(17, bounce_time=0.05)
 
-        # semaphore to prevent double command
-        self.last_both_pressed = 0.0
-        self.is_voice_active = False
+        # Callbacks: post and return immediately
+        self.btn_1.when_pressed = lambda: self.post(BTN_1)
+        self.btn_2.when_pressed = lambda: self.post(BTN_2)
 
-        self.last_btn_2_press = 0.0
-        self.btn_2_timer = None
+        self.event_thread = threading.Thread(target=self._event_loop, daemon=True)
+        self.event_thread.start()
 
-        # Callbacks
-        self.btn_1.when_pressed = self.handle_btn_1
-        self.btn_2.when_pressed = self.handle_btn_2
+        if voice_interface is not None:
+            self.set_voice_interface(voice_interface)
 
-    def handle_btn_1(self):
-        # We add a small delay to allow for the possibility of the other button being pressed for a combined command
-        if self.is_voice_active or (time.time() - self.last_both_pressed < 1.0):
-            return
-        time.sleep(0.05)
+    def set_voice_interface(self, voice_interface):
+        """Enables the voice menu once the speech model has loaded."""
+        self.voice_interface = voice_interface
 
-        # If button 2 is pressed, it is a voice command
-        if self.btn_2.is_pressed:
-            self.both_btns_pressed()
+        # Optional hands-free trigger on the same microphone stream
+        if self.wake_word and voice_interface.recognizer is not None:
+            self.wake_spotter = WakeWordSpotter(
+                voice_interface.vosk_model,
+                voice_interface.microphone,
+                on_wake=lambda position: self.post("wake", position),
+            )
+            self.wake_spotter.start()
+
+    @property
+    def is_voice_active(self):
+        return self.voice_future is not None and not self.voice_future.done()
+
+    def post(self, event, payload=None):
+        """Queues an event for the event thread; safe from any thread."""
+        self.events.put((event, time.monotonic(), payload))
+
+    def say(self, message, priority=None):
+        self.audio_queue.put(
+            self.audio_queue.VOICE_MENU if priority is None else priority, message
+        )
+
+    def _submit(self, name, task, on_result=None):
+        """Runs task() on the pool and passes its result to on_result."""
+
+        def run():
+            try:
+                result = task()
+            except Exception as e:
+                print(f"[MenuController] {name} failed: {e}")
+                return None
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        return self.executor.submit(run)
+
+    # ------------------------------------------------------------------
+    # Event thread: clicks, double clicks and the chord
+    # ------------------------------------------------------------------
+    def _event_loop(self):
+        while True:
+            deadlines = [t for t in self.pending_click.values() if t is not None]
+            timeout = None
+            if deadlines:
+                timeout = max(min(deadlines) + self.DOUBLE_CLICK_S - time.monotonic(), 0.0)
+
+            try:
+                event, stamp, payload = self.events.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            try:
+                if event in (BTN_1, BTN_2):
+                    self._on_press(event, stamp)
+                elif event == "wake":
+                    print("[MenuController] Wake phrase heard.")
+                    self.both_btns_pressed(start=payload)
+                elif event == "voice_done":
+                    self.last_voice_end = stamp
+                    self.last_press = {BTN_1: 0.0, BTN_2: 0.0}
+                    if self.wake_spotter is not None:
+                        self.wake_spotter.resume()
+
+                # Clicks whose double-click window expired are single clicks
+                now = time.monotonic()
+                for button, first in self.pending_click.items():
+                    if first is not None and now - first >= self.DOUBLE_CLICK_S:
+                        self.pending_click[button] = None
+                        self._single_click(button)
+            except Exception as e:
+                print(f"[MenuController] Event error: {e}")
+
+    def _on_press(self, button, stamp):
+        other = BTN_2 if button == BTN_1 else BTN_1
+        other_btn = self.btn_2 if button == BTN_1 else self.btn_1
+
+        if self.is_voice_active or stamp - self.last_voice_end < self.CHORD_COOLDOWN_S:
             return
+        self.last_press[button] = stamp
 
-        if time.time() - self.last_both_pressed < 0.5:
+        # Chord: the other button is held or was pressed a moment ago
+        if other_btn.is_pressed or stamp - self.last_press[other] < self.CHORD_S:
+            self.pending_click = {BTN_1: None, BTN_2: None}
+            self.both_btns_pressed()
             return
 
-        current_time = time.time()
+        first = self.pending_click[button]
+        if first is not None and stamp - first < self.DOUBLE_CLICK_S:
+            self.pending_click[button] = None
+            self._double_click(button)
+        else:
+            self.pending_click[button] = stamp
 
-        # Double Click Logic for Button 1
-        # We use a timer 'btn_1_timer' that must be initialized in __init__
-        if not hasattr(self, "last_btn_1_press"):
-            self.last_btn_1_press = 0.0
-            self.btn_1_timer = None
+    def _single_click(self, button):
+        if button == BTN_1:
+            self._single_click_obj()
+        else:
+            self._single_click_ocr()
 
-        if current_time - self.last_btn_1_press < 0.6:
-            # Double click detected!
-            self.last_btn_1_press = 0.0
-            if self.btn_1_timer is not None:
-                self.btn_1_timer.cancel()
+    def _double_click(self, button):
+        if button == BTN_1:
             self._double_click_obj()
         else:
-            # First click
-            self.last_btn_1_press = current_time
-            if self.btn_1_timer is not None:
-                self.btn_1_timer.cancel()
-
-            # We wait 0.6s. If no double click, we read the objects.
-            self.btn_1_timer = threading.Timer(0.6, self._single_click_obj)
-            self.btn_1_timer.start()
+            self._double_click_ocr()
 
     def _single_click_obj(self):
         """Single click action: Reads the objects in front."""
@@ -107,58 +346,24 @@ class MenuController:
             self.audio_queue.VOICE_MENU, f"Buscador de asientos libres {state}"
         )
 
-    def handle_btn_2(self):
-
-        if self.is_voice_active or (time.time() - self.last_both_pressed < 1.0):
-            return
-        time.sleep(0.05)
-
-        # If button 1 is pressed, it's a combined command
-        if self.btn_1.is_pressed:
-            self.both_btns_pressed()
-            return
-
-        if time.time() - self.last_both_pressed < 0.5:
-            return
-
-        current_time = time.time()
-
-        # Increased to 0.6s to give a more human margin to double click
-        if current_time - self.last_btn_2_press < 0.6:
-            # Double Click Detected!
-            self.last_btn_2_press = 0.0  # Reset to avoid triple clicks
-
-            # Cancel single click action if it was pending
-            if self.btn_2_timer is not None:
-                self.btn_2_timer.cancel()
-
-            # Execute double click action
-            self._double_click_ocr()
-        else:
-            # First Click Detected
-            self.last_btn_2_press = current_time
-
-            if self.btn_2_timer is not None:
-                self.btn_2_timer.cancel()
-
-            # Wait 0.6 seconds. If there is no other click in that time, execute normal photo.
-            self.btn_2_timer = threading.Timer(0.6, self._single_click_ocr)
-            self.btn_2_timer.start()
-
     def _single_click_ocr(self):
         """Single Click Action: Read text with Gemini/EasyOCR."""
         if self.audio_queue.is_priority_active_or_queued(
             self.audio_queue.TEXT_RECOGNITION
-        ):
+        ) or (self.ocr_future is not None and not self.ocr_future.done()):
             print(
                 "[MenuController] Text recognition message already active or queued, skipping new message."
             )
             return
 
         print("[Btn2] Read text (Single Click)")
-        if self.ocr:
-            detected_text = self.ocr.capture_and_read(stream_name="main")
+        if not self.ocr:
+            self.audio_queue.put(
+                self.audio_queue.TEXT_RECOGNITION, "Lector de texto no inicializado"
+            )
+            return
 
+        def speak_text(detected_text):
             if detected_text and detected_text not in [
                 "Error de hardware.",
                 "No encontré ningún texto en la imagen.",
@@ -175,10 +380,10 @@ class MenuController:
                     self.audio_queue.TEXT_RECOGNITION,
                     "Hubo un error al leer el texto",
                 )
-        else:
-            self.audio_queue.put(
-                self.audio_queue.TEXT_RECOGNITION, "Lector de texto no inicializado"
-            )
+
+        self.ocr_future = self._submit(
+            "OCR", lambda: self.ocr.capture_and_read(stream_name="main"), speak_text
+        )
 
     def _double_click_ocr(self):
         """Double Click Action: Activates or deactivates continuous Sign Mode."""
@@ -195,8 +400,14 @@ class MenuController:
                 self.audio_queue.VOICE_MENU, "Lector de texto no inicializado."
             )
 
-    def both_btns_pressed(self):
-
+    # ------------------------------------------------------------------
+    # Voice menu state machine (runs on the pool)
+    # ------------------------------------------------------------------
+    def both_btns_pressed(self, start=None):
+        """
+        Opens the voice menu. start: microphone position of a wake phrase,
+        whose utterance may already contain the command.
+        """
         # if we are already in voice menu, we ignore new activations until it's finished to avoid conflicts and overlapping commands
         if self.is_voice_active:
             return
@@ -207,405 +418,182 @@ class MenuController:
             )
             return
 
-        current_time = time.time()
-
-        if current_time - self.last_both_pressed > 0.5:
-            self.is_voice_active = True
-            self.last_both_pressed = current_time
-
-            # Cancel any pending single click actions to avoid conflicts with the voice menu
-            if getattr(self, "btn_1_timer", None) is not None:
-                self.btn_1_timer.cancel()  # type: ignore
-            if getattr(self, "btn_2_timer", None) is not None:
-                self.btn_2_timer.cancel()  # type: ignore
-
-            # Loop to allow retrying if the command is not understood
-            while True:
-                text_command = self.voice_interface.listen_and_recognize()
-
-                print(f"[MenuController] Recognized text: '{text_command}'")
-
-                # If timeout or nothing was recognized, just exit
-                if not text_command:
-                    print(
-                        "[MenuController] No voice detected or timeout reached. Exiting voice menu."
-                    )
-                    break
-
-                text_lower = text_command.lower().strip()
-                print(f"[MenuController] Processing command: '{text_lower}'")
-
-                # Define standard commands for difflib matching
-                standard_commands = [
-                    "menu",
-                    "donde estoy",
-                    "calibrar",
-                    "huecos",
-                    "aereo",
-                    "quiero ir",
-                    "cancelar ruta",
-                    "guardar ubicación",
-                    "botones",
-                    "sonidos",
-                ]
-
-                # Check standard commands using difflib for fuzzy matching
-                matches = difflib.get_close_matches(
-                    text_lower, standard_commands, n=1, cutoff=0.6
-                )
+        if self.voice_interface is None:
+            self.say("El menú de voz todavía se está cargando.")
+            return
+
+        # The spotter must not hear the conversation (or our own prompts)
+        if self.wake_spotter is not None:
+            self.wake_spotter.pause()
+        self.voice_future = self.executor.submit(self._voice_session, start)
+        self.voice_future.add_done_callback(lambda _: self.post("voice_done"))
+
+    def _voice_session(self, start=None):
+        state, context = "command", {"start": start}
+        try:
+            while state is not None:
+                prompt = context.pop("prompt", None)
+                if prompt:
+                    self.say(prompt)
+                    # Do not record the prompt itself
+                    self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
+
+                listen, handler = self.voice_states[state]
+                heard = listen(context)
+                print(f"[MenuController] Heard ({state}): {heard!r}")
+                state = handler(heard, context)
+        except Exception as e:
+            print(f"[MenuController] Voice menu error: {e}")
+
+    def _listen_command(self, context):
+        start = context.pop("start", None)
+        if start is not None:
+            # Decode the wake utterance itself: "hola asistente, dónde estoy".
+            # The wake phrase is in the grammar so it is not mistaken for a command
+            phrases = dict(COMMAND_PHRASES)
+            phrases[WAKE_PHRASE] = None
+            heard = self.voice_interface.recognize_command(
+                phrases, "wake_command", start=start
+            )
+            if heard[0] is not None:
+                return heard
+            # Only the wake phrase was said: ask for the command as usual
+
+        return self.voice_interface.recognize_command(COMMAND_PHRASES, "command")
+
+    def _listen_destination(self, context):
+        # Rebuilt by VoiceInterface only when the favorites changed
+        phrases = {name: name for name in self.navigation.favorites}
+        return self.voice_interface.recognize_command(phrases, "favorites")
+
+    def _listen_confirmation(self, context):
+        return self.voice_interface.recognize_command(CONFIRM_PHRASES, "confirm")
+
+    def _listen_free_text(self, context):
+        return self.voice_interface.listen_and_recognize()
+
+    def _on_command(self, heard, context):
+        command_id, confidence = heard
+
+        # If timeout or nothing was recognized, just exit
+        if command_id is None and confidence == 0.0:
+            print(
+                "[MenuController] No voice detected or timeout reached. Exiting voice menu."
+            )
+            return None
+
+        if command_id is None or confidence < self.MIN_CONFIDENCE:
+            print("[MenuController] Command not recognized, asking to repeat.")
+            self.say("No te entendí. Vuelve a intentarlo presionando los dos botones.")
+            return None
+
+        print(f"[MenuController] Action detected: {command_id}")
+        if command_id in NAVIGATION_COMMANDS and self.navigation is None:
+            self.say("La navegación todavía se está iniciando.")
+            return None
+        return self.commands[command_id](context)
+
+    def _cmd_menu(self, context):
+        self.say(MENU_TEXT)
+
+    def _cmd_where_am_i(self, context):
+        # Reverse geocoding may hit the network: answer when it is ready
+        self._submit(
+            "Where am I",
+            self.navigation.get_where_am_i_message,
+            lambda message: self.say(message, self.audio_queue.NAVIGATION),
+        )
+
+    def _cmd_calibrate(self, context):
+        if not hasattr(self.navigation, "imu"):
+            print("[MenuController] Error: IMU no está conectado a Navigation")
+            return
+
+        self.say(
+            "Calibrando brújula. Por favor, da vueltas sobre tu propio eje lentamente hasta que te avise que terminó la calibración."
+        )
+
+        def finish_imu_cal():
+            if self.navigation.imu.finish_calibration():
+                message = "Calibración de brújula exitosa"
+            else:
+                message = "No pude calibrar la brújula. Intenta dar una vuelta completa más despacio."
+            self.say(message)
+
+        def start_imu_cal():
+            # Start measuring once the instructions have been spoken
+            self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
+            self.navigation.imu.start_calibration()
+            threading.Timer(15.0, finish_imu_cal).start()
+
+        self._submit("Compass calibration", start_imu_cal)
+
+    def _cmd_holes(self, context):
+        if self.hole_detector:
+            is_active = self.hole_detector.toggle_radar()
+            state = "activada" if is_active else "desactivada"
+            self.say(f"Detección de huecos {state}.")
+
+    def _cmd_aerial(self, context):
+        if self.aerial_obstacle_detector:
+            is_active = self.aerial_obstacle_detector.toggle_radar()
+            state = "activada" if is_active else "desactivada"
+            self.say(f"Detección de obstáculos aéreos {state}.")
+
+    def _cmd_go_to(self, context):
+        if not self.navigation.favorites:
+            self.say("No tienes destinos guardados.")
+            return None
+        context["prompt"] = "¿A dónde quieres ir?"
+        return "destination"
+
+    def _on_destination(self, heard, context):
+        destination, confidence = heard
+        if destination is None and confidence == 0.0:
+            self.say("No escuché ningún destino. Operación cancelada.")
+            return None
+        if destination is None or confidence < self.MIN_CONFIDENCE:
+            self.say("No encontré ese lugar en tu lista de destinos guardados.")
+            return None
+
+        print(f"[MenuController] Heard destination: '{destination}'")
+
+        # The route is computed while the user hears the confirmation
+        self.say(f"Buscando ruta a {destination}.")
+        self._submit(
+            "Route",
+            lambda: self.navigation.calculate_route_to_favorite(destination),
+            lambda result: self.say(result[1], self.audio_queue.NAVIGATION),
+        )
+
+    def _cmd_cancel_route(self, context):
+        self.say(self.navigation.cancel_navigation())
+
+    def _cmd_save_location(self, context):
+        context["prompt"] = "¿Con qué nombre quieres guardar este lugar?"
+        return "save_name"
+
+    def _on_save_name(self, text, context):
+        if not text:
+            self.say("No escuché ningún nombre. Operación cancelada.")
+            return None
+
+        context["name"] = text.lower().strip()
+        print(f"[MenuController] Heard name: '{context['name']}'")
+        context["prompt"] = f"¿Guardar ubicación actual como {context['name']}? Responde sí o no."
+        return "save_confirm"
+
+    def _on_save_confirm(self, heard, context):
+        answer, confidence = heard
+        if answer == "yes" and confidence >= self.MIN_CONFIDENCE:
+            success, message = self.navigation.save_current_location(context["name"])
+            self.say(message)
+        else:
+            self.say("Guardado cancelado.")
+
+    def _cmd_buttons(self, context):
+        self.say(BUTTONS_TEXT)
 
-                if matches:
-                    best_match = matches[0]
-                    if best_match == "menu":
-                        print("[MenuController] Action detected: Menu")
-
-                        menu_text = (
-                            "Este es el menú de ayuda. Puedes decir los siguientes comandos. "
-                            "Número uno. Di Menú. para listar qué puedo hacer por ti. "
-                            "Número dos. Di Dónde estoy. para conocer tu posición actual en el mapa. "
-                            "Número tres. Di Calibrar. para ajustar la brújula"
-                            "Número cuatro. Di Huecos. para activar o desactivar la detección de huecos en el piso. "
-                            "Número cinco. Di Aéreo. para activar o desactivar la detección de obstáculos aéreo. "
-                            "Número seis. Di Botones. para aprender para qué sirve cada botón. "
-                            "Número siete. Di Sonidos. para escuchar una demostración de las alarmas. "
-                            "Para continuar. vuelve a presionar los botones y di un comando."
-                            "Para continuar. vuelve a presionar los botones y di un comando."
-                        )
-
-                        self.audio_queue.put(self.audio_queue.VOICE_MENU, menu_text)
-
-                    elif best_match == "donde estoy":
-                        print("[MenuController] Action detected: Where am I")
-
-                        location_message = self.navigation.get_where_am_i_message()
-
-                        self.audio_queue.put(
-                            self.audio_queue.NAVIGATION, location_message
-                        )
-                    elif best_match == "calibrar":
-                        print("[MenuController] Action detected: Calibrate Compass")
-
-                        # 1. Avisamos al usuario y le damos instrucciones
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "Calibrando brújula. Por favor, da vueltas sobre tu propio eje lentamente hasta que te avise que terminó la calibración.",
-                        )
-
-                        # Esperamos a que la voz termine de hablar para empezar a medir
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        # 2. Iniciamos la recolección de datos en el IMU
-                        if hasattr(self.navigation, "imu"):
-                            self.navigation.imu.start_calibration()
-
-                            # 3. Creamos un temporizador que detendrá la calibración en 15 segundos
-                            # Esto se ejecuta en un hilo separado (no bloquea el programa)
-                            def finish_imu_cal():
-                                self.navigation.imu.finish_calibration()
-                                self.audio_queue.put(
-                                    self.audio_queue.VOICE_MENU,
-                                    "Calibración de brújula exitosa",
-                                )
-
-                            threading.Timer(15.0, finish_imu_cal).start()
-                        else:
-                            print(
-                                "[MenuController] Error: IMU no está conectado a Navigation"
-                            )
-
-                    elif best_match == "huecos":
-                        print("[MenuController] Action detected: Holes")
-                        if self.hole_detector:
-                            is_active = self.hole_detector.toggle_radar()
-                            state = "activada" if is_active else "desactivada"
-                            self.audio_queue.put(
-                                self.audio_queue.VOICE_MENU,
-                                f"Detección de huecos {state}.",
-                            )
-
-                    elif best_match == "aereo":
-                        print("[MenuController] Action detected: Aerial")
-                        if self.aerial_obstacle_detector:
-                            is_active = self.aerial_obstacle_detector.toggle_radar()
-                            state = "activada" if is_active else "desactivada"
-                            self.audio_queue.put(
-                                self.audio_queue.VOICE_MENU,
-                                f"Detección de obstáculos aéreos {state}.",
-                            )
-
-                    elif best_match == "guardar ubicación":
-                        print("[MenuController] Action detected: Guardar ubicación")
-
-                        # 1. We ask for the name
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "¿Con qué nombre quieres guardar este lugar?",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        raw_name = self.voice_interface.listen_and_recognize()
-
-                        if not raw_name:
-                            self.audio_queue.put(
-                                self.audio_queue.VOICE_MENU,
-                                "No escuché ningún nombre. Operación cancelada.",
-                            )
-                            break
-
-                        name = raw_name.lower().strip()
-                        print(f"[MenuController] Heard name: '{name}'")
-
-                        # 2. Security confirmation to save
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            f"¿Guardar ubicación actual como {name}? Responde sí o no.",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        confirmation = self.voice_interface.listen_and_recognize()
-
-                        if confirmation and (
-                            "sí" in confirmation.lower() or "si" in confirmation.lower()
-                        ):
-                            success, message = self.navigation.save_current_location(
-                                name
-                            )
-                            self.audio_queue.put(self.audio_queue.VOICE_MENU, message)
-                        else:
-                            self.audio_queue.put(
-                                self.audio_queue.VOICE_MENU, "Guardado cancelado."
-                            )
-                    elif best_match == "quiero ir":
-                        print(
-                            "[MenuController] Action detected: Navegación (Quiero ir)"
-                        )
-
-                        # 1. We ask for the destination
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU, "¿A dónde quieres ir?"
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        # 2. We listen only for the name of the place
-                        raw_destination = self.voice_interface.listen_and_recognize()
-
-                        if not raw_destination:
-                            self.audio_queue.put(
-                                self.audio_queue.VOICE_MENU,
-                                "No escuché ningún destino. Operación cancelada.",
-                            )
-                            break
-
-                        destination = raw_destination.lower().strip()
-                        print(f"[MenuController] Heard destination: '{destination}'")
-
-                        # 3. Intelligent autocomplete with Difflib (NEW)
-                        # We search the list of keys (place names) of your JSON file
-                        favorite_names = list(self.navigation.favorites.keys())
-                        matches_destination = difflib.get_close_matches(
-                            destination, favorite_names, n=1, cutoff=0.5
-                        )
-
-                        if matches_destination:
-                            # It found the place, we calculate the route immediately without asking "Yes or No"
-                            corrected_destination = matches_destination[0]
-                            success, message = (
-                                self.navigation.calculate_route_to_favorite(
-                                    corrected_destination
-                                )
-                            )
-                            self.audio_queue.put(self.audio_queue.NAVIGATION, message)
-                        else:
-                            # If it doesn't look like anything on the list, we warn
-                            self.audio_queue.put(
-                                self.audio_queue.VOICE_MENU,
-                                f"No encontré {destination} en tu lista de destinos guardados.",
-                            )
-
-                    elif best_match == "cancelar ruta":
-                        print("[MenuController] Action detected: Cancelar Navegación")
-                        message = self.navigation.cancel_navigation()
-                        self.audio_queue.put(self.audio_queue.VOICE_MENU, message)
-
-                    elif best_match == "botones":
-                        print(
-                            "[MenuController] Action detected: Explicación de Botones"
-                        )
-                        explicacion_botones = (
-                            "Este sistema se controla con dos botones principales. "
-                            "Presionar el botón izquierdo una vez te dirá los obstáculos que tienes enfrente y la dirección con respecto a las agujas del reloj. "
-                            "Presionarlo dos veces activará el buscador de asientos libres. "
-                            "Presionar el botón derecho una vez leerá los textos o letreros que tengas frente a ti. "
-                            "Presionarlo dos veces activará el modo de lectura continua, ideal para leer letreros mientras caminas. "
-                            "Por último, mantener presionados ambos botones al mismo tiempo activará este menú de voz. "
-                        )
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU, explicacion_botones
-                        )
-
-                    # === NUEVA SECCIÓN: DEMOSTRACIÓN DE SONIDOS ===
-                    elif best_match == "sonidos":
-                        print(
-                            "[MenuController] Action detected: Demostración de Sonidos"
-                        )
-
-                        # Explicación Inicial
-                        intro_sonidos = (
-                            "A continuación escucharás una demostración de los sonidos del sistema. "
-                            "Presta atención al tono y de qué lado provienen."
-                        )
-                        self.audio_queue.put(self.audio_queue.VOICE_MENU, intro_sonidos)
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        # Demo: Huecos
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "El siguiente sonido indica un hueco o escalón hacia abajo en el suelo.",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "center",
-                                "sound_type": "hole",
-                            },
-                        )
-                        time.sleep(1.5)  # Pausa dramática para escuchar el sonido
-
-                        # Demo: Aéreo
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "Este sonido te avisa de un obstáculo aéreo a la altura de tu cabeza o pecho.",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "center",
-                                "sound_type": "aerial",
-                            },
-                        )
-                        time.sleep(1.5)
-
-                        # Demo: Buscador de Asientos / Sonares
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "Cuando actives el buscador de asientos. "
-                            "Si escuchas el pitido solo por tu audífono izquierdo, significa que la silla está a tu izquierda.",
-                        )
-
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-                        # Sonar Izquierdo
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "left",
-                                "sound_type": "sonar",
-                            },
-                        )
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "left",
-                                "sound_type": "sonar",
-                            },
-                        )
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "left",
-                                "sound_type": "sonar",
-                            },
-                        )
-
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "Si el pitido suena solo por la derecha, la silla está a tu derecha.",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        # Sonar Derecho
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "right",
-                                "sound_type": "sonar",
-                            },
-                        )
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "right",
-                                "sound_type": "sonar",
-                            },
-                        )
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "right",
-                                "sound_type": "sonar",
-                            },
-                        )
-
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "Y si el pitido suena en el centro, en ambos oídos al mismo tiempo, significa que vas por buen camino y la silla está justo frente a ti. "
-                            "El pitido se hará más rápido a medida que te acerques.",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        # Sonar Centro (Simulando acercamiento con dos pitidos rápidos)
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "center",
-                                "sound_type": "sonar",
-                            },
-                        )
-                        time.sleep(0.5)
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            {
-                                "action": "sound",
-                                "position": "center",
-                                "sound_type": "sonar",
-                            },
-                        )
-                        time.sleep(1.5)
-
-                        # Demo: Vehículos
-                        self.audio_queue.put(
-                            self.audio_queue.VOICE_MENU,
-                            "Finalmente, si te acercas a un vehículo, te avisaré rapidamente de la siguiente manera:",
-                        )
-                        self.audio_queue.wait_for_priority(self.audio_queue.VOICE_MENU)
-
-                        self.audio_queue.play_concurrent(
-                            {
-                                "action": "fast_voice",
-                                "text": "Carro",
-                            }
-                        )
-
-                    break  # Command understood, exit the loop
-
-                else:
-                    print("[MenuController] Command not recognized, asking to repeat.")
-                    self.audio_queue.put(
-                        self.audio_queue.VOICE_MENU,
-                        "No te entendí. Vuelve a intentarlo presionando los dos botones.",
-                    )
-                    break  # Exit after one attempt to avoid infinite loop in case of unrecognized commands
-            self.last_both_pressed = time.time()
-            self.is_voice_active = False
+    def _cmd_sounds(self, context):
+        for message in SOUND_DEMO:
+            self.say(message)
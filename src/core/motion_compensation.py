@@ -0,0 +1,59 @@
+import math
+
+
+class HeadingCompensator:
+    """
+    Keeps the fused depth map aligned with the world while the user turns.
+
+    The camera is worn on the body, so a change of compass heading rotates the
+    whole scene horizontally. For a pinhole camera a yaw of `delta` moves the
+    image content by focal_px * tan(delta) pixels, in the opposite direction of
+    the turn. Shifting the previous estimate by that amount before fusing the
+    next frame keeps hazards where they are in the world.
+    """
+
+    def __init__(self, width, hfov_deg=66.0, min_delta_deg=1.0):
+        """
+        width: width in pixels of the depth maps being compensated.
+        hfov_deg: horizontal field of view of the camera.
+        min_delta_deg: smaller heading changes are accumulated instead of
+            applied, so compass jitter does not shake the map.
+        """
+        self.width = width
+        self.hfov_deg = hfov_deg
+        self.min_delta_deg = min_delta_deg
+        self.focal_px = (width / 2.0) / math.tan(math.radians(hfov_deg) / 2.0)
+        self.last_heading = None
+
+    def pixel_shift(self, delta_deg):
+        """Horizontal image shift (pixels, positive = right) for a turn."""
+        # Turning right (heading grows) moves the scene to the left
+        return int(round(-self.focal_px * math.tan(math.radians(delta_deg))))
+
+    def align(self, depth_fusion, heading):
+        """
+        Shifts the fused map according to the heading change since the last
+        applied alignment. Returns the shift applied in pixels.
+        """
+        if heading is None:
+            return 0
+
+        if self.last_heading is None:
+            self.last_heading = heading
+            return 0
+
+        # Shortest signed angle, handles the 360 -> 0 wrap
+        delta = (heading - self.last_heading + 180) % 360 - 180
+        if abs(delta) < self.min_delta_deg:
+            return 0
+
+        self.last_heading = heading
+
+        if abs(delta) >= self.hfov_deg:
+            # Nothing of the previous view is still visible
+            depth_fusion.reset()
+            return 0
+
+        dx = self.pixel_shift(delta)
+        depth_fusion.shift(dx)
+        return dx
@@ -1,24 +1,37 @@
 import time
 import threading
-import requests
-from dotenv import load_dotenv
-from pathlib import Path
 import os
-import json
 import math
 
 from src.drivers.gps_driver import GPS
 from src.drivers.imu_driver import IMU
-
-load_dotenv()
-
-ORS_API_KEY = os.getenv("ORS_API_KEY")
-GOOGLE_DIRECTIONS_API_KEY = os.getenv("GOOGLE_DIRECTIONS_API_KEY")
+from src.core.navigation_filter import NavigationFilter
+from src.core.offline_router import OfflineRouter
+from src.core.geo_cache import GeoCache
+from src.core.route_progress import RouteProgress
+from src.core.poi_store import PoiStore, FAVORITE
+from src.core.navigation_logger import NavigationLogger
 
 
 class Navigation:
-    def __init__(self, audio_queue):
+    UNKNOWN_LOCATION = "una ubicación desconocida"
+    NO_CONNECTION_LOCATION = "una ubicación desconocida por falta de conexión"
+    # Guidance pauses when the position is this old or this uncertain
+    GPS_LOST_S = 10.0
+    MAX_GUIDANCE_SIGMA_M = 30.0
+
+    def __init__(self, audio_queue, connectivity=None):
+        """
+        connectivity: optional ConnectivityMonitor; when it reports no
+            connection the online services are skipped instead of timing out.
+        """
+        from dotenv import load_dotenv
+
         self.audio_queue = audio_queue
+        self.connectivity = connectivity
+
+        load_dotenv()
+        self.google_directions_api_key = os.getenv("GOOGLE_DIRECTIONS_API_KEY")
 
         try:
             self.gps = GPS()
@@ -29,48 +42,122 @@ class Navigation:
         self.latitude = 0.0
         self.longitude = 0.0
 
-        # Now we ONLY use this variable fed by the physical compass
-        self.compass = 0.0
+        # Smoothed compass heading shared by all consumers; None while the
+        # compass has no valid reading
+        self.compass = None
+        self.heading_sample = None
 
         self.last_fix_time = None
+        # Full GpsFix (satellites, HDOP, speed, course) of the last update
+        self.gps_fix = None
+
+        # GPS + compass fusion; the filter thread publishes `estimate`
+        self.filter = NavigationFilter()
+        self.estimate = None
         self.is_navigating = False
         self.is_imu_active = False
         self.waypoints = []
         self.current_destination = ""
         self.nav_thread = None
-        self.imu_thread = None
 
-        self.favorites = {}  # name -> (lat, lon)
+        # Buffered JSON-lines telemetry under logs/ (replaces navigation_log.txt)
+        self.nav_logger = NavigationLogger()
+        self.nav_logger.start()
+
+        self.favorites = {}  # name -> {"lat", "lon"}
+        self.poi_store = None  # Favorites + imported POIs with a spatial index
         self._load_favorites()
 
+        # Local OSM graph (assets/osm_graph); None if it was never built
+        self.offline_router = OfflineRouter.load_if_available()
+
+        # Persistent addresses/routes by geohash cell, prewarmed for favorites
+        try:
+            self.geo_cache = GeoCache()
+        except Exception as e:
+            print(f"[Navigation] Geo cache disabled: {e}")
+            self.geo_cache = None
+        else:
+            threading.Thread(target=self.prewarm_cache, daemon=True).start()
+
     def thread_update_imu(self):
-        """Updates the IMU compass heading in real time"""
+        """Republishes the IMU sampling service's heading in real time"""
+        if not hasattr(self, "imu"):
+            print("[Navigation] No IMU available, heading disabled.")
+            return
         print("[Navigation] IMU thread started. Listening in real time...")
+        self.imu.start()
+
+        sample = None
+        while True:
+            # Wakes up on every new sample (50 Hz) or after 1 s of silence
+            sample = self.imu.wait_for_sample(previous=sample, timeout=1.0)
+            self.heading_sample = sample
+            self.compass = sample.heading if sample.valid else None
+            self.filter.update_compass(sample.heading, sample.valid)
+
+    def thread_update_filter(self, rate_hz=10.0):
+        """Propagates the fusion filter at a fixed rate and publishes it."""
+        print("[Navigation] Fusion filter thread started.")
+        period = 1.0 / rate_hz
         while True:
-            if hasattr(self, "imu"):
-                self.compass = self.imu.get_heading()
-            time.sleep(0.05)
+            self.filter.step()
+            self.estimate = self.filter.estimate()
+            time.sleep(period)
 
     def thread_update_location(self):
         """Updates the GPS location in real time (without guessing headings)."""
         print("[Navigation] GPS thread started. Listening in real time...")
+        self.gps.start()
 
+        fix = None
         while True:
-            location = self.gps.get_location()
+            # Sleeps until the GPS driver publishes a new fix (no polling)
+            new_fix = self.gps.wait_for_fix(previous=fix, timeout=5.0)
+            if new_fix is None:
+                continue
 
-            if location:
-                lat, lon = location
+            fix = new_fix
+            self.gps_fix = fix
+            self.filter.update_gps(fix)
 
-                if lat != 0.0 and lon != 0.0:
-                    self.last_fix_time = time.time()
+            if fix.has_fix and fix.latitude != 0.0 and fix.longitude != 0.0:
+                self.last_fix_time = fix.timestamp
+                self.latitude = fix.latitude
+                self.longitude = fix.longitude
 
-                    if self.latitude != lat or self.longitude != lon:
-                        self.latitude = lat
-                        self.longitude = lon
+    def get_address_from_coordinates(self, lat, lon):
+        """Spoken address of a position: cache first, then Nominatim."""
+        if self.geo_cache is not None:
+            cached = self.geo_cache.get_address(lat, lon)
+            if cached is not None:
+                return cached
 
-            time.sleep(0.01)
+        message = self._reverse_geocode(lat, lon)
+        if self.geo_cache is None:
+            return message
+
+        if message in (self.UNKNOWN_LOCATION, self.NO_CONNECTION_LOCATION):
+            # An expired answer is still better than none when offline
+            stale = self.geo_cache.get_address(lat, lon, allow_stale=True)
+            return stale if stale is not None else message
+
+        self.geo_cache.put_address(lat, lon, message)
+        return message
+
+    def _offline(self):
+        if self.connectivity is None:
+            return False
+        # The monitor says offline until its first probe ends (at most two
+        # probe timeouts); a request right after boot waits for that answer
+        return not self.connectivity.wait_until_checked(timeout=3.0)
+
+    def _reverse_geocode(self, lat, lon):
+        import requests
+
+        if self._offline():
+            return self.NO_CONNECTION_LOCATION
 
-    def get_address_from_coordinates(self, lat, lon):
         try:
             url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json&namedetails=1&extratags=1"
             headers = {"User-Agent": "KarimAsistenteNavegacion/1.0"}
@@ -126,9 +213,13 @@ class Navigation:
 
                 return message
             else:
-                return "una ubicación desconocida"
-        except requests.exceptions.RequestException:
-            return "una ubicación desconocida por falta de conexión"
+                return self.UNKNOWN_LOCATION
+        except requests.exceptions.RequestException as e:
+            if self.connectivity is not None and isinstance(
+                e, (requests.ConnectionError, requests.Timeout)
+            ):
+                self.connectivity.report_failure()
+            return self.NO_CONNECTION_LOCATION
 
     def get_where_am_i_message(self):
         if (
@@ -139,12 +230,11 @@ class Navigation:
             return "Aún estoy buscando señal de los satélites. Por favor, asegúrate de no estar en un lugar cerrado."
 
         elapsed_time = time.time() - self.last_fix_time
-        direction = self.get_address_from_coordinates(self.latitude, self.longitude)
 
-        # Get cardinal direction from IMU
+        # Get cardinal direction from the shared compass heading
         cardinal = "una dirección desconocida"
-        if hasattr(self, "imu"):
-            heading = self.imu.get_heading()
+        heading = self.compass
+        if heading is not None:
             if heading >= 315 or heading < 45:
                 cardinal = "el norte"
             elif 45 <= heading < 135:
@@ -155,23 +245,49 @@ class Navigation:
                 cardinal = "el oeste"
 
         if elapsed_time < 20:
-            return f"Actualmente estás en {direction}, mirando hacia {cardinal}"
+            # Saved places answer instantly and offline
+            favorite, nearby = self._nearby_description(self.latitude, self.longitude)
+            if favorite:
+                return f"{nearby}, mirando hacia {cardinal}"
+
+            direction = self.get_address_from_coordinates(self.latitude, self.longitude)
+            if direction in (self.UNKNOWN_LOCATION, self.NO_CONNECTION_LOCATION) and nearby:
+                return f"{nearby}. Estás mirando hacia {cardinal}"
+            message = f"Actualmente estás en {direction}, mirando hacia {cardinal}"
+            if nearby:
+                message += f". {nearby}"
+            return message
         else:
+            direction = self.get_address_from_coordinates(self.latitude, self.longitude)
             minutes = int(elapsed_time // 60)
             if minutes == 0:
                 return f"Perdí la señal del GPS hace unos segundos. Tu última ubicación conocida fue en {direction}, mirando hacia {cardinal}"
             else:
                 return f"No tengo señal actual. Hace {minutes} minutos estabas cerca de {direction}"
 
+    def _nearby_description(self, lat, lon):
+        """
+        Names the closest saved or imported place without any network call.
+        Returns (is_at_favorite, sentence); the sentence is "" if nothing is near.
+        """
+        if self.poi_store is None:
+            return False, ""
+        places = self.poi_store.nearest(lat, lon, n=1, max_radius_m=80.0)
+        if not places:
+            return False, ""
+
+        place = places[0]
+        if place.category == FAVORITE:
+            if place.distance_m < 25.0:
+                return True, f"Estás en {place.name}"
+            return False, f"Estás a {place.distance_m:.0f} metros de {place.name}"
+        return False, f"Tienes cerca {place.name}, {place.category}, a {place.distance_m:.0f} metros"
+
     def _load_favorites(self):
-        fav_path = Path.cwd() / "assets" / "ubication_favorites.json"
         try:
-            if fav_path.exists():
-                with open(fav_path, "r", encoding="utf-8") as f:
-                    self.favorites = json.load(f)
-                print(f"[Navigation] {len(self.favorites)} favorites loaded.")
-            else:
-                print("[Navigation] favorites.json file not found.")
+            self.poi_store = PoiStore.load()
+            self.favorites = self.poi_store.favorites()
+            print(f"[Navigation] {len(self.favorites)} favorites loaded.")
         except Exception as e:
             print(f"[Navigation] Error loading favorites: {e}")
 
@@ -228,9 +344,62 @@ class Navigation:
             )
             return True, f"Ya te encuentras en {place_name}. Has llegado a tu destino."
 
-        print(f"[Navigation] Requesting Google Maps route to {place_name}...")
+        waypoints, error_message = self._compute_route(
+            place_key, self.latitude, self.longitude, target_lat, target_lon
+        )
+        if not waypoints:
+            return False, error_message
+        return self._start_navigation(place_name, waypoints)
+
+    def _compute_route(self, place_key, lat, lon, target_lat, target_lon):
+        """
+        Walking route from (lat, lon) to a favorite: offline graph, then
+        cache, then Google, then an expired cache entry.
+        Returns (waypoints, None) or (None, error message).
+        """
+        # Offline first: no network round trip and works without signal
+        if self.offline_router is not None:
+            waypoints = self.offline_router.route(lat, lon, target_lat, target_lon)
+            if waypoints:
+                print(
+                    f"[Navigation] Offline route to {place_key}: {len(waypoints)} points "
+                    f"in {self.offline_router.last_route_ms:.1f} ms."
+                )
+                return waypoints, None
+
+        cache = self.geo_cache
+        if cache is not None:
+            waypoints = cache.get_route(lat, lon, place_key)
+            if waypoints:
+                print(f"[Navigation] Cached route to {place_key}.")
+                return self._trim_route(waypoints, lat, lon), None
+
+        waypoints, error_message = self._fetch_google_route(
+            lat, lon, target_lat, target_lon
+        )
+        if waypoints:
+            if cache is not None:
+                cache.put_route(lat, lon, place_key, waypoints)
+            return waypoints, None
+
+        if cache is not None:
+            waypoints = cache.get_route(lat, lon, place_key, allow_stale=True)
+            if waypoints:
+                print(f"[Navigation] Using an expired cached route to {place_key}.")
+                return self._trim_route(waypoints, lat, lon), None
+        return None, error_message
 
-        url = f"https://maps.googleapis.com/maps/api/directions/json?origin={self.latitude},{self.longitude}&destination={target_lat},{target_lon}&mode=walking&key={GOOGLE_DIRECTIONS_API_KEY}"
+    def _fetch_google_route(self, origin_lat, origin_lon, target_lat, target_lon):
+        """Google Directions walking route: (waypoints, None) or (None, error)."""
+        import requests
+
+        if self._offline():
+            print("[Navigation] No connection, not requesting a Google Maps route.")
+            return None, "Error de conexión al calcular la ruta."
+
+        print("[Navigation] Requesting Google Maps route...")
+
+        url = f"https://maps.googleapis.com/maps/api/directions/json?origin={origin_lat},{origin_lon}&destination={target_lat},{target_lon}&mode=walking&key={self.google_directions_api_key}"
 
         try:
             response = requests.get(url, timeout=10)
@@ -239,111 +408,250 @@ class Navigation:
 
                 if data.get("status") == "OK":
                     polyline_str = data["routes"][0]["overview_polyline"]["points"]
-                    self.waypoints = self._decode_polyline(polyline_str)
-
-                    if len(self.waypoints) > 1:
-                        self.waypoints.pop(0)
-
-                    self.current_destination = place_name
-                    self.is_navigating = True
+                    waypoints = self._decode_polyline(polyline_str)
 
-                    self.is_imu_active = True
-                    if hasattr(self, "imu"):
-                        self.imu.last_time = time.time()  # type: ignore
-
-                    if self.imu_thread is None or not self.imu_thread.is_alive():
-                        self.imu_thread = threading.Thread(
-                            target=self._thread_update_imu, daemon=True
-                        )
-                        self.imu_thread.start()
-
-                    if self.nav_thread is None or not self.nav_thread.is_alive():
-                        self.nav_thread = threading.Thread(
-                            target=self._navigation_loop, daemon=True
-                        )
-                        self.nav_thread.start()
+                    # The first point is the origin itself
+                    if len(waypoints) > 1:
+                        waypoints.pop(0)
 
-                    return (
-                        True,
-                        f"Ruta calculada hacia {place_name}. Comienza a caminar.",
-                    )
+                    return waypoints, None
                 else:
                     error_msg = data.get("status", "Unknown Error")
                     print(f"[Navigation] Google Maps Error: {error_msg}")
-                    return (
-                        False,
-                        "Google Maps no pudo encontrar una ruta peatonal válida.",
-                    )
+                    return None, "Google Maps no pudo encontrar una ruta peatonal válida."
             else:
-                return False, "Hubo un error al comunicarse con el servidor de mapas."
+                return None, "Hubo un error al comunicarse con el servidor de mapas."
 
         except Exception as e:
             print(f"[Navigation] Error calculating route: {e}")
-            return False, "Error de conexión al calcular la ruta."
+            if self.connectivity is not None and isinstance(
+                e, (requests.ConnectionError, requests.Timeout)
+            ):
+                self.connectivity.report_failure()
+            return None, "Error de conexión al calcular la ruta."
+
+    def _trim_route(self, waypoints, lat, lon):
+        """
+        A cached route was computed from somewhere in the same ~150 m cell:
+        start it at the waypoint closest to the current position.
+        """
+        distances = [self._haversine(lat, lon, wp[0], wp[1]) for wp in waypoints]
+        return waypoints[distances.index(min(distances)) :]
+
+    def prewarm_cache(self, max_routes=10):
+        """
+        Fills the cache for the favorites in the background: their addresses,
+        and fresh copies of the expired routes between them that were already
+        used, so frequent trips work offline. At most `max_routes` Google
+        Directions requests, one per second.
+        """
+        if self.geo_cache is None:
+            return
+        if self.connectivity is not None:
+            # Started at boot, before the first connectivity probe has ended
+            self.connectivity.wait_until_checked(timeout=10.0)
+        cache = self.geo_cache
+        fetched = 0
+        routes_left = max_routes
+        # A copy: the menu can save a new favorite while this thread sleeps
+        favorites = list(self.favorites.items())
+        for name, place in favorites:
+            lat, lon = place["lat"], place["lon"]
+            if not cache.is_fresh("address", cache.address_key(lat, lon), cache.ADDRESS_TTL_S):
+                message = self._reverse_geocode(lat, lon)
+                if message in (self.UNKNOWN_LOCATION, self.NO_CONNECTION_LOCATION):
+                    print("[Navigation] Cache prewarm stopped: no connection.")
+                    return
+                cache.put_address(lat, lon, message)
+                fetched += 1
+                # Nominatim usage policy: at most one request per second
+                time.sleep(1.0)
+
+            if self.offline_router is not None:
+                continue
+            for other_name, other in favorites:
+                if other_name == name or routes_left <= 0:
+                    continue
+                key = cache.route_key(lat, lon, other_name)
+                # Only trips the user has made: all n * (n - 1) pairs would
+                # flood the Directions API at every boot
+                if not cache.contains("route", key):
+                    continue
+                if cache.is_fresh("route", key, cache.ROUTE_TTL_S):
+                    continue
+                routes_left -= 1
+                waypoints, _ = self._fetch_google_route(lat, lon, other["lat"], other["lon"])
+                if waypoints:
+                    cache.put_route(lat, lon, other_name, waypoints)
+                    fetched += 1
+                time.sleep(1.0)
+        print(f"[Navigation] Cache prewarmed ({fetched} new entries).")
+
+    def _start_navigation(self, place_name, waypoints):
+        """Starts guiding along [[lat, lon], ...] waypoints."""
+        self.waypoints = waypoints
+        self.current_destination = place_name
+        self.is_navigating = True
+
+        # The IMU and filter threads are started by main at boot
+        self.is_imu_active = True
+
+        if self.nav_thread is None or not self.nav_thread.is_alive():
+            self.nav_thread = threading.Thread(target=self._navigation_loop, daemon=True)
+            self.nav_thread.start()
+
+        return True, f"Ruta calculada hacia {place_name}. Comienza a caminar."
 
     def _navigation_loop(self):
         time.sleep(1)
         print("[Navigation] Phase 4 started. Guiding the user.")
 
-        log_file_path = Path.cwd() / "navigation_log.txt"
+        logger = self.nav_logger
+        write_log = logger.event
 
-        def write_log(message):
-            print(message)
-            try:
-                with open(log_file_path, "a", encoding="utf-8") as f:
-                    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"[{timestamp}] {message}\n")
-            except Exception:
-                pass
-
-        write_log(
-            f"\n--- STARTING NAVIGATION TOWARDS: {self.current_destination.upper()} ---"
+        print(f"--- STARTING NAVIGATION TOWARDS: {self.current_destination.upper()} ---")
+        logger.log(
+            "start",
+            destination=self.current_destination,
+            origin=[self.latitude, self.longitude],
+            waypoints=self.waypoints,
         )
 
         last_instruction = ""
         last_instruction_time = 0
+        last_log_time = 0
+
+        # The route starts where the user is: the first leg leads from here
+        # to the first waypoint
+        tracker = RouteProgress(
+            [[self.latitude, self.longitude]] + self.waypoints, arrival_m=30.0
+        )
+        last_vertex = 0
+        fix = None
+        arrived = False
+        reroute_failures = 0  # In the current off-route episode
+        gps_lost = False
 
         while self.is_navigating and len(self.waypoints) > 0:
-            current_lat = self.latitude
-            current_lon = self.longitude
+            # One decision per GPS fix, and at least every 0.5 s so compass
+            # turns are still answered between fixes
+            if hasattr(self, "gps"):
+                new_fix = self.gps.wait_for_fix(previous=fix, timeout=0.5)
+                if new_fix is not None:
+                    fix = new_fix
+            else:
+                time.sleep(0.5)
             current_time = time.time()
 
-            target_lat = self.waypoints[0][0]
-            target_lon = self.waypoints[0][1]
-
-            final_lat = self.waypoints[-1][0]
-            final_lon = self.waypoints[-1][1]
+            # Smoothed position/heading from the fusion filter, raw sensors
+            # until it has its first fix
+            estimate = self.estimate
 
-            # 1. SMART ARRIVAL (15 meters tolerance)
-            dist_to_final = self._haversine(
-                current_lat, current_lon, final_lat, final_lon
+            # Without fresh fixes the position is a guess: bearings, corners
+            # and arrival would all be invented, so pause until GPS is back
+            fix_age = current_time - (self.last_fix_time or 0.0)
+            uncertain = (
+                estimate is not None
+                and estimate.position_sigma_m > self.MAX_GUIDANCE_SIGMA_M
             )
-            if dist_to_final < 30.0:
+            if fix_age > self.GPS_LOST_S or uncertain:
+                if not gps_lost:
+                    gps_lost = True
+                    write_log(
+                        f"GPS lost (fix age {fix_age:.0f}s). Guidance paused."
+                    )
+                    if self.audio_queue:
+                        self.audio_queue.put(
+                            self.audio_queue.NAVIGATION,
+                            "Perdí la señal GPS. Detengo la guía hasta recuperarla.",
+                        )
+                continue
+            if gps_lost:
+                gps_lost = False
+                tracker.outside_since = None  # Time without GPS is not off route
+                last_instruction = ""
+                write_log("GPS recovered. Guidance resumed.")
+                if self.audio_queue:
+                    self.audio_queue.put(
+                        self.audio_queue.NAVIGATION, "Señal GPS recuperada."
+                    )
+
+            if estimate is not None:
+                current_lat = estimate.latitude
+                current_lon = estimate.longitude
+            else:
+                current_lat = self.latitude
+                current_lon = self.longitude
+
+            state = tracker.update(current_lat, current_lon, now=current_time)
+
+            # 1. SMART ARRIVAL (30 meters along the route)
+            if state.arrived:
                 write_log(
-                    f"Smart arrival: {dist_to_final:.1f}m from final destination."
+                    f"Smart arrival: {state.remaining_m:.1f}m from final destination."
                 )
                 self.waypoints = []
+                arrived = True
                 break
 
-            # 2. Proximity Check to Corner
-            distance_to_wp = self._haversine(
-                current_lat, current_lon, target_lat, target_lon
-            )
-            if distance_to_wp < 12.0:
+            # 2. Off route for a while: compute a new route from here
+            if state.off_route:
                 write_log(
-                    f"Corner passed (Dist: {distance_to_wp:.1f}m). {len(self.waypoints) - 1} points remaining."
+                    f"Off route (XTE: {state.cross_track_m:+.0f}m). Rerouting."
                 )
-                self.waypoints.pop(0)
-                last_instruction = ""
+                waypoints = self._reroute(
+                    current_lat, current_lon, announce=reroute_failures == 0
+                )
+                if waypoints:
+                    reroute_failures = 0
+                    self.waypoints = waypoints
+                    logger.log(
+                        "route", origin=[current_lat, current_lon], waypoints=waypoints
+                    )
+                    tracker = RouteProgress(
+                        [[current_lat, current_lon]] + waypoints, arrival_m=30.0
+                    )
+                    last_vertex = 0
+                    last_instruction = ""
+                else:
+                    # Keep guiding on the old route and retry later, each
+                    # time waiting twice as long (offline, no graph or cache)
+                    reroute_failures += 1
+                    backoff = min(
+                        tracker.off_route_s * (2 ** reroute_failures - 1), 120.0
+                    )
+                    tracker.outside_since = current_time + backoff
                 continue
+            if tracker.outside_since is None:
+                # Back inside the corridor: the next episode is announced again
+                reroute_failures = 0
+
+            # 3. Corners are passed by progress, even if one was cut short
+            if state.next_vertex > last_vertex:
+                if last_vertex > 0:
+                    write_log(
+                        f"Corner passed. {len(tracker.waypoints) - state.next_vertex} points remaining."
+                    )
+                    last_instruction = ""
+                last_vertex = state.next_vertex
 
-            # 3. Headings (Using ONLY the IMU)
+            # 4. Headings towards a point a few metres ahead on the route
             ideal_bearing = self._calculate_bearing(
-                current_lat, current_lon, target_lat, target_lon
+                current_lat, current_lon, state.target_lat, state.target_lon
             )
-            current_heading = self.compass
+            if estimate is not None and estimate.heading_valid:
+                current_heading = estimate.heading_deg
+            else:
+                current_heading = self.compass
 
-            # 4. Error Calculation
+            if current_heading is None:
+                # Without a compass any turn instruction would be a guess
+                if current_time - last_log_time >= 2.0:
+                    write_log("Heading unavailable, waiting for the compass.")
+                    last_log_time = current_time
+                continue
+
+            # 5. Error Calculation
             error = (ideal_bearing - current_heading + 540) % 360 - 180
             abs_error = abs(error)
             instruction = ""
@@ -359,7 +667,7 @@ class Navigation:
             elif error < -50:
                 instruction = "gira a la izquierda"
 
-            # 5. Anti-Spam Control (45 seconds of silence)
+            # 6. Anti-Spam Control (45 seconds of silence)
             should_speak = False
 
             if instruction != last_instruction:
@@ -375,10 +683,34 @@ class Navigation:
                 last_instruction = instruction
                 last_instruction_time = current_time
 
-            log_msg = f"Pos: [{current_lat:.6f}, {current_lon:.6f}] | Target: {dist_to_final:.1f}m | Ideal: {ideal_bearing:.0f}° | IMU: {current_heading:.0f}° | Err: {error:.0f}° -> {instruction.upper()}"
-            write_log(log_msg)
-
-            time.sleep(2.0)
+            # Every decision is recorded; the console keeps a 2 s cadence
+            gps_fix = self.gps_fix
+            logger.log(
+                "step",
+                raw_lat=gps_fix.latitude if gps_fix else None,
+                raw_lon=gps_fix.longitude if gps_fix else None,
+                # The fix's own time: several steps can log the same fix
+                fix_t=round(gps_fix.timestamp, 3) if gps_fix else None,
+                sats=gps_fix.satellites if gps_fix else None,
+                hdop=gps_fix.hdop if gps_fix else None,
+                speed=gps_fix.speed_mps if gps_fix else None,
+                course=gps_fix.course_deg if gps_fix else None,
+                lat=round(current_lat, 7),
+                lon=round(current_lon, 7),
+                remaining=round(state.remaining_m, 1),
+                xtrack=round(state.cross_track_m, 1),
+                bearing=round(ideal_bearing, 1),
+                heading=round(current_heading, 1),
+                compass=self.compass,
+                error=round(error, 1),
+                instruction=instruction,
+                spoken=should_speak,
+            )
+            if should_speak or current_time - last_log_time >= 2.0:
+                print(
+                    f"Pos: [{current_lat:.6f}, {current_lon:.6f}] | Target: {state.remaining_m:.1f}m | XTE: {state.cross_track_m:+.1f}m | Ideal: {ideal_bearing:.0f}° | IMU: {current_heading:.0f}° | Err: {error:.0f}° -> {instruction.upper()}"
+                )
+                last_log_time = current_time
 
         # End of route
         if self.is_navigating and len(self.waypoints) == 0:
@@ -390,6 +722,29 @@ class Navigation:
                     f"Has llegado a {self.current_destination}.",
                 )
             write_log("Destination reached. Navigation finished.")
+        logger.log("end", destination=self.current_destination, arrived=arrived)
+
+    def _reroute(self, lat, lon, announce=True):
+        """
+        New waypoints from (lat, lon) to the current destination, or None.
+        announce: say "Recalculando"; only the first attempt of an off-route
+            episode does, so failed retries are silent.
+        """
+        place_key = self.current_destination.lower().strip()
+        target = self.favorites.get(place_key)
+        if target is None:
+            return None
+
+        if announce and self.audio_queue:
+            self.audio_queue.put(
+                self.audio_queue.NAVIGATION, "Te saliste de la ruta. Recalculando."
+            )
+        waypoints, error_message = self._compute_route(
+            place_key, lat, lon, target["lat"], target["lon"]
+        )
+        if not waypoints:
+            print(f"[Navigation] Reroute failed: {error_message}")
+        return waypoints
 
     def cancel_navigation(self):
         if self.is_navigating:
@@ -429,12 +784,15 @@ class Navigation:
             return False, "No tengo señal de GPS para guardar esta ubicación."
 
         name_key = name.lower().strip()
-        self.favorites[name_key] = {"lat": self.latitude, "lon": self.longitude}
-        fav_path = Path.cwd() / "assets" / "ubication_favorites.json"
+        if self.poi_store is None:
+            return False, "Ocurrió un error al guardar el archivo."
 
         try:
-            with open(fav_path, "w", encoding="utf-8") as f:
-                json.dump(self.favorites, f, ensure_ascii=False, indent=4)
-            return True, f"Ubicación guardada exitosamente como {name}."
-        except Exception:
+            # One appended journal line instead of rewriting the whole file
+            self.poi_store.add_favorite(name_key, self.latitude, self.longitude)
+        except Exception as e:
+            print(f"[Navigation] Error saving favorite: {e}")
             return False, "Ocurrió un error al guardar el archivo."
+
+        self.favorites[name_key] = {"lat": self.latitude, "lon": self.longitude}
+        return True, f"Ubicación guardada exitosamente como {name}."
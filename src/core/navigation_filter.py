@@ -0,0 +1,387 @@
+import math
+import re
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class NavigationEstimate(NamedTuple):
+    """Smoothed state published by NavigationFilter."""
+
+    timestamp: float
+    latitude: float
+    longitude: float
+    velocity_east: float  # m/s
+    velocity_north: float  # m/s
+    speed_mps: float
+    position_sigma_m: float  # 1-sigma horizontal position uncertainty
+    heading_deg: float  # Where the user is facing (compass + learned bias)
+    heading_sigma_deg: float
+    heading_valid: bool
+    gps_timestamp: float  # Time of the last GPS fix fused, None before any
+
+
+class NavigationFilter:
+    """
+    Fuses GPS fixes, GPS course over ground and the compass heading.
+
+    Position and velocity are tracked by a constant-velocity Kalman filter in
+    a local East/North frame (metres) anchored at the first fix. GPS position
+    noise scales with HDOP. When the receiver reports (almost) no speed, a
+    zero-velocity update pins the state, which removes the drift seen while
+    standing still. Without GPS for `gps_timeout_s` the velocity is dropped,
+    so the position stays put (with a growing sigma) instead of drifting.
+
+    Heading is a complementary filter: the compass gives the fast response,
+    and while walking the GPS course slowly teaches the filter the compass
+    bias (mounting error, local magnetic disturbance).
+    """
+
+    def __init__(
+        self,
+        accel_sigma=0.6,
+        uere_m=3.5,
+        walking_speed_mps=0.8,
+        still_speed_mps=0.3,
+        bias_gain=0.05,
+        heading_gain=0.4,
+        gate_chi2=13.8,
+        max_rejections=5,
+        compass_timeout_s=2.0,
+        gps_timeout_s=3.0,
+    ):
+        """
+        accel_sigma: expected walking acceleration noise (m/s^2).
+        uere_m: GPS range error; position sigma = hdop * uere_m.
+        walking_speed_mps: minimum speed to trust the GPS course.
+        still_speed_mps: below this GPS speed a zero-velocity update is applied.
+        bias_gain: how fast the compass bias follows the GPS course.
+        heading_gain: weight of each new compass sample in the heading.
+        gate_chi2: Mahalanobis gate for GPS measurements (13.8 = 99.9% with
+            2 degrees of freedom); fixes outside it are treated as glitches.
+        max_rejections: consecutive rejected fixes after which the filter
+            restarts at the GPS position (the user really is elsewhere).
+        compass_timeout_s: the heading is invalid after this long without
+            a valid compass sample.
+        gps_timeout_s: after this long without a GPS fix the velocity is
+            set to zero instead of being extrapolated.
+        """
+        self.accel_sigma = accel_sigma
+        self.uere_m = uere_m
+        self.walking_speed_mps = walking_speed_mps
+        self.still_speed_mps = still_speed_mps
+        self.bias_gain = bias_gain
+        self.heading_gain = heading_gain
+        self.gate_chi2 = gate_chi2
+        self.max_rejections = max_rejections
+        self.compass_timeout_s = compass_timeout_s
+        self.gps_timeout_s = gps_timeout_s
+
+        self.lock = threading.Lock()
+
+        # Local frame origin
+        self.origin_lat = None
+        self.origin_lon = None
+        self.meters_per_deg_lon = 0.0
+
+        # Kalman state [east, north, v_east, v_north] and covariance
+        self.x = np.zeros(4)
+        self.P = np.diag([1e4, 1e4, 4.0, 4.0])
+        self.time = None
+        self.gps_time = None
+        self.rejections = 0
+
+        # Heading state as a unit vector (east, north) to average angles safely
+        self.heading_vector = None
+        self.heading_variance = 180.0**2
+        self.compass_bias = 0.0
+        self.compass_time = None
+
+    # ------------------------------------------------------------------
+    # Coordinates
+    # ------------------------------------------------------------------
+    def _to_local(self, lat, lon):
+        north = math.radians(lat - self.origin_lat) * EARTH_RADIUS_M
+        east = (lon - self.origin_lon) * self.meters_per_deg_lon
+        return east, north
+
+    def _to_geodetic(self, east, north):
+        lat = self.origin_lat + math.degrees(north / EARTH_RADIUS_M)
+        lon = self.origin_lon + east / self.meters_per_deg_lon
+        return lat, lon
+
+    def _set_origin(self, lat, lon):
+        self.origin_lat = lat
+        self.origin_lon = lon
+        self.meters_per_deg_lon = (
+            math.radians(1.0) * EARTH_RADIUS_M * math.cos(math.radians(lat))
+        )
+
+    # ------------------------------------------------------------------
+    # Kalman filter
+    # ------------------------------------------------------------------
+    def _predict(self, now):
+        if self.time is None:
+            self.time = now
+            return
+        dt = now - self.time
+        if dt <= 0:
+            return
+        self.time = now
+
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+
+        # Discrete white-noise acceleration model
+        q = self.accel_sigma**2
+        dt2, dt3, dt4 = dt * dt, dt**3, dt**4
+        Q = np.zeros((4, 4))
+        Q[0, 0] = Q[1, 1] = dt4 / 4 * q
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = dt3 / 2 * q
+        Q[2, 2] = Q[3, 3] = dt2 * q
+
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+
+    def _correct(self, H, z, R, gate=None):
+        """Kalman update. Returns False if the innovation fails the gate."""
+        y = z - H @ self.x
+        S = H @ self.P @ H.T + R
+        S_inv = np.linalg.inv(S)
+        if gate is not None and float(y @ S_inv @ y) > gate:
+            return False
+        K = self.P @ H.T @ S_inv
+        self.x = self.x + K @ y
+        self.P = (np.eye(4) - K @ H) @ self.P
+        return True
+
+    def step(self, now=None):
+        """Propagates the state to `now`. Called at a fixed rate."""
+        with self.lock:
+            if self.origin_lat is None:
+                return
+            now = time.time() if now is None else now
+            self._predict(now)
+            if self.gps_time is not None and now - self.gps_time > self.gps_timeout_s:
+                # Dead reckoning at the last walking speed drifts tens of
+                # metres per minute: assume the user stopped instead
+                self.x[2:] = 0.0
+
+    def update_gps(self, fix):
+        """Fuses a GpsFix (position, speed, course)."""
+        if not fix.has_fix:
+            return
+
+        with self.lock:
+            if self.origin_lat is None:
+                self._set_origin(fix.latitude, fix.longitude)
+                self.time = fix.timestamp
+            self._predict(fix.timestamp)
+            self.gps_time = fix.timestamp
+
+            east, north = self._to_local(fix.latitude, fix.longitude)
+            sigma = max(fix.hdop, 0.5) * self.uere_m
+            H = np.array([[1.0, 0, 0, 0], [0, 1.0, 0, 0]])
+            R = np.eye(2) * sigma**2
+            if not self._correct(H, np.array([east, north]), R, gate=self.gate_chi2):
+                # Single corrupted sentences (multipath, serial noise) jump
+                # hundreds of metres; a sustained disagreement is real.
+                self.rejections += 1
+                if self.rejections < self.max_rejections:
+                    return
+                print("[NavigationFilter] GPS disagrees for too long, restarting.")
+                self.x[:] = (east, north, 0.0, 0.0)
+                self.P = np.diag([sigma**2, sigma**2, 4.0, 4.0])
+            self.rejections = 0
+
+            H_v = np.array([[0, 0, 1.0, 0], [0, 0, 0, 1.0]])
+            if fix.speed_mps < self.still_speed_mps:
+                # Zero-velocity update: the user is standing still
+                self._correct(H_v, np.zeros(2), np.eye(2) * 0.05**2)
+            elif fix.course_deg is not None:
+                course = math.radians(fix.course_deg)
+                v = np.array(
+                    [fix.speed_mps * math.sin(course), fix.speed_mps * math.cos(course)]
+                )
+                if not self._correct(H_v, v, np.eye(2) * 0.3**2, gate=self.gate_chi2):
+                    return
+
+            # While walking, the course over ground tells where the user
+            # faces; use it to learn the compass bias.
+            if (
+                fix.course_deg is not None
+                and fix.speed_mps >= self.walking_speed_mps
+                and self.heading_vector is not None
+            ):
+                compass = self._vector_to_deg(self.heading_vector) - self.compass_bias
+                error = (fix.course_deg - compass + 540) % 360 - 180
+                bias_error = (error - self.compass_bias + 540) % 360 - 180
+                self.compass_bias += self.bias_gain * bias_error
+
+    # ------------------------------------------------------------------
+    # Heading
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _vector_to_deg(vector):
+        return math.degrees(math.atan2(vector[0], vector[1])) % 360.0
+
+    def update_compass(self, heading_deg, valid=True, timestamp=None):
+        """Blends a compass sample into the heading estimate."""
+        if not valid or heading_deg is None:
+            return
+        with self.lock:
+            self.compass_time = time.time() if timestamp is None else timestamp
+            corrected = math.radians(heading_deg + self.compass_bias)
+            sample = np.array([math.sin(corrected), math.cos(corrected)])
+
+            if self.heading_vector is None:
+                self.heading_vector = sample
+                self.heading_variance = 10.0**2
+                return
+
+            residual = math.degrees(
+                math.atan2(
+                    self.heading_vector[0] * sample[1] - self.heading_vector[1] * sample[0],
+                    float(self.heading_vector @ sample),
+                )
+            )
+            blended = (1.0 - self.heading_gain) * self.heading_vector + self.heading_gain * sample
+            norm = np.linalg.norm(blended)
+            if norm > 1e-6:
+                self.heading_vector = blended / norm
+            # Running variance of the compass residuals as the uncertainty
+            self.heading_variance = (
+                1.0 - self.heading_gain
+            ) * self.heading_variance + self.heading_gain * residual**2
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def estimate(self):
+        """Returns the current NavigationEstimate, or None before any fix."""
+        with self.lock:
+            if self.origin_lat is None:
+                return None
+            lat, lon = self._to_geodetic(self.x[0], self.x[1])
+            heading_valid = (
+                self.heading_vector is not None
+                and self.time - self.compass_time <= self.compass_timeout_s
+            )
+            heading = (
+                self._vector_to_deg(self.heading_vector)
+                if self.heading_vector is not None
+                else 0.0
+            )
+            return NavigationEstimate(
+                timestamp=self.time,
+                latitude=lat,
+                longitude=lon,
+                velocity_east=float(self.x[2]),
+                velocity_north=float(self.x[3]),
+                speed_mps=float(math.hypot(self.x[2], self.x[3])),
+                position_sigma_m=float(math.sqrt(max(self.P[0, 0], self.P[1, 1]))),
+                heading_deg=heading,
+                heading_sigma_deg=float(math.sqrt(self.heading_variance)),
+                heading_valid=heading_valid,
+                gps_timestamp=self.gps_time,
+            )
+
+
+LOG_LINE = re.compile(
+    r"\[(?P<time>[\d\- :]+)\] Pos: \[(?P<lat>-?[\d.]+), (?P<lon>-?[\d.]+)\].*?"
+    r"IMU: (?P<imu>-?[\d.]+)°"
+)
+
+
+def read_navigation_trace(path):
+    """
+    Parses position and compass samples from a text navigation log.
+    Returns a list of (timestamp, lat, lon, heading).
+    """
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = LOG_LINE.search(line)
+            if not match:
+                continue
+            timestamp = time.mktime(time.strptime(match["time"], "%Y-%m-%d %H:%M:%S"))
+            samples.append(
+                (timestamp, float(match["lat"]), float(match["lon"]), float(match["imu"]))
+            )
+    return samples
+
+
+def replay_trace(samples, nav_filter=None):
+    """
+    Runs recorded (timestamp, lat, lon, heading) samples through the filter.
+    Returns a list of (raw_sample, NavigationEstimate).
+    """
+    from src.drivers.gps_driver import GpsFix
+
+    nav_filter = nav_filter or NavigationFilter()
+    results = []
+    previous = None
+    for timestamp, lat, lon, heading in samples:
+        # The text log has no speed: derive it from consecutive positions
+        speed, course = 0.0, None
+        if previous is not None and timestamp > previous[0]:
+            d_north = math.radians(lat - previous[1]) * EARTH_RADIUS_M
+            d_east = (
+                math.radians(lon - previous[2]) * EARTH_RADIUS_M * math.cos(math.radians(lat))
+            )
+            speed = math.hypot(d_east, d_north) / (timestamp - previous[0])
+            course = math.degrees(math.atan2(d_east, d_north)) % 360.0
+        previous = (timestamp, lat, lon)
+
+        fix = GpsFix(
+            timestamp=timestamp,
+            latitude=lat,
+            longitude=lon,
+            has_fix=True,
+            fix_quality=1,
+            fix_type=3,
+            satellites=8,
+            hdop=1.0,
+            pdop=1.8,
+            vdop=1.5,
+            altitude=0.0,
+            speed_mps=speed,
+            course_deg=course,
+        )
+        nav_filter.update_compass(heading, timestamp=timestamp)
+        nav_filter.update_gps(fix)
+        results.append(((timestamp, lat, lon, heading), nav_filter.estimate()))
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    # Replay harness: python -m src.core.navigation_filter [log] [goal_lat goal_lon]
+    log_path = sys.argv[1] if len(sys.argv) > 1 else Path.cwd() / "navigation_log.txt"
+    goal = (8.297861, -62.717013)  # "casa" in ubication_favorites.json
+    if len(sys.argv) > 3:
+        goal = (float(sys.argv[2]), float(sys.argv[3]))
+
+    def distance(lat, lon):
+        d_north = math.radians(lat - goal[0]) * EARTH_RADIUS_M
+        d_east = math.radians(lon - goal[1]) * EARTH_RADIUS_M * math.cos(math.radians(lat))
+        return math.hypot(d_east, d_north)
+
+    results = replay_trace(read_navigation_trace(log_path))
+    raw = np.array([distance(r[1], r[2]) for r, _ in results])
+    fused = np.array([distance(e.latitude, e.longitude) for _, e in results])
+
+    print(f"Samples:                     {len(results)}")
+    raw_steps = np.abs(np.diff(raw))
+    fused_steps = np.abs(np.diff(fused))
+    print(f"Raw goal distance step:      median {np.median(raw_steps):.2f} m, max {raw_steps.max():.1f} m")
+    print(f"Fused goal distance step:    median {np.median(fused_steps):.2f} m, max {fused_steps.max():.1f} m")
+    print(f"Final position sigma:        {results[-1][1].position_sigma_m:.1f} m")
+    print(f"Final heading:               {results[-1][1].heading_deg:.0f}° "
+          f"(± {results[-1][1].heading_sigma_deg:.0f}°)")
@@ -0,0 +1,275 @@
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_LOG_DIR = Path.cwd() / "logs"
+LOG_NAME = "navigation"
+
+
+class NavigationLogger:
+    """
+    Buffered JSON-lines telemetry for navigation.
+
+    The navigation loop only puts small dicts on a queue; a background thread
+    batches them into logs/navigation.jsonl, flushing every few seconds, and
+    rotates the file by size (navigation.1.jsonl is the previous one, etc.).
+
+    Record types ("type" field):
+        start  - destination and the route waypoints
+        route  - new waypoints after a reroute
+        step   - one guidance decision (raw fix, filtered position, bearings)
+        event  - free text (corners, arrival, errors)
+        end    - navigation finished or cancelled
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_LOG_DIR,
+        max_bytes=1_000_000,
+        backups=5,
+        flush_interval_s=2.0,
+        batch_size=64,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+
+        self.queue = queue.SimpleQueue()
+        self.writer_thread = None
+        self.file = None
+        self.dropped = 0
+
+    @property
+    def path(self):
+        return self.directory / f"{LOG_NAME}.jsonl"
+
+    def start(self):
+        if self.writer_thread is not None and self.writer_thread.is_alive():
+            return
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+
+    # ------------------------------------------------------------------
+    # Producer side (navigation thread): never blocks on disk
+    # ------------------------------------------------------------------
+    def log(self, record_type, **fields):
+        fields["type"] = record_type
+        fields["t"] = round(time.time(), 3)
+        self.queue.put(fields)
+
+    def event(self, message):
+        """Text event, also printed to the console."""
+        print(f"[Navigation] {message}")
+        self.log("event", message=message)
+
+    def close(self, timeout=2.0):
+        """Flushes pending records and stops the writer thread."""
+        self.queue.put(None)
+        if self.writer_thread is not None:
+            self.writer_thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self.file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = self.directory / f"{LOG_NAME}.{index}.jsonl"
+            if older.exists():
+                older.replace(self.directory / f"{LOG_NAME}.{index + 1}.jsonl")
+        self.path.replace(self.directory / f"{LOG_NAME}.1.jsonl")
+        self._open()
+
+    def _write(self, batch):
+        try:
+            if self.file is None:
+                self._open()
+            self.file.write(
+                "".join(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                    for record in batch
+                )
+            )
+            self.file.flush()
+            if self.file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            # A full or read-only SD card must not stop navigation
+            self.dropped += len(batch)
+            print(f"[NavigationLogger] Write failed, {len(batch)} records dropped: {e}")
+
+    def _writer_loop(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            timeout = max(deadline - time.monotonic(), 0.0)
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = False
+
+            if record is None:
+                if batch:
+                    self._write(batch)
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                return
+            if record is not False:
+                batch.append(record)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    self._write(batch)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval_s
+
+
+# ----------------------------------------------------------------------
+# Reader / replay tools
+# ----------------------------------------------------------------------
+def read_records(directory=DEFAULT_LOG_DIR):
+    """All records, oldest first, across the rotated files."""
+    directory = Path(directory)
+    files = sorted(
+        directory.glob(f"{LOG_NAME}.*.jsonl"),
+        key=lambda p: int(p.name.split(".")[1]),
+        reverse=True,
+    )
+    if (directory / f"{LOG_NAME}.jsonl").exists():
+        files.append(directory / f"{LOG_NAME}.jsonl")
+
+    records = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def split_trips(records):
+    """Groups records into trips, each starting at a "start" record."""
+    trips = []
+    for record in records:
+        if record["type"] == "start":
+            trips.append([record])
+        elif trips:
+            trips[-1].append(record)
+    return trips
+
+
+def _record_fix(record):
+    """The GPS fix logged in a step record (fix_t is missing in old logs)."""
+    from src.drivers.gps_driver import GpsFix
+
+    hdop = record.get("hdop", 1.0)
+    return GpsFix(
+        timestamp=record.get("fix_t", record["t"]),
+        latitude=record["raw_lat"],
+        longitude=record["raw_lon"],
+        has_fix=True,
+        fix_quality=1,
+        fix_type=3,
+        satellites=record.get("sats", 0),
+        hdop=hdop,
+        pdop=hdop,
+        vdop=hdop,
+        altitude=0.0,
+        speed_mps=record.get("speed", 0.0),
+        course_deg=record.get("course"),
+    )
+
+
+def _new_fixes(trip):
+    """
+    (step_record, fix or None) per step with a raw position. Steps are
+    logged on every guidance decision, so several can carry the same fix;
+    only the first one with a given fix_t returns it.
+    """
+    last_fix_t = None
+    for record in trip:
+        if record["type"] != "step" or record.get("raw_lat") is None:
+            continue
+        fix_t = record.get("fix_t")
+        if fix_t is not None and fix_t == last_fix_t:
+            yield record, None
+            continue
+        last_fix_t = fix_t
+        yield record, _record_fix(record)
+
+
+def trip_fixes(trip):
+    """Raw GPS fixes and compass headings of a trip, for re-running the filter."""
+    return [
+        (fix, record.get("compass")) for record, fix in _new_fixes(trip) if fix is not None
+    ]
+
+
+def replay_trip(trip):
+    """
+    Re-runs a recorded trip through the fusion filter and route tracker.
+    Yields (step_record, NavigationEstimate, RouteState) per logged step;
+    each GPS fix reaches the filter once, however many steps logged it.
+    """
+    from src.core.navigation_filter import NavigationFilter
+    from src.core.route_progress import RouteProgress
+
+    nav_filter = NavigationFilter()
+    tracker = None
+    fixes = dict((id(record), fix) for record, fix in _new_fixes(trip))
+    for record in trip:
+        if record["type"] in ("start", "route"):
+            waypoints = record.get("waypoints") or []
+            origin = record.get("origin")
+            if origin:
+                waypoints = [origin] + waypoints
+            tracker = RouteProgress(waypoints, arrival_m=30.0) if waypoints else None
+        elif id(record) in fixes:
+            fix = fixes[id(record)]
+            compass = record.get("compass")
+            nav_filter.update_compass(compass, compass is not None, timestamp=record["t"])
+            if fix is not None:
+                nav_filter.update_gps(fix)
+            estimate = nav_filter.estimate()
+            state = None
+            if tracker is not None and estimate is not None:
+                state = tracker.update(estimate.latitude, estimate.longitude, now=record["t"])
+            yield record, estimate, state
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m src.core.navigation_logger [logs_dir] [trip_number]
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOG_DIR
+    trips = split_trips(read_records(directory))
+    if not trips:
+        print(f"No trips found in {directory}")
+        sys.exit(0)
+
+    if len(sys.argv) < 3:
+        for number, trip in enumerate(trips):
+            start = trip[0]
+            steps = sum(1 for r in trip if r["type"] == "step")
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(start["t"]))
+            print(f"{number}: {when} -> {start.get('destination')} ({steps} steps)")
+        sys.exit(0)
+
+    trip = trips[int(sys.argv[2])]
+    for record, estimate, state in replay_trip(trip):
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record['t']))} "
+        line += f"logged {record.get('instruction', ''):30s}"
+        if state is not None:
+            line += f" replay remaining {state.remaining_m:6.1f} m xtrack {state.cross_track_m:+5.1f} m"
+        print(line)
@@ -12,9 +12,6 @@ from src.core.priority_queue import AudioPriorityQueue
 base_path = Path.cwd()
 translations_path = str(base_path / "assets" / "translations.json")
 
-with open(translations_path, "r") as f:
-    translations = json.load(f)
-
 
 class ObjectDetector:
     def __init__(
@@ -27,6 +24,9 @@ class ObjectDetector:
         self.video_h = video_h
         self.raw_detections = []
 
+        with open(translations_path, "r") as f:
+            self.translations = json.load(f)
+
         self.detection_history = collections.deque(maxlen=5)
 
         tracker_args = SimpleNamespace(
@@ -183,7 +183,7 @@ class ObjectDetector:
                     continue
 
                 name, bbox, score = best_det
-                translated_name = translations.get(name, name)
+                translated_name = self.translations.get(name, name)
                 hour = round(
                     9 + (((track.tlbr[0] + track.tlbr[2]) / 2) / self.video_w * 6)
                 )
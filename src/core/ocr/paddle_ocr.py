@@ -6,16 +6,9 @@ import time
 import re
 import queue
 import threading
-import requests
-from dotenv import load_dotenv
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from loguru import logger
-from PIL import Image
-import easyocr
-import google.genai as genai
-
-# Load environment variables
-load_dotenv()
 
 # Clean path configuration with pathlib
 current_dir = Path(__file__).resolve().parent
@@ -23,7 +16,10 @@ sys.path.append(str(current_dir.parent))
 sys.path.append(str(current_dir.parent.parent))
 
 from common.hailo_inference import HailoInfer
+from src.core.connectivity_monitor import ConnectivityMonitor
 from src.core.ocr.paddle_ocr_utils import det_postprocess
+from src.core.ocr.text_cache import TextCache
+from src.core.ocr.text_recognizer import TextRecognizer
 from src.drivers.camera_driver import CameraDriver
 from src.core.priority_queue import AudioPriorityQueue
 
@@ -34,10 +30,29 @@ class OCR:
     and EasyOCR for offline fallback & continuous sign reading.
     """
 
+    CLOUD_BUDGET_S = 8.0  # Longest wait for Gemini, from the start of a read
+    LOCAL_MIN_CONFIDENCE = 0.5  # EasyOCR answers below this wait for Gemini
+
     # ADD AUDIO_QUEUE TO INIT
     def __init__(
-        self, camera_driver, audio_queue=None, det_model_path="assets/ocr_det.hef"
+        self,
+        camera_driver,
+        audio_queue=None,
+        det_model_path="assets/ocr_det.hef",
+        connectivity=None,
     ):
+        """
+        connectivity: shared ConnectivityMonitor; one is started if None.
+        """
+        # Heavy optional dependencies are imported here rather than at module
+        # level so importing this module (and main.py) stays cheap
+        import easyocr
+        import google.genai as genai
+        from dotenv import load_dotenv
+
+        # Load environment variables
+        load_dotenv()
+
         self.det_model_path = det_model_path
         self.camera_driver = camera_driver
         self.audio_queue = audio_queue
@@ -45,6 +60,15 @@ class OCR:
         # ANTI-CRASH SYSTEM (MUTEX) FOR CAMERA
         self.camera_lock = threading.Lock()
 
+        if connectivity is None:
+            connectivity = ConnectivityMonitor()
+            connectivity.start()
+        self.connectivity = connectivity
+        # Local and cloud reading race each other
+        self.race_executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="ocr-race"
+        )
+
         # Continuous Sign Reading Mode variables
         self.continuous_mode = False
         self.last_continuous_read = 0.0
@@ -62,13 +86,20 @@ class OCR:
 
         logger.info("[OCR] Loading EasyOCR (Spanish) model on CPU...")
         self.reader = easyocr.Reader(["es", "en"], gpu=False)
+        # Recognition only: the regions come from the Hailo text detector
+        self.recognizer = TextRecognizer(self.reader)
+        # Continuous mode: skips signs it has just read and does not repeat them
+        self.text_cache = TextCache()
         logger.info("[OCR] EasyOCR ready.")
 
         logger.info("[OCR] Preparing Gemini API engine...")
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             logger.warning("[OCR] GEMINI_API_KEY not found in environment variables.")
-        self.gemini_client = genai.Client(api_key=api_key)
+        self.gemini_client = genai.Client(
+            api_key=api_key,
+            http_options={"timeout": int(self.CLOUD_BUDGET_S * 1000)},  # ms
+        )
 
         # START THE BACKGROUND THREAD RIGHT HERE
         self.continuous_thread = threading.Thread(
@@ -114,53 +145,37 @@ class OCR:
                     )
 
                     # 3. Look for the largest sign to use as a focus point
-                    max_area = 0
-                    relative_roi = None
-
-                    for box in boxes:
-                        try:
-                            # Calculate the corners of the box
-                            xs = [p[0] for p in box]
-                            ys = [p[1] for p in box]
-                            x_min, x_max = min(xs), max(xs)
-                            y_min, y_max = min(ys), max(ys)
-
-                            area = (x_max - x_min) * (y_max - y_min)
-                            if area > max_area:
-                                max_area = area
-                                # Convert to percentages (0.0 to 1.0) based on Hailo's resolution (640x640)
-                                relative_roi = (
-                                    x_min / self.model_width,
-                                    y_min / self.model_height,
-                                    (x_max - x_min) / self.model_width,
-                                    (y_max - y_min) / self.model_height,
-                                )
-                        except Exception:
-                            pass
+                    frame_h, frame_w = frame_lores.shape[:2]
+                    x, y, w, h = max(boxes, key=lambda b: b[2] * b[3])
+                    # Convert to percentages (0.0 to 1.0) of the lores frame
+                    relative_roi = (x / frame_w, y / frame_h, w / frame_w, h / frame_h)
 
                     # 4. NOW YES: Ask the camera to focus on THAT exact area and capture
                     self.camera_driver.trigger_autofocus(relative_roi=relative_roi)
-                    frame_main = self.camera_driver.capture_array(stream_name="main")
+                    frame_lores, frame_main = self._capture_frames("main")
 
-                    # Detect text again, but now in the perfectly focused HD photo
-                    det_pp_res_hd, _ = self._detect_text(frame_main)
+                    # Detect text again in the focused frame, cropping the HD photo
+                    det_pp_res_hd, _ = self._detect_text(frame_lores, frame_main)
 
+                    # Signs already read are taken from the cache
+                    crops = [c for c in det_pp_res_hd if min(c.shape[:2]) >= 20]
                     found_texts = []
-                    for i, crop in enumerate(det_pp_res_hd):
-                        h, w = crop.shape[:2]
-                        if h < 20 or w < 20:
-                            continue
-                        try:
-                            results = self.reader.readtext(crop, detail=0)
-                            if results:
-                                for txt in results:
-                                    clean_txt = self._clean_text(txt)
-                                    if len(clean_txt) > 2:
-                                        found_texts.append(clean_txt)
-                        except Exception:
-                            pass
-
-                    final_text = " ".join(found_texts)
+                    try:
+                        results = self.text_cache.recognize(
+                            crops, self.recognizer.recognize
+                        )
+                        for txt, _ in results:
+                            clean_txt = self._clean_text(txt)
+                            if len(clean_txt) > 2:
+                                found_texts.append(clean_txt)
+                    except Exception:
+                        pass
+
+                    # Do not repeat signs that were just announced
+                    new_texts = [
+                        t for t in found_texts if self.text_cache.should_announce(t)
+                    ]
+                    final_text = " ".join(new_texts)
 
                     if final_text and self.audio_queue:
                         logger.info(
@@ -170,6 +185,7 @@ class OCR:
                         self.audio_queue.put(
                             AudioPriorityQueue.TEXT_RECOGNITION, f"{final_text}"
                         )
+                    if found_texts:
                         # Reset timer
                         self.last_continuous_read = time.time()
 
@@ -182,16 +198,17 @@ class OCR:
                 self.camera_lock.release()
 
     def check_internet(self):
-        try:
-            requests.get("https://8.8.8.8", timeout=2)
-            return True
-        except (requests.ConnectionError, requests.Timeout):
-            return False
+        """Cached state of the connectivity monitor, never blocks."""
+        return self.connectivity.is_online()
 
     def preprocess_image(self, frame):
-        resized_frame = cv2.resize(
-            frame, (self.model_width, self.model_height), interpolation=cv2.INTER_AREA
-        )
+        resized_frame = frame
+        if frame.shape[:2] != (self.model_height, self.model_width):
+            resized_frame = cv2.resize(
+                frame,
+                (self.model_width, self.model_height),
+                interpolation=cv2.INTER_AREA,
+            )
         rgb_frame = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB)
         return [rgb_frame]
 
@@ -201,7 +218,22 @@ class OCR:
         clean = re.sub(r"\s+", " ", clean).strip()
         return clean
 
-    def _detect_text(self, frame_bgr):
+    def _capture_frames(self, stream_name):
+        """
+        (frame to detect on, frame to crop from). Text is detected on the
+        small lores frame; the boxes are then cropped from `stream_name`
+        captured in the same request.
+        """
+        if stream_name == "lores":
+            frame = self.camera_driver.capture_array(stream_name="lores")
+            return frame, frame
+        return self.camera_driver.capture_arrays(("lores", stream_name))
+
+    def _detect_text(self, frame_bgr, crop_frame=None):
+        """
+        Detects text on frame_bgr. Crops and [x, y, w, h] boxes come from
+        crop_frame (default frame_bgr), a larger frame of the same view.
+        """
         if self.detector_hailo is None:
             return [], []
         preprocessed_batch = self.preprocess_image(frame_bgr)
@@ -222,11 +254,13 @@ class OCR:
             return [], []
         raw_result = hailo_result[0].output().get_buffer()
         det_pp_res, boxes = det_postprocess(
-            raw_result, frame_bgr, self.model_height, self.model_width
+            raw_result, frame_bgr, self.model_height, self.model_width, crop_frame
         )
         return det_pp_res, boxes
 
     def _read_with_gemini(self, frame):
+        from PIL import Image
+
         try:
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             img_pil = Image.fromarray(rgb_frame)
@@ -240,9 +274,15 @@ class OCR:
             response = self.gemini_client.models.generate_content(
                 model="gemini-2.5-flash", contents=[prompt, img_pil]
             )
+            self.connectivity.report_success()
             return response.text.strip()
         except Exception as e:
             logger.error(f"[OCR] Error en Gemini API: {e}")
+            # Connection errors and timeouts (httpx) mean the link is down,
+            # not that the request was wrong
+            name = type(e).__name__
+            if "Connect" in name or "Timeout" in name:
+                self.connectivity.report_failure()
             return None
 
     def capture_and_read(self, stream_name="main"):
@@ -255,12 +295,12 @@ class OCR:
             for attempt in range(max_attempts):
                 logger.info(f"[OCR] Capture attempt {attempt + 1} of {max_attempts}...")
                 self.camera_driver.trigger_autofocus()
-                frame = self.camera_driver.capture_array(stream_name=stream_name)
+                frame_lores, frame = self._capture_frames(stream_name)
 
                 if frame is None:
                     continue
 
-                det_pp_res, boxes = self._detect_text(frame)
+                det_pp_res, boxes = self._detect_text(frame_lores, frame)
                 if len(det_pp_res) > 0:
                     logger.info(f"[OCR] Text detected! ({len(det_pp_res)} zones).")
                     cv2.imwrite("assets/captured_ocr.jpg", frame)
@@ -271,24 +311,65 @@ class OCR:
             return "No encontré ningún texto en la imagen. Intenta de nuevo."
 
     def read_text(self, frame_bgr, det_pp_res, boxes):
+        """
+        Offline first: EasyOCR starts at once on the detected regions. When
+        the connectivity monitor says we are online, Gemini reads the full
+        photo at the same time and the first answer that meets its quality
+        bar is spoken. Gemini is never waited for longer than
+        CLOUD_BUDGET_S.
+        """
         start_time = time.time()
+        local = self.race_executor.submit(self._read_locally, det_pp_res, boxes)
+        cloud = None
         if self.check_internet():
-            logger.info("[OCR] Wi-Fi detected. Processing full photo with Gemini...")
-            gemini_text = self._read_with_gemini(frame_bgr)
-            if gemini_text:
-                if "ERROR_BORROSO" in gemini_text:
-                    return "El texto está borroso. Por favor, centra bien el documento frente a la cámara y vuelve a intentarlo."
-                logger.info(
-                    f"[OCR] Gemini finished in {time.time() - start_time:.2f} seconds."
-                )
-                return gemini_text
-            logger.warning(
-                "[OCR] Gemini failed or returned empty. Falling back to EasyOCR..."
-            )
+            logger.info("[OCR] Wi-Fi detected. Racing Gemini against EasyOCR...")
+            cloud = self.race_executor.submit(self._read_with_gemini, frame_bgr)
         else:
             logger.warning("[OCR] No Wi-Fi. Processing in Offline mode with EasyOCR...")
 
+        deadline = time.monotonic() + self.CLOUD_BUDGET_S
+        pending = {f for f in (local, cloud) if f is not None}
+        local_text = None
+        blurry = False
+        while pending:
+            if local in pending:
+                timeout = None  # Local OCR always finishes; only the cloud has a budget
+            else:
+                timeout = max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning("[OCR] Gemini over its latency budget, not waiting.")
+                break
+
+            if cloud in done:
+                gemini_text = cloud.result()
+                if gemini_text and "ERROR_BORROSO" not in gemini_text:
+                    elapsed = time.time() - start_time
+                    logger.info(f"[OCR] Gemini finished in {elapsed:.2f} seconds.")
+                    return gemini_text
+                blurry = bool(gemini_text)
+                if not gemini_text:
+                    logger.warning("[OCR] Gemini failed or returned empty.")
+
+            if local in done:
+                local_text, confidence = local.result()
+                logger.info(
+                    f"[OCR] EasyOCR finished in {time.time() - start_time:.2f} seconds "
+                    f"(confidence {confidence:.2f})."
+                )
+                if local_text and confidence >= self.LOCAL_MIN_CONFIDENCE:
+                    return local_text
+
+        # Neither met its bar: Gemini's verdict on the whole photo, else a
+        # low-confidence local reading beats nothing
+        if blurry:
+            return "El texto está borroso. Por favor, centra bien el documento frente a la cámara y vuelve a intentarlo."
+        return local_text if local_text else "Hubo un error al leer el texto"
+
+    def _read_locally(self, det_pp_res, boxes):
+        """EasyOCR on the detected regions: (text, mean confidence)."""
         found_texts = []
+        confidences = []
         positioned_crops = []
         for i, crop in enumerate(det_pp_res):
             box = boxes[i]
@@ -302,28 +383,26 @@ class OCR:
             positioned_crops, key=lambda c: (round(c["y"] / 20), c["x"])
         )
 
-        for item in sorted_crops:
-            crop = item["crop"]
-            h, w = crop.shape[:2]
-            if h < 15 or w < 15:
-                continue
-            try:
-                results = self.reader.readtext(crop, detail=0)
-                if results:
-                    for txt in results:
-                        clean_txt = self._clean_text(txt)
-                        if len(clean_txt) > 2:
-                            found_texts.append(clean_txt)
-                            logger.info(f"Text read: '{clean_txt}'")
-            except Exception as e:
-                logger.error(f"[OCR] Error with EasyOCR: {e}")
+        # All the regions go to the recognizer as one batch, in reading order
+        try:
+            results = self.recognizer.recognize(
+                [item["crop"] for item in sorted_crops], min_size=15
+            )
+            for txt, confidence in results:
+                clean_txt = self._clean_text(txt)
+                if len(clean_txt) > 2:
+                    found_texts.append(clean_txt)
+                    confidences.append(confidence)
+                    logger.info(f"Text read: '{clean_txt}'")
+        except Exception as e:
+            logger.error(f"[OCR] Error with EasyOCR: {e}")
 
         final_text = ", ".join(found_texts)
-        logger.info(
-            f"[OCR] EasyOCR finished in {time.time() - start_time:.2f} seconds."
-        )
-        return final_text if final_text else "Hubo un error al leer el texto"
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return final_text, confidence
 
     def close(self):
+        self.race_executor.shutdown(wait=False)
+        self.recognizer.close()
         if self.detector_hailo:
             self.detector_hailo.close()
@@ -0,0 +1,219 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def dhash(crop, size=8, flat=0.05):
+    """
+    128-bit difference hash of an image, as 16 bytes: the crop is reduced
+    to small grey thumbnails and each bit says whether a pixel is brighter
+    than its right neighbour (first 64 bits) or the one below (last 64).
+    Small shifts, blur and exposure changes keep most bits, so
+    near-duplicate crops are a few bits apart. The vertical half tells
+    apart words whose letters only differ in height, which a plain 64-bit
+    dHash of a text line often cannot.
+
+    Signs have large flat areas where neighbours differ only by noise, so
+    differences below `flat` (fraction of the thumbnail's contrast) count
+    as 0 instead of flipping at random between frames.
+    """
+    if crop.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if crop.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        crop = cv2.cvtColor(crop, code)
+    grey = crop.astype(np.float32)
+    wide = cv2.resize(grey, (size + 1, size), interpolation=cv2.INTER_AREA)
+    tall = cv2.resize(grey, (size, size + 1), interpolation=cv2.INTER_AREA)
+    tolerance = flat * (float(wide.max()) - float(wide.min()))
+    bits = np.concatenate(
+        [
+            (wide[:, 1:] - wide[:, :-1] > tolerance).ravel(),
+            (tall[1:, :] - tall[:-1, :] > tolerance).ravel(),
+        ]
+    )
+    return np.packbits(bits).tobytes()
+
+
+def hamming_distances(fingerprint, fingerprints):
+    """Popcount of fingerprint XOR each row of `fingerprints` (N x 16 uint8)."""
+    xor = np.bitwise_xor(fingerprints, np.frombuffer(fingerprint, dtype=np.uint8))
+    return np.unpackbits(xor, axis=1).sum(axis=1)
+
+
+class TextCache:
+    """
+    Recognized text of sign crops, keyed by perceptual hash.
+
+    While the user walks past a storefront, continuous mode detects the
+    same sign every few seconds. Crops whose dHash is within
+    `max_distance` bits of a cached one (and with a similar aspect ratio,
+    so a short word cannot match a long line) reuse its text without
+    running the recognizer. The cache is a bounded LRU; lookups compare
+    against all entries at once with a vectorized popcount.
+
+    It also remembers what was said recently, so the same text is not
+    announced again within `repeat_after_s`.
+    """
+
+    def __init__(self, max_entries=256, max_distance=8, repeat_after_s=60.0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.repeat_after_s = repeat_after_s
+        self.lock = threading.Lock()
+
+        self.entries = OrderedDict()  # fingerprint -> (aspect, text), LRU order
+        self.fingerprints = np.zeros((0, 16), dtype=np.uint8)  # Rebuilt lazily
+        self.aspects = np.zeros(0, dtype=np.float32)
+        self.index_dirty = False
+
+        self.announced = {}  # normalized text -> last time it was said
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, crop):
+        """Cached text for a near-duplicate crop, else None."""
+        fingerprint, aspect = dhash(crop), self._aspect(crop)
+        with self.lock:
+            key = self._find(fingerprint, aspect)
+            if key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][1]
+
+    def put(self, crop, text):
+        fingerprint = dhash(crop)
+        with self.lock:
+            self.entries[fingerprint] = (self._aspect(crop), text)
+            self.entries.move_to_end(fingerprint)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.index_dirty = True
+
+    def recognize(self, crops, recognize):
+        """
+        Texts for `crops`: cached ones are reused and only the misses go to
+        recognize(crops) -> [(text, confidence)], in a single call.
+        """
+        results = [None] * len(crops)
+        misses = []
+        for i, crop in enumerate(crops):
+            text = self.lookup(crop)
+            if text is None:
+                misses.append(i)
+            else:
+                results[i] = (text, 1.0)
+
+        if misses:
+            recognized = recognize([crops[i] for i in misses])
+            for i, (text, confidence) in zip(misses, recognized):
+                results[i] = (text, confidence)
+                if text:  # Unreadable crops may read fine once focused
+                    self.put(crops[i], text)
+        return results
+
+    def should_announce(self, text, now=None):
+        """False if the same text was announced less than repeat_after_s ago."""
+        now = time.monotonic() if now is None else now
+        key = re.sub(r"\W+", " ", text).strip().lower()
+        with self.lock:
+            last = self.announced.get(key)
+            if last is not None and now - last < self.repeat_after_s:
+                return False
+            self.announced[key] = now
+            # Forget what is old enough to be said again
+            expired = [
+                k for k, t in self.announced.items() if now - t >= self.repeat_after_s
+            ]
+            for old in expired:
+                del self.announced[old]
+            return True
+
+    def _find(self, fingerprint, aspect):
+        # Caller holds self.lock
+        if fingerprint in self.entries:
+            return fingerprint
+        if not self.entries:
+            return None
+        if self.index_dirty:
+            self.fingerprints = np.frombuffer(
+                b"".join(self.entries.keys()), dtype=np.uint8
+            ).reshape(-1, 16)
+            self.aspects = np.array(
+                [a for a, _ in self.entries.values()], dtype=np.float32
+            )
+            self.index_dirty = False
+
+        distances = hamming_distances(fingerprint, self.fingerprints)
+        similar_shape = np.abs(np.log(self.aspects / aspect)) < 0.2
+        candidates = np.flatnonzero((distances <= self.max_distance) & similar_shape)
+        if len(candidates) == 0:
+            return None
+        best = candidates[np.argmin(distances[candidates])]
+        return self.fingerprints[best].tobytes()
+
+    @staticmethod
+    def _aspect(crop):
+        h, w = crop.shape[:2]
+        return w / max(h, 1)
+
+
+if __name__ == "__main__":
+    # Hit rate on a sign seen from slightly different positions, and the
+    # cost of a lookup against a full cache:
+    #   python -m src.core.ocr.text_cache
+    rng = np.random.default_rng(0)
+
+    def sign(text, shift=0, brightness=0):
+        # Sized to the text, like the boxes of the text detector
+        (w, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.4, 3)
+        crop = np.full((60, w + 20, 3), 230, dtype=np.uint8)
+        cv2.putText(
+            crop, text, (10 + shift, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (20, 20, 20), 3
+        )
+        noise = rng.normal(0, 4, crop.shape)
+        return np.clip(crop.astype(np.float32) + noise + brightness, 0, 255).astype(
+            np.uint8
+        )
+
+    cache = TextCache()
+    calls = []
+
+    def fake_recognize(crops):
+        calls.append(len(crops))
+        return [("FARMACIA", 0.9)] * len(crops)
+
+    for step in range(10):
+        crop = sign("FARMACIA", shift=step % 3, brightness=(step % 4) * 5)
+        cache.recognize([crop], fake_recognize)
+    other = sign("PANADERIA")
+    print(f"FARMACIA x10: {sum(calls)} recognitions, {cache.hits} cache hits")
+    print(f"PANADERIA found in cache: {cache.lookup(other) is not None}")
+
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    stores = set()
+    while len(stores) < cache.max_entries:
+        stores.add("".join(rng.choice(list(letters), rng.integers(4, 12))))
+    for text in stores:
+        cache.put(sign(text), text)
+    found = [(text, cache.lookup(sign(text, shift=1))) for text in stores]
+    right = sum(cached == text for text, cached in found)
+    wrong = sum(cached not in (None, text) for text, cached in found)
+    print(f"{len(stores)} signs seen again: {right} from the cache, {wrong} wrong")
+
+    start = time.perf_counter()
+    for _ in range(200):
+        cache.lookup(other)
+    print(
+        f"lookup in a full cache ({len(cache.entries)} entries): "
+        f"{(time.perf_counter() - start) / 200 * 1e6:.0f} us"
+    )
+    print(
+        "announce FARMACIA twice:",
+        cache.should_announce("FARMACIA"),
+        cache.should_announce("Farmacia."),
+    )
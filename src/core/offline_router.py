@@ -0,0 +1,388 @@
+import heapq
+import math
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEG_LAT = 111320.0
+DEFAULT_GRAPH_DIR = Path.cwd() / "assets" / "osm_graph"
+# Snapping grid cell, in degrees (about 220 m of latitude)
+GRID_CELL_DEG = 0.002
+# The A* heuristic is computed for blocks of 2^8 consecutive node ids
+HEURISTIC_BLOCK_BITS = 8
+
+# Highways a pedestrian can use. Motorways, trunks and their ramps are left
+# out on purpose; everything else can be walked along its sidewalk.
+WALKABLE_HIGHWAYS = {
+    "footway",
+    "pedestrian",
+    "path",
+    "steps",
+    "living_street",
+    "residential",
+    "service",
+    "unclassified",
+    "tertiary",
+    "tertiary_link",
+    "secondary",
+    "secondary_link",
+    "primary",
+    "primary_link",
+    "track",
+    "cycleway",
+    "road",
+    "corridor",
+}
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in metres (accepts arrays)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def _is_walkable(tags):
+    if tags.get("highway") not in WALKABLE_HIGHWAYS:
+        return False
+    if tags.get("foot") in ("no", "private"):
+        return False
+    if tags.get("access") in ("no", "private") and tags.get("foot") not in (
+        "yes",
+        "designated",
+        "permissive",
+    ):
+        return False
+    return True
+
+
+def _cell_keys(rows, cols):
+    # One sortable integer per cell; within a row, columns stay contiguous
+    return np.asarray(rows, dtype=np.int64) * 1_000_000 + np.asarray(cols, dtype=np.int64)
+
+
+def build_grid(coords, cell_deg=GRID_CELL_DEG):
+    """
+    Bucket index of the nodes for snapping: (keys, starts, nodes), where
+    nodes[starts[i]:starts[i + 1]] are the nodes of the cell keys[i].
+    """
+    rows = np.floor(coords[:, 0] / cell_deg).astype(np.int64)
+    cols = np.floor(coords[:, 1] / cell_deg).astype(np.int64)
+    cell = _cell_keys(rows, cols)
+    order = np.argsort(cell, kind="stable")
+    keys, counts = np.unique(cell[order], return_counts=True)
+    starts = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+    return keys, starts, order.astype(np.int32)
+
+
+def build_graph(osm_path, out_dir=DEFAULT_GRAPH_DIR):
+    """
+    Imports an OpenStreetMap XML extract (.osm) into a pedestrian graph.
+
+    Two streaming passes keep memory bounded: the first collects walkable
+    ways, the second only the coordinates of the nodes they reference. The
+    graph is written as CSR arrays (.npy) that OfflineRouter memory-maps.
+    """
+    start = time.perf_counter()
+
+    # Pass 1: walkable ways as lists of OSM node ids
+    ways = []
+    for _, element in ET.iterparse(osm_path, events=("end",)):
+        if element.tag == "way":
+            tags = {t.get("k"): t.get("v") for t in element.iter("tag")}
+            if _is_walkable(tags):
+                refs = [int(nd.get("ref")) for nd in element.iter("nd")]
+                if len(refs) > 1:
+                    ways.append(refs)
+            element.clear()
+        elif element.tag in ("node", "relation"):
+            element.clear()
+
+    used = {ref for refs in ways for ref in refs}
+
+    # Pass 2: coordinates of the referenced nodes, compacted to 0..N-1
+    index_of = {}
+    coords = []
+    for _, element in ET.iterparse(osm_path, events=("end",)):
+        if element.tag == "node":
+            osm_id = int(element.get("id"))
+            if osm_id in used:
+                index_of[osm_id] = len(coords)
+                coords.append((float(element.get("lat")), float(element.get("lon"))))
+        if element.tag in ("node", "way", "relation"):
+            element.clear()
+
+    coords = np.array(coords, dtype=np.float64).reshape(-1, 2)
+
+    # Undirected edges between consecutive nodes of every way
+    src, dst = [], []
+    for refs in ways:
+        ids = [index_of[r] for r in refs if r in index_of]
+        src.extend(ids[:-1])
+        dst.extend(ids[1:])
+    src = np.array(src, dtype=np.int64)
+    dst = np.array(dst, dtype=np.int64)
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+
+    weights = haversine_m(
+        coords[src, 0], coords[src, 1], coords[dst, 0], coords[dst, 1]
+    ).astype(np.float32)
+
+    # CSR: sort edges by source node
+    order = np.argsort(src, kind="stable")
+    indices = dst[order].astype(np.int32)
+    weights = weights[order]
+    indptr = np.zeros(len(coords) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(coords)), out=indptr[1:])
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "coords.npy", coords)
+    np.save(out_dir / "indptr.npy", indptr)
+    np.save(out_dir / "indices.npy", indices)
+    np.save(out_dir / "weights.npy", weights)
+    grid_keys, grid_starts, grid_nodes = build_grid(coords)
+    np.save(out_dir / "grid_keys.npy", grid_keys)
+    np.save(out_dir / "grid_starts.npy", grid_starts)
+    np.save(out_dir / "grid_nodes.npy", grid_nodes)
+
+    print(
+        f"[OfflineRouter] Graph built: {len(coords)} nodes, {len(indices)} edges "
+        f"in {time.perf_counter() - start:.1f}s -> {out_dir}"
+    )
+    return out_dir
+
+
+class OfflineRouter:
+    """
+    Walking routes over the local OSM graph, without network access.
+
+    Arrays are memory-mapped, so startup is instant. Origin and destination
+    are snapped through a grid index of the nodes, and A* computes its
+    haversine heuristic only for the nodes it reaches, so a query reads the
+    pages of the explored area instead of the whole graph. The heuristic
+    is admissible because no path is shorter than the great-circle distance.
+    """
+
+    def __init__(self, graph_dir=DEFAULT_GRAPH_DIR, max_snap_m=150.0):
+        """max_snap_m: origin/destination farther than this from the graph fail."""
+        graph_dir = Path(graph_dir)
+        self.coords = np.load(graph_dir / "coords.npy", mmap_mode="r")
+        self.indptr = np.load(graph_dir / "indptr.npy", mmap_mode="r")
+        self.indices = np.load(graph_dir / "indices.npy", mmap_mode="r")
+        self.weights = np.load(graph_dir / "weights.npy", mmap_mode="r")
+        if (graph_dir / "grid_keys.npy").exists():
+            self.grid_keys = np.load(graph_dir / "grid_keys.npy", mmap_mode="r")
+            self.grid_starts = np.load(graph_dir / "grid_starts.npy", mmap_mode="r")
+            self.grid_nodes = np.load(graph_dir / "grid_nodes.npy", mmap_mode="r")
+        else:
+            # Graphs built before the grid index existed: index them in RAM
+            self.grid_keys, self.grid_starts, self.grid_nodes = build_grid(
+                np.asarray(self.coords)
+            )
+        self.max_snap_m = max_snap_m
+        self.last_route_ms = 0.0
+        print(f"[OfflineRouter] Graph loaded: {len(self.coords)} nodes.")
+
+    @classmethod
+    def load_if_available(cls, graph_dir=DEFAULT_GRAPH_DIR):
+        """Returns a router, or None if no graph has been built."""
+        if not (Path(graph_dir) / "coords.npy").exists():
+            return None
+        try:
+            return cls(graph_dir)
+        except Exception as e:
+            print(f"[OfflineRouter] Could not load graph: {e}")
+            return None
+
+    def nearest_node(self, lat, lon):
+        """Index and distance (m) of the graph node closest to a position."""
+        candidates = self._grid_candidates(lat, lon, self.max_snap_m)
+        if len(candidates) == 0:
+            # Nothing within snapping range: full scan, the caller will
+            # reject the distance anyway
+            candidates = np.arange(len(self.coords))
+        # Equirectangular distance is exact enough at snapping range
+        points = self.coords[candidates]
+        d_lat = points[:, 0] - lat
+        d_lon = (points[:, 1] - lon) * math.cos(math.radians(lat))
+        index = int(candidates[np.argmin(d_lat * d_lat + d_lon * d_lon)])
+        node_lat, node_lon = self.coords[index]
+        return index, float(haversine_m(lat, lon, node_lat, node_lon))
+
+    def _grid_candidates(self, lat, lon, radius_m):
+        """Nodes of the grid cells that cover radius_m around a position."""
+        cell_m = GRID_CELL_DEG * METERS_PER_DEG_LAT
+        reach_rows = math.ceil(radius_m / cell_m)
+        reach_cols = math.ceil(
+            radius_m / (cell_m * max(math.cos(math.radians(lat)), 0.01))
+        )
+        row = math.floor(lat / GRID_CELL_DEG)
+        col = math.floor(lon / GRID_CELL_DEG)
+
+        chunks = []
+        for r in range(row - reach_rows, row + reach_rows + 1):
+            first, last = _cell_keys(
+                [r, r], [col - reach_cols, col + reach_cols]
+            ).tolist()
+            lo = int(np.searchsorted(self.grid_keys, first, side="left"))
+            hi = int(np.searchsorted(self.grid_keys, last, side="right"))
+            if lo < hi:
+                chunks.append(
+                    self.grid_nodes[int(self.grid_starts[lo]) : int(self.grid_starts[hi])]
+                )
+        if not chunks:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(chunks).astype(np.int64)
+
+    def route(self, origin_lat, origin_lon, dest_lat, dest_lon):
+        """
+        Shortest walking route as [[lat, lon], ...] ending at the destination,
+        the same shape as a decoded Google polyline. None if there is none.
+        """
+        start_time = time.perf_counter()
+
+        source, source_gap = self.nearest_node(origin_lat, origin_lon)
+        target, target_gap = self.nearest_node(dest_lat, dest_lon)
+        if source_gap > self.max_snap_m or target_gap > self.max_snap_m:
+            print("[OfflineRouter] Origin or destination outside the map extract.")
+            return None
+
+        target_lat, target_lon = (float(v) for v in self.coords[target])
+        cos_target = math.cos(math.radians(target_lat))
+
+        blocks = {}
+
+        def heuristic(node):
+            # Computed lazily, one vectorized block of nearby node ids at a
+            # time, so only the coordinate pages of the explored area are
+            # read. Slightly under the true distance to stay admissible
+            block = node >> HEURISTIC_BLOCK_BITS
+            values = blocks.get(block)
+            if values is None:
+                begin = block << HEURISTIC_BLOCK_BITS
+                points = self.coords[begin : begin + (1 << HEURISTIC_BLOCK_BITS)]
+                d_lat = np.radians(points[:, 0] - target_lat)
+                d_lon = np.radians(points[:, 1] - target_lon) * cos_target
+                values = (
+                    0.995 * EARTH_RADIUS_M * np.sqrt(d_lat * d_lat + d_lon * d_lon)
+                ).tolist()
+                blocks[block] = values
+            return values[node & ((1 << HEURISTIC_BLOCK_BITS) - 1)]
+
+        g_score = {source: 0.0}
+        came_from = {}
+        closed = set()
+        heap = [(heuristic(source), source)]
+
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+
+            begin, end = int(self.indptr[node]), int(self.indptr[node + 1])
+            base = g_score[node]
+            for neighbor, weight in zip(
+                self.indices[begin:end].tolist(), self.weights[begin:end].tolist()
+            ):
+                candidate = base + weight
+                if candidate < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = candidate
+                    came_from[neighbor] = node
+                    heapq.heappush(heap, (candidate + heuristic(neighbor), neighbor))
+        else:
+            self.last_route_ms = (time.perf_counter() - start_time) * 1000.0
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(came_from[path[-1]])
+        path.reverse()
+
+        waypoints = self.coords[path].tolist()
+        waypoints.append([dest_lat, dest_lon])
+        self.last_route_ms = (time.perf_counter() - start_time) * 1000.0
+        return waypoints
+
+
+def _synthetic_osm(path, rows=60, cols=60, spacing_deg=0.0009):
+    """Writes a grid city (about 100 m blocks) as OSM XML for benchmarking."""
+    lat0, lon0 = 8.27, -62.75
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        for r in range(rows):
+            for c in range(cols):
+                f.write(
+                    f'<node id="{r * cols + c + 1}" lat="{lat0 + r * spacing_deg:.7f}" '
+                    f'lon="{lon0 + c * spacing_deg:.7f}"/>\n'
+                )
+        way_id = 1
+        for r in range(rows):
+            refs = "".join(f'<nd ref="{r * cols + c + 1}"/>' for c in range(cols))
+            highway = "motorway" if r == rows // 2 else "residential"
+            f.write(f'<way id="{way_id}">{refs}<tag k="highway" v="{highway}"/></way>\n')
+            way_id += 1
+        for c in range(cols):
+            refs = "".join(f'<nd ref="{r * cols + c + 1}"/>' for r in range(rows))
+            f.write(f'<way id="{way_id}">{refs}<tag k="highway" v="footway"/></way>\n')
+            way_id += 1
+        f.write("</osm>\n")
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    # python -m src.core.offline_router build city.osm [graph_dir]
+    # python -m src.core.offline_router route lat lon lat lon [graph_dir]
+    # Without arguments: benchmark on a synthetic grid city.
+    if len(sys.argv) > 2 and sys.argv[1] == "build":
+        build_graph(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else DEFAULT_GRAPH_DIR)
+        sys.exit(0)
+
+    if len(sys.argv) > 5 and sys.argv[1] == "route":
+        graph_dir = sys.argv[6] if len(sys.argv) > 6 else DEFAULT_GRAPH_DIR
+        router = OfflineRouter(graph_dir)
+        waypoints = router.route(*map(float, sys.argv[2:6]))
+        if waypoints is None:
+            print("No route found.")
+        else:
+            print(f"{len(waypoints)} waypoints in {router.last_route_ms:.1f} ms")
+            for lat, lon in waypoints:
+                print(f"  {lat:.6f}, {lon:.6f}")
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        osm_path = Path(tmp) / "grid.osm"
+        _synthetic_osm(osm_path)
+        router = OfflineRouter(build_graph(osm_path, Path(tmp) / "graph"))
+
+        # A walk across the neighbourhood and one across the whole map
+        for dest_lat, dest_lon in ((8.2795, -62.7405), (8.3225, -62.6975)):
+            timings = []
+            for _ in range(20):
+                waypoints = router.route(8.2705, -62.7495, dest_lat, dest_lon)
+                timings.append(router.last_route_ms)
+            length = sum(
+                haversine_m(a[0], a[1], b[0], b[1])
+                for a, b in zip(waypoints, waypoints[1:])
+            )
+            print(f"Route: {len(waypoints)} waypoints, {length:.0f} m")
+            print(f"A* time: median {np.median(timings):.1f} ms, max {max(timings):.1f} ms")
+
+        start = time.perf_counter()
+        for _ in range(100):
+            router.nearest_node(8.30, -62.72)
+        print(f"Snapping: {(time.perf_counter() - start) * 10:.2f} ms")
@@ -0,0 +1,326 @@
+import json
+import math
+import os
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+ASSETS_DIR = Path.cwd() / "assets"
+FAVORITES_PATH = ASSETS_DIR / "ubication_favorites.json"
+JOURNAL_PATH = ASSETS_DIR / "poi_journal.jsonl"
+OSM_POIS_PATH = ASSETS_DIR / "poi_osm.npz"
+
+FAVORITE = "favorite"
+
+
+class NearbyPlace(NamedTuple):
+    name: str
+    category: str
+    latitude: float
+    longitude: float
+    distance_m: float
+
+
+class PoiStore:
+    """
+    Favorites and imported points of interest with a uniform grid index.
+
+    Coordinates live in flat NumPy arrays (local East/North metres around a
+    fixed origin). Points are bucketed into square cells; the index is the
+    points sorted by cell key plus the start offset of every cell, so a
+    radius query only touches the cells overlapping its bounding box.
+
+    Favorites come from ubication_favorites.json plus an append-only
+    journal: saving a place appends one fsync'ed line instead of rewriting
+    the whole file. The journal is folded back into the JSON (atomically,
+    via a temporary file) when it grows.
+    """
+
+    def __init__(self, cell_m=100.0, origin=(8.2960, -62.7200)):
+        """
+        cell_m: grid cell size; queries are fastest when it is close to the
+            typical search radius.
+        origin: (lat, lon) of the local frame, the user's city centre.
+        """
+        self.cell_m = cell_m
+        self.origin_lat, self.origin_lon = origin
+        self.cos_lat = math.cos(math.radians(self.origin_lat))
+
+        self.names = []
+        self.categories = []
+        self.points = []  # (lat, lon) per row, source for the arrays below
+        self.favorite_index = {}  # name -> row of a favorite
+
+        # Arrays and grid index, rebuilt lazily after insertions
+        self.geo = np.empty((0, 2), dtype=np.float64)  # lat, lon
+        self.xy = np.empty((0, 2), dtype=np.float64)  # east, north (m)
+        self.dirty = True
+        self.order = None
+        self.cell_keys = None
+        self.cell_starts = None
+
+        self.journal_path = None
+        self.journal_lines = 0
+
+    # ------------------------------------------------------------------
+    # Loading and saving
+    # ------------------------------------------------------------------
+    @classmethod
+    def load(
+        cls,
+        favorites_path=FAVORITES_PATH,
+        journal_path=JOURNAL_PATH,
+        osm_path=OSM_POIS_PATH,
+        compact_after=50,
+    ):
+        """Builds the store from the favorites JSON, its journal and OSM POIs."""
+        store = cls()
+        store.favorites_path = Path(favorites_path)
+        store.journal_path = Path(journal_path)
+
+        if store.favorites_path.exists():
+            with open(store.favorites_path, "r", encoding="utf-8") as f:
+                for name, place in json.load(f).items():
+                    store._add(name, FAVORITE, place["lat"], place["lon"])
+
+        if store.journal_path.exists():
+            with open(store.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line after a power cut: ignore it
+                        continue
+                    store._add(entry["name"], FAVORITE, entry["lat"], entry["lon"])
+                    store.journal_lines += 1
+
+        if Path(osm_path).exists():
+            data = np.load(osm_path)
+            for name, category, (lat, lon) in zip(
+                data["names"].tolist(), data["categories"].tolist(), data["coords"]
+            ):
+                store._add(name, category, float(lat), float(lon))
+
+        if store.journal_lines >= compact_after:
+            store.compact()
+
+        print(
+            f"[PoiStore] {len(store.favorite_index)} favorites, "
+            f"{len(store.names) - len(store.favorite_index)} points of interest."
+        )
+        return store
+
+    def _add(self, name, category, lat, lon):
+        if category == FAVORITE and name in self.favorite_index:
+            # Saving an existing name moves it
+            row = self.favorite_index[name]
+            self.points[row] = (lat, lon)
+            self.dirty = True
+            return row
+
+        row = len(self.names)
+        self.names.append(name)
+        self.categories.append(category)
+        self.points.append((lat, lon))
+        if category == FAVORITE:
+            self.favorite_index[name] = row
+        self.dirty = True
+        return row
+
+    def add_favorite(self, name, lat, lon):
+        """Saves a favorite durably with a single appended journal line."""
+        entry = {"name": name, "lat": lat, "lon": lon, "time": time.time()}
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_lines += 1
+        self._add(name, FAVORITE, lat, lon)
+
+    def favorites(self):
+        """Favorites as the {name: {"lat", "lon"}} dict used by Navigation."""
+        return {
+            name: {"lat": self.points[row][0], "lon": self.points[row][1]}
+            for name, row in self.favorite_index.items()
+        }
+
+    def compact(self):
+        """Folds the journal into the favorites JSON with an atomic replace."""
+        tmp_path = self.favorites_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.favorites(), f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.favorites_path)
+        # Only drop the journal once the new JSON is safely in place
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self.journal_lines = 0
+        print("[PoiStore] Journal compacted into the favorites file.")
+
+    # ------------------------------------------------------------------
+    # Spatial index
+    # ------------------------------------------------------------------
+    def _to_local(self, lat, lon):
+        """Local metres; accepts scalars or arrays."""
+        east = np.radians(np.asarray(lon) - self.origin_lon) * EARTH_RADIUS_M * self.cos_lat
+        north = np.radians(np.asarray(lat) - self.origin_lat) * EARTH_RADIUS_M
+        return east, north
+
+    def _cell_key(self, ix, iy):
+        # Both cell coordinates packed into one sortable int64
+        return (iy.astype(np.int64) << 32) + (ix.astype(np.int64) + (1 << 31))
+
+    def _rebuild(self):
+        self.geo = np.array(self.points, dtype=np.float64).reshape(-1, 2)
+        self.xy = np.stack(self._to_local(self.geo[:, 0], self.geo[:, 1]), axis=1)
+        cells = np.floor(self.xy / self.cell_m).astype(np.int64)
+        keys = self._cell_key(cells[:, 0], cells[:, 1])
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        self.cell_keys, self.cell_starts = np.unique(sorted_keys, return_index=True)
+        self.cell_starts = np.append(self.cell_starts, len(sorted_keys))
+        self.dirty = False
+
+    def within_radius(self, lat, lon, radius_m, category=None):
+        """Places within radius_m, closest first, as NearbyPlace tuples."""
+        if not self.names:
+            return []
+        if self.dirty:
+            self._rebuild()
+
+        px, py = (float(v) for v in self._to_local(lat, lon))
+        x0 = math.floor((px - radius_m) / self.cell_m)
+        x1 = math.floor((px + radius_m) / self.cell_m)
+        y0 = math.floor((py - radius_m) / self.cell_m)
+        y1 = math.floor((py + radius_m) / self.cell_m)
+
+        # Candidate rows from every cell in the bounding box
+        ix, iy = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1))
+        wanted = self._cell_key(ix.ravel(), iy.ravel())
+        pos = np.searchsorted(self.cell_keys, wanted)
+        pos = pos[pos < len(self.cell_keys)]
+        pos = pos[np.isin(self.cell_keys[pos], wanted)]
+        if len(pos) == 0:
+            return []
+        rows = np.concatenate(
+            [self.order[self.cell_starts[p] : self.cell_starts[p + 1]] for p in pos]
+        )
+
+        d = np.hypot(self.xy[rows, 0] - px, self.xy[rows, 1] - py)
+        inside = d <= radius_m
+        rows, d = rows[inside], d[inside]
+        ranking = np.argsort(d)
+
+        result = []
+        for row, dist in zip(rows[ranking].tolist(), d[ranking].tolist()):
+            if category is not None and self.categories[row] != category:
+                continue
+            result.append(
+                NearbyPlace(
+                    self.names[row],
+                    self.categories[row],
+                    float(self.geo[row, 0]),
+                    float(self.geo[row, 1]),
+                    dist,
+                )
+            )
+        return result
+
+    def nearest(self, lat, lon, n=3, max_radius_m=2000.0, category=None):
+        """The n closest places, growing the search radius as needed."""
+        radius = min(self.cell_m, max_radius_m)
+        while True:
+            places = self.within_radius(lat, lon, radius, category)
+            if len(places) >= n or radius >= max_radius_m:
+                return places[:n]
+            radius = min(radius * 2.0, max_radius_m)
+
+
+# Tags worth announcing to a pedestrian, mapped to a spoken category
+POI_TAGS = {
+    ("highway", "bus_stop"): "parada de autobús",
+    ("amenity", "pharmacy"): "farmacia",
+    ("amenity", "bank"): "banco",
+    ("amenity", "hospital"): "hospital",
+    ("amenity", "school"): "escuela",
+    ("amenity", "restaurant"): "restaurante",
+    ("amenity", "fuel"): "estación de servicio",
+    ("amenity", "place_of_worship"): "iglesia",
+}
+
+
+def import_osm_pois(osm_path, out_path=OSM_POIS_PATH):
+    """Extracts named shops, amenities and bus stops from an .osm extract."""
+    names, categories, coords = [], [], []
+    for _, element in ET.iterparse(osm_path, events=("end",)):
+        if element.tag == "node":
+            tags = {t.get("k"): t.get("v") for t in element.iter("tag")}
+            name = tags.get("name")
+            category = None
+            for (key, value), spoken in POI_TAGS.items():
+                if tags.get(key) == value:
+                    category = spoken
+                    break
+            if category is None and "shop" in tags:
+                category = "tienda"
+            if name and category:
+                names.append(name)
+                categories.append(category)
+                coords.append((float(element.get("lat")), float(element.get("lon"))))
+        if element.tag in ("node", "way", "relation"):
+            element.clear()
+
+    np.savez(
+        out_path,
+        names=np.array(names, dtype=str),
+        categories=np.array(categories, dtype=str),
+        coords=np.array(coords, dtype=np.float64).reshape(-1, 2),
+    )
+    print(f"[PoiStore] {len(names)} points of interest imported -> {out_path}")
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    # python -m src.core.poi_store import city.osm
+    if len(sys.argv) > 2 and sys.argv[1] == "import":
+        import_osm_pois(sys.argv[2])
+        sys.exit(0)
+
+    # Benchmark: 20,000 random POIs around the city centre
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        rng = np.random.default_rng(0)
+        coords = rng.normal((8.2960, -62.7200), 0.02, (20000, 2))
+        np.savez(
+            tmp / "pois.npz",
+            names=np.array([f"lugar {i}" for i in range(len(coords))]),
+            categories=np.array(["tienda"] * len(coords)),
+            coords=coords,
+        )
+        store = PoiStore.load(
+            FAVORITES_PATH, tmp / "journal.jsonl", tmp / "pois.npz"
+        )
+        store.add_favorite("parada", 8.29790, -62.71700)
+
+        queries = rng.normal((8.2960, -62.7200), 0.02, (1000, 2))
+        store.within_radius(*queries[0], 100.0)  # Builds the index
+        start = time.perf_counter()
+        for lat, lon in queries:
+            store.within_radius(lat, lon, 100.0)
+        radius_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        start = time.perf_counter()
+        for lat, lon in queries:
+            store.nearest(lat, lon, n=5)
+        nearest_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        print(f"Within 100 m: {radius_ms:.3f} ms/query")
+        print(f"Nearest 5:    {nearest_ms:.3f} ms/query")
+        print(f"Near casa:    {store.nearest(8.297861, -62.717013, n=2, category=FAVORITE)}")
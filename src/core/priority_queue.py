@@ -1,6 +1,5 @@
 import queue
-from threading import Lock
-import time
+from threading import Condition, Lock
 
 
 class AudioPriorityQueue:
@@ -32,12 +31,18 @@ class AudioPriorityQueue:
         self.audio_interface = audio_interface
         self.current_priority = float("inf")
         self.lock = Lock()
+        # Signalled whenever a message finishes playing
+        self.idle = Condition(self.lock)
         self.counter = 0  # To preserve FIFO for same priority
+        # Boot benchmark: called once, on the first hazard alert
+        self.on_first_alert = None
+        self.first_alert_sent = False
 
     def play_concurrent(self, message):
         """
         Plays sounds or short voice messages immediately without queuing.
         """
+        self._first_alert()
         if isinstance(message, dict):
             action = message.get("action")
 
@@ -64,6 +69,8 @@ class AudioPriorityQueue:
         """
         Lower number means higher priority (e.g., 1 is higher than 5).
         """
+        if priority < self.VOICE_MENU:
+            self._first_alert()
         with self.lock:
             # If the new message has higher priority than the currently playing one, stop current
             if priority < self.current_priority:
@@ -84,28 +91,45 @@ class AudioPriorityQueue:
     def task_done(self):
         with self.lock:
             self.current_priority = float("inf")
+            self.idle.notify_all()
         self.pq.task_done()
 
+    def _first_alert(self):
+        # Hazards use play_concurrent, or put() above the voice menu
+        if self.first_alert_sent:
+            return
+        self.first_alert_sent = True
+        if self.on_first_alert is not None:
+            try:
+                self.on_first_alert()
+            except Exception as e:
+                print(f"[PriorityQueue] First alert callback failed: {e}")
+
+    def _is_active_or_queued(self, target_priority):
+        # Caller holds self.lock
+        if self.current_priority == target_priority:
+            return True
+
+        # Check the pending queue (pq.queue is a list of tuples: (priority, counter, message))
+        for item in self.pq.queue:
+            if item[0] == target_priority:
+                return True
+
+        return False
+
     def is_priority_active_or_queued(self, target_priority):
         """
         Returns True if the specified priority is currently playing OR waiting in the queue.
         """
         with self.lock:
-            if self.current_priority == target_priority:
-                return True
+            return self._is_active_or_queued(target_priority)
 
-            # Check the pending queue (pq.queue is a list of tuples: (priority, counter, message))
-            for item in self.pq.queue:
-                if item[0] == target_priority:
-                    return True
-
-            return False
-
-    def wait_for_priority(self, target_priority):
+    def wait_for_priority(self, target_priority, timeout=None):
         """
         Blocks until there are no active or queued tasks of the specified priority.
-
+        Returns False if the timeout expired first.
         """
-        # We check in a loop with a small sleep to avoid busy waiting, since the queue doesn't provide a direct way to wait for a specific priority to clear.
-        while self.is_priority_active_or_queued(target_priority):
-            time.sleep(0.05)
+        with self.idle:
+            return self.idle.wait_for(
+                lambda: not self._is_active_or_queued(target_priority), timeout
+            )
@@ -0,0 +1,203 @@
+import math
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class RouteState(NamedTuple):
+    """Where the user is along the route after a position update."""
+
+    segment: int  # Index of the closest segment
+    progress_m: float  # Distance walked along the route
+    remaining_m: float  # Distance left along the route
+    cross_track_m: float  # Signed distance to the route, positive = right of it
+    target_lat: float  # Lookahead point to steer towards
+    target_lon: float
+    next_vertex: int  # Index of the next corner (waypoint)
+    distance_to_vertex_m: float  # Along-route distance to that corner
+    off_route: bool
+    arrived: bool
+
+
+class RouteProgress:
+    """
+    Tracks progress along a list of [lat, lon] waypoints.
+
+    The route is converted once into local East/North metres and stored as
+    segment arrays. Each position update projects the point onto every
+    segment in one vectorized pass, so a skipped corner is simply left behind
+    instead of being steered back to. The user steers towards a point a few
+    metres ahead along the route (pure pursuit), which smooths corners.
+    """
+
+    def __init__(
+        self,
+        waypoints,
+        corridor_m=25.0,
+        lookahead_m=15.0,
+        arrival_m=15.0,
+        off_route_s=8.0,
+        backtrack_m=30.0,
+    ):
+        """
+        corridor_m: cross-track distance beyond which the user is off route.
+        lookahead_m: how far ahead along the route the steering target is.
+        arrival_m: arrived when both the distance left along the route and
+            the straight-line distance to the destination are below this.
+        off_route_s: the user must stay outside the corridor this long
+            before a reroute is requested (GPS glitches are shorter).
+        backtrack_m: segments ending this far behind the current progress are
+            ignored, so routes that double back do not snap backwards.
+        """
+        if len(waypoints) < 1:
+            raise ValueError("route needs at least one waypoint")
+
+        self.corridor_m = corridor_m
+        self.lookahead_m = lookahead_m
+        self.arrival_m = arrival_m
+        self.off_route_s = off_route_s
+        self.backtrack_m = backtrack_m
+
+        self.waypoints = [list(wp) for wp in waypoints]
+        geo = np.asarray(waypoints, dtype=np.float64)
+        self.origin_lat, self.origin_lon = geo[0]
+        self.cos_lat = math.cos(math.radians(self.origin_lat))
+
+        points = self._to_local(geo[:, 0], geo[:, 1])
+        if len(points) == 1:
+            # Degenerate route: a zero-length segment onto the destination
+            points = np.vstack([points, points])
+        self.points = points
+
+        self.seg_start = points[:-1]
+        self.seg_vec = points[1:] - points[:-1]
+        self.seg_len = np.hypot(self.seg_vec[:, 0], self.seg_vec[:, 1])
+        self.seg_len_sq = np.maximum(self.seg_len**2, 1e-9)
+        self.cum_len = np.concatenate([[0.0], np.cumsum(self.seg_len)])
+        self.total_m = float(self.cum_len[-1])
+
+        self.progress_m = 0.0
+        self.outside_since = None
+
+    def _to_local(self, lat, lon):
+        east = np.radians(np.asarray(lon) - self.origin_lon) * EARTH_RADIUS_M * self.cos_lat
+        north = np.radians(np.asarray(lat) - self.origin_lat) * EARTH_RADIUS_M
+        return np.stack([east, north], axis=-1)
+
+    def _to_geodetic(self, point):
+        lat = self.origin_lat + math.degrees(point[1] / EARTH_RADIUS_M)
+        lon = self.origin_lon + math.degrees(point[0] / (EARTH_RADIUS_M * self.cos_lat))
+        return lat, lon
+
+    def point_at(self, distance_m):
+        """Local point at a given along-route distance."""
+        distance_m = min(max(distance_m, 0.0), self.total_m)
+        seg = int(np.searchsorted(self.cum_len, distance_m, side="right") - 1)
+        seg = min(seg, len(self.seg_len) - 1)
+        t = (distance_m - self.cum_len[seg]) / max(self.seg_len[seg], 1e-9)
+        return self.seg_start[seg] + t * self.seg_vec[seg]
+
+    def update(self, lat, lon, now=None):
+        """Projects a position onto the route and returns a RouteState."""
+        now = time.time() if now is None else now
+        p = self._to_local(lat, lon)
+
+        # Projection of p onto every segment, clamped to the segment ends
+        rel = p - self.seg_start
+        t = np.clip(
+            (rel[:, 0] * self.seg_vec[:, 0] + rel[:, 1] * self.seg_vec[:, 1])
+            / self.seg_len_sq,
+            0.0,
+            1.0,
+        )
+        proj = self.seg_start + t[:, None] * self.seg_vec
+        offset = p - proj
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+
+        # Do not jump back to segments already left well behind
+        behind = self.cum_len[1:] < self.progress_m - self.backtrack_m
+        distance[behind] = np.inf
+
+        seg = int(np.argmin(distance))
+        progress = float(self.cum_len[seg] + t[seg] * self.seg_len[seg])
+        self.progress_m = max(self.progress_m, progress)
+
+        # Sign from the 2-D cross product: positive when p is right of travel
+        vx, vy = self.seg_vec[seg]
+        ox, oy = offset[seg]
+        cross_track = float(distance[seg]) * (1.0 if vx * oy - vy * ox < 0 else -1.0)
+
+        if abs(cross_track) > self.corridor_m:
+            if self.outside_since is None:
+                self.outside_since = now
+        else:
+            self.outside_since = None
+        off_route = (
+            self.outside_since is not None and now - self.outside_since >= self.off_route_s
+        )
+
+        remaining = self.total_m - progress
+        # The projection is clamped at the last segment's end, so anyone past
+        # the destination has ~0 m left along the route: check the real gap too
+        to_destination = float(np.hypot(*(p - self.points[-1])))
+        target_lat, target_lon = self._to_geodetic(self.point_at(progress + self.lookahead_m))
+        next_vertex = min(seg + 1, len(self.waypoints) - 1)
+
+        return RouteState(
+            segment=seg,
+            progress_m=progress,
+            remaining_m=remaining,
+            cross_track_m=cross_track,
+            target_lat=target_lat,
+            target_lon=target_lon,
+            next_vertex=next_vertex,
+            distance_to_vertex_m=float(self.cum_len[seg + 1] - progress),
+            off_route=off_route,
+            arrived=remaining < self.arrival_m and to_destination < self.arrival_m,
+        )
+
+
+if __name__ == "__main__":
+    # Replay harness: an L-shaped route, the user cuts the corner, walks away
+    # from the route and ends up past the destination (must not arrive).
+    origin = (8.2960, -62.7200)
+    deg_per_m = 1.0 / 111195.0
+    route = [
+        origin,
+        (origin[0] + 100 * deg_per_m, origin[1]),
+        (origin[0] + 100 * deg_per_m, origin[1] + 100 * deg_per_m),
+    ]
+    tracker = RouteProgress(route)
+
+    walk = [
+        (0, 0),
+        (0, 30),
+        (5, 60),
+        (25, 90),
+        (55, 100),
+        (60, 140),
+        (60, 170),
+        (60, 200),
+        (60, 230),
+        (90, 100),
+        (105, 100),
+        (500, 300),
+    ]
+    for second, (east, north) in enumerate(walk):
+        lat = origin[0] + north * deg_per_m
+        lon = origin[1] + east * deg_per_m
+        state = tracker.update(lat, lon, now=second * 3.0)
+        print(
+            f"E{east:4d} N{north:4d} -> seg {state.segment} progress {state.progress_m:6.1f} m "
+            f"xtrack {state.cross_track_m:+6.1f} m off_route={state.off_route} "
+            f"arrived={state.arrived}"
+        )
+
+    positions = np.random.default_rng(0).uniform(-0.001, 0.001, (1000, 2)) + origin
+    start = time.perf_counter()
+    for lat, lon in positions:
+        tracker.update(lat, lon)
+    print(f"Update time: {(time.perf_counter() - start) * 1000 / len(positions):.3f} ms")
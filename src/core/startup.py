@@ -0,0 +1,213 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class _Component:
+    def __init__(self, name, factory, requires, core, on_ready):
+        self.name = name
+        self.factory = factory
+        self.requires = tuple(requires)
+        self.core = core
+        self.on_ready = on_ready
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+
+class StartupOrchestrator:
+    """
+    Brings the subsystems up in parallel, safety first.
+
+    Each component is a factory plus the names of the components it needs;
+    the factory receives their values as arguments. Core components (audio,
+    cameras, hazard detectors) start immediately, each as soon as its
+    requirements are done. Everything else waits until the core is up, so
+    loading OCR or speech models does not slow down the hazard alerts.
+
+    A component that fails is reported and passed on as None, the same way
+    main.py used to fall back when a driver could not be initialized.
+    """
+
+    def __init__(self, max_workers=3):
+        self.components = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="startup"
+        )
+        self.core_ready_callbacks = []
+        self.all_done_callbacks = []
+        self.core_ready = False
+        self.all_done = False
+        self.started_at = None
+
+    def add(self, name, factory, requires=(), core=False, on_ready=None):
+        """
+        Registers a component. on_ready(value) runs once it has loaded, e.g.
+        to hand a late component to an object that already exists.
+        """
+        self.components[name] = _Component(name, factory, requires, core, on_ready)
+
+    def on_core_ready(self, callback):
+        self.core_ready_callbacks.append(callback)
+
+    def on_all_done(self, callback):
+        self.all_done_callbacks.append(callback)
+
+    def start(self):
+        for component in self.components.values():
+            for requirement in component.requires:
+                if requirement not in self.components:
+                    raise ValueError(f"{component.name} requires unknown {requirement}")
+        self.started_at = time.monotonic()
+        print(f"[Startup] Starting {len(self.components)} components...")
+        self._schedule()
+
+    def get(self, name):
+        """The component if it is ready, else None (never blocks)."""
+        component = self.components[name]
+        return component.value if component.state == READY else None
+
+    def wait(self, name, timeout=None):
+        """Blocks until the component has loaded or failed; returns its value."""
+        component = self.components[name]
+        component.done.wait(timeout)
+        return component.value
+
+    def is_ready(self, name):
+        return self.components[name].state == READY
+
+    def status(self):
+        """{name: (state, seconds spent loading or None)}."""
+        result = {}
+        for name, component in self.components.items():
+            elapsed = None
+            if component.started is not None:
+                end = component.finished or time.monotonic()
+                elapsed = end - component.started
+            result[name] = (component.state, elapsed)
+        return result
+
+    def report(self):
+        lines = []
+        for name, (state, elapsed) in self.status().items():
+            component = self.components[name]
+            line = f"  {name:<18} {state:<8}"
+            if elapsed is not None:
+                line += f" {elapsed:6.2f} s"
+            if component.finished is not None:
+                line += f" (up at {component.finished - self.started_at:6.2f} s)"
+            if component.error is not None:
+                line += f" {component.error!r}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    def _schedule(self):
+        with self.lock:
+            runnable = []
+            for component in self.components.values():
+                if component.state != PENDING:
+                    continue
+                if not component.core and not self.core_ready:
+                    continue
+                if all(self.components[r].done.is_set() for r in component.requires):
+                    component.state = LOADING
+                    runnable.append(component)
+            # Core components are submitted first
+            runnable.sort(key=lambda c: not c.core)
+        for component in runnable:
+            self.executor.submit(self._load, component)
+
+    def _load(self, component):
+        component.started = time.monotonic()
+        args = [self.components[r].value for r in component.requires]
+        try:
+            component.value = component.factory(*args)
+            component.state = READY
+        except BaseException as e:
+            # Also SystemExit: some drivers call exit() when their device is
+            # missing, which must fail the component, not leave it loading
+            component.error = e
+            component.state = FAILED
+            print(f"[Startup] {component.name} failed: {e!r}")
+        finally:
+            component.finished = time.monotonic()
+            component.done.set()
+
+        if component.state == READY:
+            print(
+                f"[Startup] {component.name} ready in "
+                f"{component.finished - component.started:.2f} s"
+            )
+            if component.on_ready is not None:
+                try:
+                    component.on_ready(component.value)
+                except Exception as e:
+                    print(f"[Startup] {component.name} on_ready failed: {e}")
+
+        self._check_core()
+        self._schedule()
+
+        with self.lock:
+            if self.all_done or not all(
+                c.done.is_set() for c in self.components.values()
+            ):
+                return
+            self.all_done = True
+        total = time.monotonic() - self.started_at
+        print(f"[Startup] All components done in {total:.2f} s:\n{self.report()}")
+        for callback in self.all_done_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[Startup] All done callback failed: {e}")
+
+    def _check_core(self):
+        with self.lock:
+            if self.core_ready:
+                return
+            if not all(c.done.is_set() for c in self.components.values() if c.core):
+                return
+            self.core_ready = True
+        elapsed = time.monotonic() - self.started_at
+        print(f"[Startup] Core (safety) components up in {elapsed:.2f} s")
+        for callback in self.core_ready_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[Startup] Core ready callback failed: {e}")
+
+
+if __name__ == "__main__":
+    # Dry run with sleeps standing in for the real load times
+    startup = StartupOrchestrator()
+    startup.add("audio", lambda: time.sleep(0.3) or "audio", core=True)
+    startup.add("detection_model", lambda: time.sleep(0.8) or "hailo", core=True)
+    startup.add("cameras", lambda m: time.sleep(0.5) or "cams", ["detection_model"], core=True)
+    startup.add("depth_model", lambda m: time.sleep(0.6) or "depth", ["detection_model"], core=True)
+    startup.add(
+        "detectors",
+        lambda a, c, d: time.sleep(0.1) or "detectors",
+        ["audio", "cameras", "depth_model"],
+        core=True,
+    )
+    startup.add("navigation", lambda a: time.sleep(0.4) or "nav", ["audio"])
+    startup.add("ocr", lambda a, d: time.sleep(2.0) or "ocr", ["audio", "depth_model"])
+    startup.add("voice", lambda a: time.sleep(1.5) or "vosk", ["audio"])
+    startup.add("broken", lambda: 1 / 0)
+    startup.on_core_ready(lambda: print("  -> 'Detección de obstáculos activa'"))
+    startup.start()
+    startup.wait("ocr")
+    startup.wait("voice")
+    time.sleep(0.1)
@@ -0,0 +1,187 @@
+import math
+import time
+import numpy as np
+
+
+class TofDepthFusion:
+    """
+    Calibrates the relative depth of scdepthv3 to millimetres using the
+    VL53L5CX time-of-flight sensor.
+
+    The ToF sensor measures 8x8 absolute distances over a 45° x 45° field of
+    view that overlaps the centre of the camera image. Each zone is projected
+    onto the depth map, the depth model's median inside the zone is compared
+    with the ToF distance, and a robust scale (mm per depth unit) is tracked
+    over time. The detectors multiply relative depth by this scale to apply
+    absolute thresholds.
+    """
+
+    ZONES = 8
+
+    def __init__(
+        self,
+        depth_w=320,
+        depth_h=256,
+        camera_hfov_deg=66.0,
+        tof_fov_deg=45.0,
+        window_px=9,
+        min_zones=6,
+        max_age_s=0.4,
+        smoothing=0.3,
+        flip_lr=False,
+        flip_ud=False,
+    ):
+        """
+        window_px: side of the square depth-map window sampled per zone.
+        min_zones: minimum number of valid zones required to calibrate.
+        max_age_s: ToF frames older than this (vs. the depth frame) are ignored.
+        flip_lr / flip_ud: match the sensor's mounting orientation.
+        """
+        self.min_zones = min_zones
+        self.max_age_s = max_age_s
+        self.smoothing = smoothing
+        self.flip_lr = flip_lr
+        self.flip_ud = flip_ud
+
+        focal_px = (depth_w / 2.0) / math.tan(math.radians(camera_hfov_deg) / 2.0)
+        zone_deg = tof_fov_deg / self.ZONES
+        centers_deg = (np.arange(self.ZONES) - (self.ZONES - 1) / 2.0) * zone_deg
+        tan_centers = np.tan(np.radians(centers_deg))
+
+        # Pixel centre of every zone (row-major, same order as the matrix)
+        cols = (depth_w - 1) / 2.0 + focal_px * tan_centers
+        rows = (depth_h - 1) / 2.0 + focal_px * tan_centers
+        zone_v, zone_u = np.meshgrid(rows, cols, indexing="ij")
+
+        # Precomputed flat pixel indices of each zone window: (64, window^2).
+        # A single fancy-indexing gather then samples every zone at once.
+        half = window_px // 2
+        offsets = np.arange(-half, half + 1)
+        dv, du = np.meshgrid(offsets, offsets, indexing="ij")
+        v = np.clip(np.round(zone_v.reshape(-1, 1) + dv.ravel()), 0, depth_h - 1)
+        u = np.clip(np.round(zone_u.reshape(-1, 1) + du.ravel()), 0, depth_w - 1)
+        self.zone_indices = (v * depth_w + u).astype(np.intp)
+
+        # The sensor reports distance along each zone's ray, the depth model
+        # predicts distance along the optical axis (z). cos() converts one
+        # into the other.
+        tan_v, tan_u = np.meshgrid(tan_centers, tan_centers, indexing="ij")
+        self.ray_to_z = (1.0 / np.sqrt(1.0 + tan_u**2 + tan_v**2)).ravel()
+
+        self.scale = None  # mm per depth unit
+        self.valid_zones = 0
+        self.last_update_time = 0.0
+
+    @property
+    def is_calibrated(self):
+        return self.scale is not None
+
+    def zone_depths(self, depth_array):
+        """Median relative depth inside every ToF zone window (64,)."""
+        samples = depth_array.reshape(-1)[self.zone_indices]
+        return np.median(samples, axis=1)
+
+    def _oriented(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if self.flip_lr:
+            matrix = matrix[:, ::-1]
+        if self.flip_ud:
+            matrix = matrix[::-1, :]
+        return matrix.reshape(-1)
+
+    def update(self, depth_array, tof_frame, depth_timestamp=None):
+        """
+        Refines the scale with a depth map and a (timestamp, matrix) ToF frame
+        from Tof.latest(). Returns True when the scale was updated.
+        """
+        if tof_frame is None or depth_array is None:
+            return False
+
+        tof_timestamp, matrix = tof_frame
+        if depth_timestamp is None:
+            depth_timestamp = time.time()
+        if abs(depth_timestamp - tof_timestamp) > self.max_age_s:
+            return False
+
+        tof_z = self._oriented(matrix) * self.ray_to_z
+        relative = self.zone_depths(depth_array)
+
+        # Zones with status errors come as 0 from the driver
+        valid = (tof_z > 0) & np.isfinite(relative) & (relative > 0)
+        self.valid_zones = int(np.count_nonzero(valid))
+        if self.valid_zones < self.min_zones:
+            return False
+
+        # The median ratio ignores zones where the two sensors disagree
+        # (edges, glass, thin objects) without an iterative fit.
+        scale = float(np.median(tof_z[valid] / relative[valid]))
+
+        if self.scale is None:
+            self.scale = scale
+        else:
+            self.scale = (1.0 - self.smoothing) * self.scale + self.smoothing * scale
+        self.last_update_time = depth_timestamp
+        return True
+
+    def to_metric(self, depth_values):
+        """Converts relative depth values to millimetres (None if uncalibrated)."""
+        if self.scale is None:
+            return None
+        return depth_values * self.scale
+
+
+def load_tof_recording(path):
+    """Loads an .npz recorded with Tof.record(): (timestamps, matrices)."""
+    data = np.load(path)
+    return data["timestamps"], data["matrices"]
+
+
+def replay_recording(fusion, timestamps, matrices, depth_maps, depth_timestamps):
+    """
+    Feeds recorded ToF matrices and depth maps through the fusion in time
+    order, always pairing a depth map with the latest ToF frame before it.
+    Returns the scale after each depth map.
+    """
+    scales = []
+    tof_index = -1
+    for depth_array, depth_time in zip(depth_maps, depth_timestamps):
+        while tof_index + 1 < len(timestamps) and timestamps[tof_index + 1] <= depth_time:
+            tof_index += 1
+        tof_frame = None
+        if tof_index >= 0:
+            tof_frame = (timestamps[tof_index], matrices[tof_index])
+        fusion.update(depth_array, tof_frame, depth_timestamp=depth_time)
+        scales.append(fusion.scale)
+    return scales
+
+
+if __name__ == "__main__":
+    import sys
+    from src.core.ground_plane import synthetic_depth
+
+    # Replay harness. With an .npz recording from Tof.record() the recorded
+    # matrices are paired with a synthetic floor; without arguments the ToF
+    # matrices are synthesized from the same floor so the expected scale is
+    # known exactly.
+    units_per_mm = 7.3
+    depth = synthetic_depth(320, 256, 1220, pitch_deg=30.0, units_per_mm=units_per_mm)
+    fusion = TofDepthFusion()
+
+    if len(sys.argv) > 1:
+        timestamps, matrices = load_tof_recording(sys.argv[1])
+    else:
+        # Ground-truth matrix: the z-depth at each zone centre converted back
+        # to a distance along the zone's ray.
+        zone_z = fusion.zone_depths(depth) / units_per_mm
+        truth = (zone_z / fusion.ray_to_z).reshape(8, 8)
+        rng = np.random.default_rng(0)
+        matrices = [truth + rng.normal(0, 15, truth.shape) for _ in range(20)]
+        timestamps = np.arange(len(matrices)) * 0.2
+
+    depth_times = np.asarray(timestamps) + 0.05
+    scales = replay_recording(
+        fusion, timestamps, matrices, [depth] * len(depth_times), depth_times
+    )
+    print(f"Valid zones:     {fusion.valid_zones}")
+    print(f"Recovered scale: {scales[-1]:.4f} mm/unit")
+    print(f"Expected scale:  {1.0 / units_per_mm:.4f} mm/unit")
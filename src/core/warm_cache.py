@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path.cwd() / "assets" / "warm_cache"
+
+
+class WarmCache:
+    """
+    Artifacts derived at boot, kept on disk between runs.
+
+    Each artifact is a NumPy array stored as <namespace>/<key>.npy, where the
+    key is a hash of everything it was built from: parameters and the content
+    of the source files (a model, a table). A changed input therefore gives a
+    new key and the stale file is simply never read again; there is nothing
+    to invalidate. Hits are opened with mmap, so the OS pages them in lazily
+    and repeated boots share the page cache.
+
+    File content hashes are remembered in hashes.json by path, size and
+    mtime, so big inputs (the Piper voice model) are only read again after
+    they change. Namespaces are trimmed to `max_bytes`, least recently used
+    first.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=100_000_000):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.hashes_path = self.directory / "hashes.json"
+        try:
+            with open(self.hashes_path, "r") as f:
+                self.file_hashes = json.load(f)
+        except (OSError, ValueError):
+            self.file_hashes = {}
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    def file_hash(self, path):
+        """SHA-1 of a file's content, memoized while its size and mtime hold."""
+        path = Path(path)
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self.lock:
+            known = self.file_hashes.get(str(path))
+        if known is not None and known[:2] == signature:
+            return known[2]
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        with self.lock:
+            self.file_hashes[str(path)] = signature + [content_hash]
+            self._write_atomic(
+                self.hashes_path, json.dumps(self.file_hashes).encode("utf-8")
+            )
+        return content_hash
+
+    def key(self, *parts):
+        """Hash of the inputs; Path parts count by content, the rest by repr."""
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, Path):
+                digest.update(self.file_hash(part).encode("ascii"))
+            else:
+                digest.update(repr(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    # ------------------------------------------------------------------
+    # Arrays
+    # ------------------------------------------------------------------
+    def load_array(self, namespace, key):
+        """The cached array (read-only, memory-mapped) or None."""
+        path = self.directory / namespace / f"{key}.npy"
+        try:
+            array = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # Recently used, for trimming
+        except OSError:
+            pass
+        return array
+
+    def save_array(self, namespace, key, array):
+        folder = self.directory / namespace
+        path = folder / f"{key}.npy"
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(temp, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"[WarmCache] Could not write {path}: {e}")
+            return
+        self.trim(namespace)
+
+    def array(self, namespace, key_parts, build):
+        """
+        Cached array for `key_parts`; on a miss build() makes it and it is
+        stored for the next boot.
+        """
+        key = self.key(*key_parts)
+        array = self.load_array(namespace, key)
+        if array is not None:
+            self.hits += 1
+            return array
+
+        self.misses += 1
+        array = build()
+        if array is not None:
+            self.save_array(namespace, key, array)
+        return array
+
+    def trim(self, namespace):
+        """Deletes the least recently used files beyond max_bytes."""
+        folder = self.directory / namespace
+        try:
+            files = [(p.stat(), p) for p in folder.glob("*.npy")]
+        except OSError:
+            return
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in sorted(files, key=lambda f: f[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= stat.st_size
+            except OSError:
+                pass
+
+    def _write_atomic(self, path, data):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(".tmp")
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"[WarmCache] Could not write {path}: {e}")
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    # Cold vs warm boot of a synthetic artifact:
+    #   python -m src.core.warm_cache
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(tempfile.mkdtemp())
+    source = directory / "table.json"
+    directory.mkdir(parents=True, exist_ok=True)
+    source.write_text(json.dumps({"person": "persona"}))
+
+    def build():
+        time.sleep(0.5)  # Stands in for synthesis or parsing
+        return np.arange(44100 * 2, dtype=np.int16).reshape(-1, 2)
+
+    for boot in ("cold", "warm"):
+        cache = WarmCache(directory)
+        start = time.perf_counter()
+        array = cache.array("demo", ("cue", 44100, source), build)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"{boot}: {elapsed:7.2f} ms, {array.shape} "
+            f"({'mmap' if isinstance(array, np.memmap) else 'built'})"
+        )
+
+    source.write_text(json.dumps({"person": "peatón"}))
+    cache = WarmCache(directory)
+    cache.array("demo", ("cue", 44100, source), build)
+    print(f"after editing the source: {cache.misses} miss (rebuilt)")
@@ -12,7 +12,13 @@ MODEL_PATH = BASE_DIRECTORY / "assets/es_MX-claude-high.onnx"
 
 
 class Audio:
-    def __init__(self, sample_rate=44100):
+    def __init__(self, sample_rate=44100, warm_cache=None, cached_phrases=()):
+        """
+        warm_cache: optional WarmCache; keeps the synthesized cues, the fast
+            voice alerts and the fixed phrases, so they are not generated again.
+        cached_phrases: fixed prompts (menus, status messages) whose speech is
+            kept. Dynamic text such as OCR readings or addresses is not.
+        """
         pygame.mixer.pre_init(sample_rate, -16, 2, 512)
         pygame.mixer.init()
         # Reservamos el canal 0 estrictamente para la voz principal
@@ -20,6 +26,8 @@ class Audio:
         self.voice_channel = pygame.mixer.Channel(0)
 
         self.sample_rate = sample_rate
+        self.warm_cache = warm_cache
+        self.cached_phrases = set(cached_phrases)
         self.current_process = None
         self.stop_flag = False
 
@@ -46,6 +54,18 @@ class Audio:
     def _create_synth_sound(
         self, start_freq, end_freq, duration, wave_type="sine", volume=0.8
     ):
+        def build():
+            return self._synth_pcm(start_freq, end_freq, duration, wave_type, volume)
+
+        if self.warm_cache is None:
+            stereo = build()
+        else:
+            params = (self.sample_rate, start_freq, end_freq, duration, wave_type, volume)
+            stereo = self.warm_cache.array("cues", params, build)
+        # SDL keeps its own copy of the samples
+        return pygame.sndarray.make_sound(np.array(stereo))
+
+    def _synth_pcm(self, start_freq, end_freq, duration, wave_type, volume):
         n_samples = int(self.sample_rate * duration)
         t = np.linspace(0, duration, n_samples, False)
 
@@ -63,8 +83,54 @@ class Audio:
         wave = wave * envelope * volume
 
         audio = np.int16(wave * 32767)
-        stereo = np.column_stack((audio, audio))
-        return pygame.sndarray.make_sound(stereo)
+        return np.column_stack((audio, audio))
+
+    def _speech_key(self, text, length_scale):
+        if self.warm_cache is None or not MODEL_PATH.exists():
+            return None
+        # The voice model counts by content: a new voice is a new cache
+        return self.warm_cache.key(text, length_scale, self.sample_rate, MODEL_PATH)
+
+    def _cached_speech(self, text, length_scale):
+        """The phrase as a Sound if Piper already synthesized it, else None."""
+        key = self._speech_key(text, length_scale)
+        if key is None:
+            return None
+        pcm = self.warm_cache.load_array("speech", key)
+        if pcm is None:
+            return None
+        return pygame.sndarray.make_sound(np.array(pcm))
+
+    def _store_speech(self, text, length_scale, sound):
+        key = self._speech_key(text, length_scale)
+        if key is not None:
+            # Samples in the mixer format, ready for make_sound()
+            self.warm_cache.save_array("speech", key, pygame.sndarray.array(sound))
+
+    def prewarm(self, phrases, length_scale="1.0"):
+        """
+        Synthesizes the phrases that are not cached yet, e.g. the fixed menu
+        messages, so the first time they are needed they play at once.
+        """
+        if self.warm_cache is None:
+            return
+        if not Path(PIPER_PATH).exists() or not MODEL_PATH.exists():
+            return
+        self.cached_phrases.update(phrases)
+        missing = [p for p in phrases if self._cached_speech(p, length_scale) is None]
+        for text in missing:
+            temp_wav = f"/tmp/karim_prewarm_{time.time()}.wav"
+            command = f'echo "{text}" | {PIPER_PATH} --model {MODEL_PATH} --length_scale {length_scale} --output_file {temp_wav} 2>/dev/null'
+            try:
+                if subprocess.run(command, shell=True).returncode != 0:
+                    raise RuntimeError("Piper failed")
+                self._store_speech(text, length_scale, pygame.mixer.Sound(temp_wav))
+            except Exception as e:
+                print(f"[ERROR] Could not prewarm '{text}': {e}")
+            finally:
+                Path(temp_wav).unlink(missing_ok=True)
+        if missing:
+            print(f"[Audio] {len(missing)} phrases added to the speech cache.")
 
     def play_spatial_sound(self, position="center", sound_type="ui"):
         if sound_type == "sonar":
@@ -87,12 +153,20 @@ class Audio:
 
     def speak_fast_background(self, text, length_scale="0.6"):
         """Synthesizes and plays a very fast voice on a secondary channel (does NOT cut off the main voice)"""
-        temp_wav = f"/tmp/karim_fast_{time.time()}.wav"
-        command = f'echo "{text}" | {PIPER_PATH} --model {MODEL_PATH} --length_scale {length_scale} --output_file {temp_wav} 2>/dev/null'
-
-        subprocess.run(command, shell=True)
+        fast_voice = self._cached_speech(text, length_scale)
         try:
-            fast_voice = pygame.mixer.Sound(temp_wav)
+            if fast_voice is None:
+                temp_wav = f"/tmp/karim_fast_{time.time()}.wav"
+                command = f'echo "{text}" | {PIPER_PATH} --model {MODEL_PATH} --length_scale {length_scale} --output_file {temp_wav} 2>/dev/null'
+
+                result = subprocess.run(command, shell=True)
+                if result.returncode != 0:
+                    print(f"[ERROR] Piper failed to synthesize '{text}'.")
+                    return
+                fast_voice = pygame.mixer.Sound(temp_wav)
+                Path(temp_wav).unlink(missing_ok=True)
+                # Vehicle and traffic light alerts: a small, fixed vocabulary
+                self._store_speech(text, length_scale, fast_voice)
             channel = pygame.mixer.find_channel()
             if channel:
                 channel.play(fast_voice)
@@ -102,23 +176,36 @@ class Audio:
     def speak(self, text, length_scale="1.0"):
         self.stop_flag = False
 
-        if not Path(PIPER_PATH).exists() or not MODEL_PATH.exists():
-            print(f"[ERROR]: Piper binaries or model are missing.")
-            return
-
-        print(f"[Audio] Synthesizing voice: '{text}'")
-        temp_wav = "/tmp/karim_voz.wav"
-        command = f'echo "{text}" | {PIPER_PATH} --model {MODEL_PATH} --length_scale {length_scale} --output_file {temp_wav} 2>/dev/null'
-
-        self.current_process = subprocess.Popen(command, shell=True)
-        self.current_process.communicate()
-        self.current_process = None
-
-        if self.stop_flag:
-            return
+        voice = None
+        if text in self.cached_phrases:
+            voice = self._cached_speech(text, length_scale)
+        if voice is None:
+            if not Path(PIPER_PATH).exists() or not MODEL_PATH.exists():
+                print(f"[ERROR]: Piper binaries or model are missing.")
+                return
+
+            print(f"[Audio] Synthesizing voice: '{text}'")
+            temp_wav = "/tmp/karim_voz.wav"
+            command = f'echo "{text}" | {PIPER_PATH} --model {MODEL_PATH} --length_scale {length_scale} --output_file {temp_wav} 2>/dev/null'
+
+            # A failed synthesis must not play (or cache) the previous phrase
+            Path(temp_wav).unlink(missing_ok=True)
+            self.current_process = subprocess.Popen(command, shell=True)
+            self.current_process.communicate()
+            returncode = self.current_process.returncode
+            self.current_process = None
+
+            if self.stop_flag:
+                return
+            if returncode != 0:
+                print(f"[ERROR] Piper failed to synthesize '{text}'.")
+                return
 
         try:
-            voice = pygame.mixer.Sound(temp_wav)
+            if voice is None:
+                voice = pygame.mixer.Sound(temp_wav)
+                if text in self.cached_phrases:
+                    self._store_speech(text, length_scale, voice)
             self.voice_channel.play(voice)
             while self.voice_channel.get_busy():
                 if self.stop_flag:
@@ -62,6 +62,15 @@ class CameraDriver:
     def capture_array(self, stream_name="lores"):
         return self.picam2.capture_array(stream_name)
 
+    def capture_arrays(self, stream_names=("lores", "main")):
+        """
+        Captures several streams from the same camera request, so e.g. the
+        lores frame used for detection and the main frame used for cropping
+        show exactly the same scene.
+        """
+        arrays, _ = self.picam2.capture_arrays(list(stream_names))
+        return arrays
+
     def set_callback(self, callback_func):
         """Sets the callback for drawing/processing on the main thread loop (preview)"""
         self.picam2.pre_callback = callback_func
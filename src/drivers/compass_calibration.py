@@ -0,0 +1,213 @@
+import json
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CALIBRATION_PATH = Path.cwd() / "config" / "compass_calibration.json"
+
+
+def fit_ellipsoid(points):
+    """
+    Least-squares fit of an n-dimensional ellipsoid to magnetometer samples.
+
+    Solves sum(A_ij x_i x_j) + sum(b_i x_i) = 1 for the quadric coefficients,
+    then returns (center, transform): the hard-iron offset and the soft-iron
+    matrix that maps (x - center) onto the unit sphere. Raises ValueError if
+    the samples do not describe an ellipsoid.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = points.shape[1]
+
+    # Normalise for conditioning; the result is mapped back at the end
+    mid = points.mean(axis=0)
+    spread = np.abs(points - mid).max()
+    if spread == 0:
+        raise ValueError("all samples are identical")
+    p = (points - mid) / spread
+
+    rows, cols = np.triu_indices(n)
+    design = np.hstack([p[:, rows] * p[:, cols], p])
+    coeffs, *_ = np.linalg.lstsq(design, np.ones(len(p)), rcond=None)
+
+    quad = np.zeros((n, n))
+    quad[rows, cols] = coeffs[: len(rows)]
+    quad = (quad + quad.T) / 2.0  # off-diagonal terms appear twice in x^T M x
+    linear = coeffs[len(rows) :]
+
+    # x^T M x + b^T x = 1  ->  (x - c)^T M (x - c) = 1 + c^T M c
+    center = np.linalg.solve(quad, -linear / 2.0)
+    k = 1.0 + center @ quad @ center
+    shape = quad / k
+
+    eigenvalues, eigenvectors = np.linalg.eigh(shape)
+    if np.any(eigenvalues <= 0):
+        raise ValueError("samples do not form an ellipsoid")
+    transform = eigenvectors @ np.diag(np.sqrt(eigenvalues)) @ eigenvectors.T
+
+    return center * spread + mid, transform / spread
+
+
+class CompassCalibration:
+    """
+    Hard-/soft-iron correction and heading table for the QMC5883L.
+
+    The device is worn upright and only the Y/Z axes are used for the
+    heading, so the ellipsoid is fitted in 2-D. The correction is a
+    translation plus a 2x2 matrix, followed by a piecewise-linear table
+    (np.interp) that maps the corrected angle to the true heading measured
+    at reference points.
+    """
+
+    AXES = ("y", "z")
+
+    def __init__(self, capacity=3000):
+        """capacity: max samples kept while calibrating (60 s at 50 Hz)."""
+        # Factory values, previously hard-coded in IMU
+        self.center = np.array([-2614.5, -6894.5])
+        self.soft_iron = np.diag([0.7948, 0.7555])
+        self.heading_offset_deg = 104.0  # -15° declination + 119° mounting
+        self.table_in = np.array([33.3, 146.4, 203.8, 269.1, 393.3])
+        self.table_out = np.array([0.0, 90.0, 180.0, 270.0, 360.0])
+        self.fitted_at = None
+        self.residual = None
+
+        self.samples = np.empty((capacity, len(self.AXES)), dtype=np.float64)
+        self.sample_count = 0
+
+    # ------------------------------------------------------------------
+    # Sample collection and fit
+    # ------------------------------------------------------------------
+    def clear_samples(self):
+        self.sample_count = 0
+
+    def add_sample(self, raw):
+        """Stores one raw (y, z) reading; the oldest is dropped when full."""
+        self.samples[self.sample_count % len(self.samples)] = raw
+        self.sample_count += 1
+
+    def collected(self):
+        return self.samples[: min(self.sample_count, len(self.samples))]
+
+    def fit(self, min_samples=100, min_sectors=6):
+        """
+        Fits the hard/soft-iron correction to the collected samples.
+        Requires readings in at least `min_sectors` of 8 heading sectors, i.e.
+        the user really turned around. Returns True if the fit was applied.
+        """
+        points = self.collected()
+        if len(points) < min_samples:
+            print(f"[Compass] Only {len(points)} samples, calibration not applied.")
+            return False
+
+        try:
+            center, transform = fit_ellipsoid(points)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            print(f"[Compass] Ellipse fit failed: {e}")
+            return False
+
+        unit = (points - center) @ transform.T
+        angles = np.arctan2(unit[:, 0], unit[:, 1])
+        sectors = np.unique(((angles + math.pi) / (math.pi / 4)).astype(int) % 8)
+        if len(sectors) < min_sectors:
+            print(f"[Compass] Turn covered {len(sectors)}/8 sectors, not applied.")
+            return False
+
+        # Keep the field magnitude in raw units so the table stays meaningful
+        radius = np.linalg.norm(points - center, axis=1).mean()
+        self.center = center
+        self.soft_iron = transform * radius
+        self.residual = float(np.abs(np.linalg.norm(unit, axis=1) - 1.0).mean())
+        self.fitted_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        print(
+            f"[Compass] Calibrated: center={np.round(center, 1).tolist()} "
+            f"residual={self.residual:.3f}"
+        )
+        return True
+
+    # ------------------------------------------------------------------
+    # Correction
+    # ------------------------------------------------------------------
+    def heading(self, raw):
+        """
+        Corrected heading in degrees for one (y, z) reading or an (N, 2)
+        array of readings.
+        """
+        v = (np.asarray(raw, dtype=np.float64) - self.center) @ self.soft_iron.T
+        angle = np.degrees(np.arctan2(v[..., 0], v[..., 1]))
+        angle = (angle + self.heading_offset_deg) % 360.0
+        # The table starts above 0°, so wrap low angles past its last point
+        angle = np.where(angle < self.table_in[0], angle + 360.0, angle)
+        return np.interp(angle, self.table_in, self.table_out) % 360.0
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def to_dict(self):
+        return {
+            "axes": list(self.AXES),
+            "center": self.center.tolist(),
+            "soft_iron": self.soft_iron.tolist(),
+            "heading_offset_deg": self.heading_offset_deg,
+            "table": [[x, y] for x, y in zip(self.table_in.tolist(), self.table_out.tolist())],
+            "fitted_at": self.fitted_at,
+            "residual": self.residual,
+        }
+
+    def save(self, path=DEFAULT_CALIBRATION_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        tmp_path.replace(path)
+        print(f"[Compass] Calibration saved to {path}")
+
+    @classmethod
+    def load(cls, path=DEFAULT_CALIBRATION_PATH):
+        """Loads a saved calibration, or the factory values if there is none."""
+        calibration = cls()
+        path = Path(path)
+        if not path.exists():
+            print("[Compass] No calibration file, using factory values.")
+            return calibration
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            calibration.center = np.array(data["center"], dtype=np.float64)
+            calibration.soft_iron = np.array(data["soft_iron"], dtype=np.float64)
+            calibration.heading_offset_deg = float(data["heading_offset_deg"])
+            table = np.array(data["table"], dtype=np.float64)
+            calibration.table_in, calibration.table_out = table[:, 0], table[:, 1]
+            calibration.fitted_at = data.get("fitted_at")
+            calibration.residual = data.get("residual")
+            print(f"[Compass] Calibration loaded ({calibration.fitted_at}).")
+        except Exception as e:
+            print(f"[Compass] Invalid calibration file, using factory values: {e}")
+            return cls()
+        return calibration
+
+
+if __name__ == "__main__":
+    # Synthetic check: a distorted, offset circle must come back round
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(0, 2 * np.pi, 600)
+    circle = np.stack([np.sin(angles), np.cos(angles)], axis=1) * 3000
+    distortion = np.array([[1.25, 0.2], [0.1, 0.8]])
+    raw = circle @ distortion.T + (-2600, -6900) + rng.normal(0, 30, circle.shape)
+
+    calibration = CompassCalibration()
+    for sample in raw:
+        calibration.add_sample(sample)
+    calibration.fit()
+
+    corrected = (raw - calibration.center) @ calibration.soft_iron.T
+    radii = np.linalg.norm(corrected, axis=1)
+    print(f"Radius spread after correction: {radii.std() / radii.mean() * 100:.1f}%")
+
+    start = time.perf_counter()
+    for sample in raw:
+        calibration.heading(sample)
+    per_sample_us = (time.perf_counter() - start) / len(raw) * 1e6
+    print(f"Per-sample correction: {per_sample_us:.1f} us")
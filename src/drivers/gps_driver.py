@@ -1,112 +1,334 @@
-import serial
+import threading
 import time
+from typing import NamedTuple
+
+
+class GpsFix(NamedTuple):
+    """Immutable snapshot of the receiver state after a position sentence."""
+
+    timestamp: float  # Local time.time() when the sentence was parsed
+    latitude: float
+    longitude: float
+    has_fix: bool
+    fix_quality: int  # GGA quality (0 = invalid, 1 = GPS, 2 = DGPS, ...)
+    fix_type: int  # GSA fix type (1 = none, 2 = 2D, 3 = 3D)
+    satellites: int
+    hdop: float
+    pdop: float
+    vdop: float
+    altitude: float
+    speed_mps: float
+    course_deg: float  # Course over ground, None when unknown
+
+    def is_fresh(self, max_age_s):
+        return time.time() - self.timestamp <= max_age_s
+
+
+class NmeaParser:
+    """
+    Incremental NMEA 0183 parser.
+
+    Bytes can be fed in chunks of any size; complete sentences are
+    checksum-validated and parsed. GGA, RMC, VTG and GSA update a shared
+    state, and every GGA (or RMC, for receivers without GGA) emits a new
+    GpsFix. Captured byte streams can be replayed through feed() directly.
+    """
+
+    KNOTS_TO_MPS = 0.514444
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.seen_gga = False
+        self.bad_checksums = 0
+        self.state = {
+            "latitude": 0.0,
+            "longitude": 0.0,
+            "has_fix": False,
+            "fix_quality": 0,
+            "fix_type": 1,
+            "satellites": 0,
+            "hdop": 99.9,
+            "pdop": 99.9,
+            "vdop": 99.9,
+            "altitude": 0.0,
+            "speed_mps": 0.0,
+            "course_deg": None,
+        }
+
+    def feed(self, data):
+        """Consumes raw bytes and returns the list of fixes they completed."""
+        self.buffer.extend(data)
+        fixes = []
+
+        while True:
+            newline = self.buffer.find(b"\n")
+            if newline < 0:
+                break
+            raw_line = bytes(self.buffer[:newline])
+            del self.buffer[: newline + 1]
+
+            fix = self.parse_line(raw_line)
+            if fix is not None:
+                fixes.append(fix)
+
+        # A corrupted stream without newlines must not grow forever
+        if len(self.buffer) > 4096:
+            del self.buffer[:-512]
+        return fixes
+
+    def parse_line(self, raw_line):
+        line = raw_line.decode("ascii", errors="replace").strip()
+
+        # ANTI-NOISE FILTER: Find where the frame actually starts ($)
+        start = line.rfind("$")
+        if start < 0:
+            return None
+        line = line[start:]
+
+        if not self._checksum_ok(line):
+            self.bad_checksums += 1
+            return None
+
+        body = line[1:].split("*")[0]
+        fields = body.split(",")
+        sentence = fields[0][-3:]
+
+        try:
+            if sentence == "GGA":
+                self.seen_gga = True
+                self._parse_gga(fields)
+                return self._emit()
+            if sentence == "RMC":
+                self._parse_rmc(fields)
+                return None if self.seen_gga else self._emit()
+            if sentence == "VTG":
+                self._parse_vtg(fields)
+            elif sentence == "GSA":
+                self._parse_gsa(fields)
+        except (ValueError, IndexError):
+            # Truncated sentence with a valid checksum: ignore it
+            pass
+        return None
+
+    def _checksum_ok(self, line):
+        star = line.find("*")
+        if star < 0 or len(line) < star + 3:
+            return False
+        checksum = 0
+        for char in line[1:star]:
+            checksum ^= ord(char)
+        try:
+            return checksum == int(line[star + 1 : star + 3], 16)
+        except ValueError:
+            return False
+
+    def _parse_gga(self, fields):
+        quality = int(fields[6] or 0)
+        self.state["fix_quality"] = quality
+        self.state["satellites"] = int(fields[7] or 0)
+        if fields[8]:
+            self.state["hdop"] = float(fields[8])
+        if fields[9]:
+            self.state["altitude"] = float(fields[9])
+
+        self.state["has_fix"] = quality > 0 and fields[2] != ""
+        if self.state["has_fix"]:
+            self.state["latitude"] = convert_to_degrees(fields[2], fields[3])
+            self.state["longitude"] = convert_to_degrees(fields[4], fields[5])
+
+    def _parse_rmc(self, fields):
+        active = fields[2] == "A"
+        if active and fields[3]:
+            self.state["latitude"] = convert_to_degrees(fields[3], fields[4])
+            self.state["longitude"] = convert_to_degrees(fields[5], fields[6])
+        if not self.seen_gga:
+            self.state["has_fix"] = active
+        if fields[7]:
+            self.state["speed_mps"] = float(fields[7]) * self.KNOTS_TO_MPS
+        self.state["course_deg"] = float(fields[8]) if fields[8] else None
+
+    def _parse_vtg(self, fields):
+        self.state["course_deg"] = float(fields[1]) if fields[1] else None
+        if len(fields) > 7 and fields[7]:
+            self.state["speed_mps"] = float(fields[7]) / 3.6
+        elif fields[5]:
+            self.state["speed_mps"] = float(fields[5]) * self.KNOTS_TO_MPS
+
+    def _parse_gsa(self, fields):
+        self.state["fix_type"] = int(fields[2] or 1)
+        # PDOP/HDOP/VDOP are always the three fields after the 12 satellites
+        if fields[15]:
+            self.state["pdop"] = float(fields[15])
+        if fields[16]:
+            self.state["hdop"] = float(fields[16])
+        if fields[17]:
+            self.state["vdop"] = float(fields[17])
+
+    def _emit(self):
+        return GpsFix(timestamp=time.time(), **self.state)
+
+
+def convert_to_degrees(value, direction):
+    if not value:
+        return 0.0
+
+    if direction in ["E", "W"]:
+        degrees = float(value[:3])
+        minutes = float(value[3:])
+    else:
+        degrees = float(value[:2])
+        minutes = float(value[2:])
+
+    decimal = degrees + (minutes / 60.0)
+
+    if direction in ["S", "W"]:
+        decimal = -decimal
+
+    return decimal
 
 
 class GPS:
     def __init__(self):
-        # Port configuration
+        # Port configuration. pyserial is imported here so the parser and
+        # GpsFix can be used for offline replays without it.
+        import serial
+
         try:
             self.ser = serial.Serial("/dev/ttyAMA0", 115200, timeout=1)
         except Exception as e:
             print(f"Error opening port: {e}")
             exit()
 
-    def get_location(self):
-        try:
-            # Read and decode the serial line, replacing bad bits
-            raw_line = self.ser.readline().decode("ascii", errors="replace").strip()
-
-            # ANTI-NOISE FILTER: Find where the frame actually starts ($)
-            if "$" in raw_line:
-                line = raw_line[raw_line.find("$") :]
-            else:
-                return None
+        self.parser = NmeaParser()
 
-            # Filter only the GGA sentence
-            if line.startswith("$GNGGA") or line.startswith("$GPGGA"):
-                data = line.split(",")
+        # Latest fix, published to consumers through the condition variable
+        self.condition = threading.Condition()
+        self.latest_fix = None
+        self.reader_thread = None
 
-                # Verify that there is a valid position fix (index 2 is latitude)
-                if len(data) > 9 and data[2] != "":
-                    lat = self.convert_to_degrees(data[2], data[3])
-                    lon = self.convert_to_degrees(data[4], data[5])
-                    # sats = data[7]
-                    # alt = data[9]
+    def start(self):
+        """Starts the background thread that streams and parses NMEA data."""
+        if self.reader_thread is not None and self.reader_thread.is_alive():
+            return
+        self.reader_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader_thread.start()
 
-                    # Return True (Fix achieved) and the data
-                    return lat, lon
+    def _read_loop(self):
+        while self.is_ser_open():
+            try:
+                # Block until the first byte arrives (or the 1 s timeout),
+                # then take everything already waiting in one bulk read.
+                chunk = self.ser.read(1)
+                if not chunk:
+                    continue
+                waiting = self.ser.in_waiting
+                if waiting:
+                    chunk += self.ser.read(waiting)
+                self.publish(self.parser.feed(chunk))
+            except Exception as e:
+                # If electrical noise causes a read failure, keep listening
+                print(f"[GPS] Read error: {e}")
+                time.sleep(0.1)
 
-                elif len(data) > 7:
-                    # Return False (No Fix) and the number of satellites it currently uses
-                    return False
+    def publish(self, fixes):
+        """Publishes the newest of the given fixes and wakes up consumers."""
+        if not fixes:
+            return
+        with self.condition:
+            self.latest_fix = fixes[-1]
+            self.condition.notify_all()
 
-        except Exception:
-            # If electrical noise causes a decoding failure, ignore it
-            pass
+    def wait_for_fix(self, previous=None, timeout=None):
+        """
+        Blocks until a fix different from `previous` is published, then
+        returns it. Returns None on timeout.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.latest_fix is not None and self.latest_fix is not previous,
+                timeout=timeout,
+            )
+            if self.latest_fix is previous:
+                return None
+            return self.latest_fix
 
-        return None
+    def get_location(self):
+        """
+        Non-blocking snapshot: (lat, lon) with a fix, False without a fix,
+        None if nothing has been received yet.
+        """
+        fix = self.latest_fix
+        if fix is None:
+            return None
+        if fix.has_fix:
+            return fix.latitude, fix.longitude
+        return False
 
     def is_ser_open(self):
         # Fixed infinite recursion error
         return hasattr(self, "ser") and self.ser.is_open
 
     def convert_to_degrees(self, value, direction):
-        if not value:
-            return 0.0
-
-        if direction in ["E", "W"]:
-            degrees = float(value[:3])
-            minutes = float(value[3:])
-        else:
-            degrees = float(value[:2])
-            minutes = float(value[2:])
-
-        decimal = degrees + (minutes / 60.0)
-
-        if direction in ["S", "W"]:
-            decimal = -decimal
-
-        return decimal
+        return convert_to_degrees(value, direction)
 
     def close(self):
         if hasattr(self, "ser") and self.ser.is_open:
             self.ser.close()
 
 
+def replay_nmea(data, chunk_size=64):
+    """Parses a captured NMEA byte stream in chunks, as the serial port would."""
+    parser = NmeaParser()
+    fixes = []
+    for i in range(0, len(data), chunk_size):
+        fixes.extend(parser.feed(data[i : i + chunk_size]))
+    return fixes, parser
+
+
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        # Replay a captured stream: python -m src.drivers.gps_driver capture.nmea
+        with open(sys.argv[1], "rb") as f:
+            fixes, parser = replay_nmea(f.read())
+        for fix in fixes:
+            print(
+                f"fix={fix.has_fix} lat={fix.latitude:.6f} lon={fix.longitude:.6f} "
+                f"sats={fix.satellites} hdop={fix.hdop} speed={fix.speed_mps:.2f} "
+                f"course={fix.course_deg}"
+            )
+        print(f"{len(fixes)} fixes, {parser.bad_checksums} bad checksums")
+        sys.exit(0)
+
     gps = GPS()
+    gps.start()
 
     print("SISTEMA DE NAVEGACIÓN ACTIVO")
     print("Filtrando ruido y buscando satélites... (Presiona Ctrl+C para detener)")
 
     try:
+        fix = None
         while True:
-            result = gps.get_location()
-
-            if result is not None:
-                is_fixed = result[0]
-
-                if is_fixed:
-                    lat, lon = result
-
-                    print("\n" + "-" * 40)
-                    print(f"¡POSICIÓN ENCONTRADA!")
-                    print(f"LATITUD:   {lat:.6f}")
-                    print(f"LONGITUD:  {lon:.6f}")
-                    print(
-                        f"MAPA: https://www.google.com/maps/place/{lat:.6f},{lon:.6f}"
-                    )
-                    print("-" * 40)
-                else:
-                    sats = result[1]
-                    # Print on the same line (\r) so as not to flood the terminal
-                    print(
-                        f"Sincronizando... Satélites en uso: {sats if sats else '0'}   ",
-                        end="\r",
-                    )
-
-            # Small pause to avoid saturating the Raspberry Pi's CPU
-            time.sleep(0.05)
+            new_fix = gps.wait_for_fix(previous=fix, timeout=5.0)
+            if new_fix is None:
+                continue
+            fix = new_fix
+
+            if fix.has_fix:
+                print("\n" + "-" * 40)
+                print(f"¡POSICIÓN ENCONTRADA!")
+                print(f"LATITUD:   {fix.latitude:.6f}")
+                print(f"LONGITUD:  {fix.longitude:.6f}")
+                print(f"SATÉLITES: {fix.satellites}  HDOP: {fix.hdop}")
+                print(f"MAPA: https://www.google.com/maps/place/{fix.latitude:.6f},{fix.longitude:.6f}")
+                print("-" * 40)
+            else:
+                # Print on the same line (\r) so as not to flood the terminal
+                print(
+                    f"Sincronizando... Satélites en uso: {fix.satellites}   ",
+                    end="\r",
+                )
 
     except KeyboardInterrupt:
         print("\nNavegación detenida.")
@@ -1,41 +1,65 @@
 import smbus2
 import math
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from src.drivers.compass_calibration import CompassCalibration
+
+
+class HeadingSample(NamedTuple):
+    """Smoothed compass heading shared by every consumer."""
+
+    timestamp: float
+    heading: float  # Degrees, 0 = north
+    valid: bool  # False when the sensor is missing, failing or stale
 
 
 class IMU:
-    def __init__(self):
+    # QMC5883L control register 0x09: OSR 512, 8 G range, continuous mode
+    # and a 50 Hz output data rate (0x1D was 200 Hz, more than we can use).
+    CONTROL_50HZ = 0x15
+    DATA_RATE_HZ = 50.0
+
+    # Status register (0x06) bits
+    STATUS_DRDY = 0x01
+    STATUS_OVL = 0x02
+
+    def __init__(self, window=8, max_age_s=0.5):
+        """
+        window: samples averaged by the circular mean (8 = 160 ms at 50 Hz).
+        max_age_s: a heading older than this is reported as invalid.
+        """
         self.bus = smbus2.SMBus(1)
         self.compass_address = 0x0D
         self.compass_active = False
+        self.max_age_s = max_age_s
 
-        self.COMPASS_OFFSET = 119.0
-
-        self.calibration = [
-            (33.3, 0.0),
-            (146.4, 90.0),
-            (203.8, 180.0),
-            (269.1, 270.0),
-            (393.3, 360.0),
-        ]
+        # Ring buffer of unit vectors (sin, cos) of the corrected headings.
+        # Averaging vectors instead of angles handles the 359 -> 0 wrap.
+        self.ring = np.zeros((window, 2), dtype=np.float64)
+        self.ring_index = 0
+        self.ring_count = 0
 
-        # --- Valores de calibración por defecto (Los tuyos) ---
-        self.offset_x = -3989.5
-        self.offset_y = -2614.5
-        self.offset_z = -6894.5
+        self.condition = threading.Condition()
+        self.latest = HeadingSample(0.0, 0.0, False)
+        self.sampler_thread = None
+        self.read_errors = 0
 
-        # --- Variables de Autocalibración ---
+        # Hard/soft-iron correction and heading table, persisted between runs
+        self.calibration = CompassCalibration.load()
         self.is_calibrating = False
-        self.cal_min_y = 32767
-        self.cal_max_y = -32768
-        self.cal_min_z = 32767
-        self.cal_max_z = -32768
 
         self._init_compass()
 
     def _init_compass(self):
         try:
             self.bus.write_byte_data(self.compass_address, 0x0B, 0x01)
-            self.bus.write_byte_data(self.compass_address, 0x09, 0x1D)
+            self.bus.write_byte_data(
+                self.compass_address, 0x09, self.CONTROL_50HZ
+            )
             self.compass_active = True
             print("[IMU] QMC5883L GPS Compass detected and active.")
         except Exception as e:
@@ -49,79 +73,106 @@ class IMU:
         return value
 
     def start_calibration(self):
-        """Inicia el proceso de recopilación de datos máximos y mínimos."""
+        """Starts collecting raw samples while the user turns around."""
         print("[IMU] Iniciando calibración en segundo plano...")
-        self.cal_min_y = 32767
-        self.cal_max_y = -32768
-        self.cal_min_z = 32767
-        self.cal_max_z = -32768
+        self.calibration.clear_samples()
         self.is_calibrating = True
 
     def finish_calibration(self):
-        """Termina la calibración, calcula y aplica los nuevos offsets."""
+        """
+        Fits the collected samples and saves the result. Returns False (and
+        keeps the previous calibration) if the fit was not good enough.
+        """
         self.is_calibrating = False
+        if not self.calibration.fit():
+            return False
+        self.calibration.save()
+        return True
 
-        # Calculamos los nuevos centros
-        self.offset_y = (self.cal_max_y + self.cal_min_y) / 2.0
-        self.offset_z = (self.cal_max_z + self.cal_min_z) / 2.0
-
-        print(
-            f"[IMU] Calibración terminada. Nuevos Offsets -> Y: {self.offset_y}, Z: {self.offset_z}"
-        )
-
-    def get_heading(self):
+    def start(self):
+        """Starts the thread that samples the compass at its data rate."""
         if not self.compass_active:
-            return 0.0
-
-        try:
-            data = self.bus.read_i2c_block_data(self.compass_address, 0x00, 6)
-
-            # Leemos los valores crudos de I2C
-            raw_y = self._convert_i2c(data[2], data[3])
-            raw_z = self._convert_i2c(data[4], data[5])
+            return
+        if self.sampler_thread is not None and self.sampler_thread.is_alive():
+            return
+        self.sampler_thread = threading.Thread(target=self._sampling_loop, daemon=True)
+        self.sampler_thread.start()
+
+    def _sampling_loop(self):
+        period = 1.0 / self.DATA_RATE_HZ
+        next_time = time.monotonic()
+        while self.compass_active:
+            try:
+                raw = self._read_raw()
+                if raw is not None:
+                    self._push(self._heading_from_raw(*raw))
+            except Exception as e:
+                self.read_errors += 1
+                if self.read_errors % 50 == 1:
+                    print(f"[IMU] Compass read error: {e}")
+
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (bus contention): resync instead of bursting
+                next_time = time.monotonic()
+
+    def _read_raw(self):
+        """
+        Reads the status register, then X/Y/Z in one 6-byte block transfer.
+        Returns (raw_y, raw_z), or None when there is no new sample.
+        """
+        # Status goes first: reading the data registers clears DRDY, so a
+        # status byte read after them would always say "no new sample"
+        status = self.bus.read_byte_data(self.compass_address, 0x06)
+        if not status & self.STATUS_DRDY:
+            return None
+        data = self.bus.read_i2c_block_data(self.compass_address, 0x00, 6)
+        if status & self.STATUS_OVL:
+            # Saturated field (magnet, motor nearby): the angle is meaningless
+            raise ValueError("magnetic field overflow")
+        return self._convert_i2c(data[2], data[3]), self._convert_i2c(data[4], data[5])
+
+    def _push(self, heading_deg):
+        angle = math.radians(heading_deg)
+        self.ring[self.ring_index] = (math.sin(angle), math.cos(angle))
+        self.ring_index = (self.ring_index + 1) % len(self.ring)
+        self.ring_count = min(self.ring_count + 1, len(self.ring))
+
+        s, c = self.ring[: self.ring_count].sum(axis=0)
+        smoothed = math.degrees(math.atan2(s, c)) % 360.0
+
+        with self.condition:
+            self.latest = HeadingSample(time.time(), round(smoothed, 1), True)
+            self.condition.notify_all()
+
+    def get_sample(self):
+        """Latest smoothed HeadingSample; invalid if the sampler went quiet."""
+        sample = self.latest
+        if sample.valid and time.time() - sample.timestamp > self.max_age_s:
+            return sample._replace(valid=False)
+        return sample
+
+    def wait_for_sample(self, previous=None, timeout=None):
+        """Blocks until a sample newer than `previous` is published."""
+        # Compare timestamps, not objects: get_sample() returns a new stale
+        # copy on every call, which would never match the published one
+        previous_timestamp = None if previous is None else previous.timestamp
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.latest.timestamp != previous_timestamp, timeout=timeout
+            )
+        return self.get_sample()
 
-            # Si estamos en modo calibración, actualizamos los mínimos y máximos silenciosamente
-            if self.is_calibrating:
-                if raw_y < self.cal_min_y:
-                    self.cal_min_y = raw_y
-                if raw_y > self.cal_max_y:
-                    self.cal_max_y = raw_y
-                if raw_z < self.cal_min_z:
-                    self.cal_min_z = raw_z
-                if raw_z > self.cal_max_z:
-                    self.cal_max_z = raw_z
-
-            # Aplicamos los offsets (ya sean los viejos o los recién calibrados)
-            y_raw = raw_y - self.offset_y
-            z_raw = raw_z - self.offset_z
-
-            scale_y = 0.7948
-            scale_z = 0.7555
-
-            y = y_raw * scale_y
-            z = z_raw * scale_z
-
-            heading_rad = math.atan2(y, z)
-            heading_deg = math.degrees(heading_rad)
-
-            heading_deg -= 15.0
-            heading_deg += self.COMPASS_OFFSET
-            heading_deg = heading_deg % 360.0
-
-            if heading_deg < self.calibration[0][0]:
-                heading_deg += 360.0
-
-            corrected_heading = heading_deg
-
-            for i in range(len(self.calibration) - 1):
-                x0, y0 = self.calibration[i]
-                x1, y1 = self.calibration[i + 1]
-
-                if x0 <= heading_deg <= x1:
-                    corrected_heading = y0 + (heading_deg - x0) * (y1 - y0) / (x1 - x0)
-                    break
-
-            return round(corrected_heading % 360.0, 1)
-
-        except Exception:
-            return 0.0
+    def get_heading(self):
+        """Smoothed heading in degrees, or None when it is not valid."""
+        sample = self.get_sample()
+        return sample.heading if sample.valid else None
+
+    def _heading_from_raw(self, raw_y, raw_z):
+        """Applies the hard/soft-iron correction and table to one sample."""
+        if self.is_calibrating:
+            self.calibration.add_sample((raw_y, raw_z))
+        return float(self.calibration.heading((raw_y, raw_z)))
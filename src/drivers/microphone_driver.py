@@ -1,6 +1,9 @@
 import pyaudio
 import wave
 import ctypes
+import itertools
+import threading
+from collections import deque
 from pathlib import Path
 from contextlib import contextmanager
 
@@ -23,10 +26,15 @@ def no_alsa_error():
     try:
         asound = ctypes.cdll.LoadLibrary("libasound.so.2")
         asound.snd_lib_error_set_handler(c_error_handler)
+    except (OSError, AttributeError):
+        asound = None
+    # A single yield: errors in the body (e.g. audio.open refusing a rate)
+    # reach the caller unchanged, and the handler is always restored
+    try:
         yield
-        asound.snd_lib_error_set_handler(None)
-    except:
-        yield
+    finally:
+        if asound is not None:
+            asound.snd_lib_error_set_handler(None)
 
 
 class MicrophoneDriver:
@@ -48,6 +56,13 @@ class MicrophoneDriver:
 
         self.stream = None
 
+        # Persistent capture: ring of recent chunks shared by all readers
+        self.capture_thread = None
+        self.capturing = False
+        self.ring = deque()
+        self.ring_end = 0  # Sequence number of the next chunk to be captured
+        self.ring_cond = threading.Condition()
+
     def start_stream(self):
         """Initializes and starts capturing audio from the default USB microphone."""
         try:
@@ -73,8 +88,93 @@ class MicrophoneDriver:
             return self.stream.read(self.chunk_size, exception_on_overflow=False)
         return None
 
+    def start_capture(self, sample_rate=16000, chunk_size=1600, ring_seconds=5.0):
+        """
+        Opens the microphone once and keeps reading it on a background thread.
+
+        16 kHz mono is what Vosk expects; if the device refuses it the stream
+        falls back to its default rate (the recognizer can resample). Small
+        chunks keep latency low: the capture thread does nothing but read, so
+        they no longer overflow. Returns False if no stream could be opened.
+        """
+        if self.capturing:
+            return True
+
+        default_rate = 44100
+        try:
+            with no_alsa_error():
+                default_rate = int(
+                    self.audio.get_default_input_device_info()["defaultSampleRate"]
+                )
+        except Exception:
+            pass
+
+        for rate in (sample_rate, default_rate):
+            # Same chunk duration at the fallback rate
+            frames = chunk_size * rate // sample_rate
+            try:
+                with no_alsa_error():
+                    self.stream = self.audio.open(
+                        format=self.format,
+                        channels=self.channels,
+                        rate=rate,
+                        input=True,
+                        frames_per_buffer=frames,
+                    )
+                self.sample_rate = rate
+                self.chunk_size = frames
+                break
+            except Exception as e:
+                print(f"[MicrophoneDriver] Could not open the microphone at {rate} Hz: {e}")
+        else:
+            return False
+
+        with self.ring_cond:
+            chunks_per_second = self.sample_rate / self.chunk_size
+            self.ring = deque(maxlen=max(int(ring_seconds * chunks_per_second), 1))
+        self.capturing = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        print(f"[MicrophoneDriver] Capturing at {self.sample_rate} Hz.")
+        return True
+
+    def _capture_loop(self):
+        while self.capturing:
+            try:
+                data = self.stream.read(self.chunk_size, exception_on_overflow=False)
+            except Exception as e:
+                print(f"[MicrophoneDriver] Capture error: {e}")
+                self.capturing = False
+                break
+            with self.ring_cond:
+                self.ring.append(data)
+                self.ring_end += 1
+                self.ring_cond.notify_all()
+
+    def position(self):
+        """Current end of the capture ring; reading from here skips older audio."""
+        with self.ring_cond:
+            return self.ring_end
+
+    def read_from(self, position, timeout=1.0):
+        """
+        Chunks captured since `position`, waiting up to `timeout` for new ones.
+        Returns (chunks, new_position). A reader that fell further behind than
+        the ring length loses the oldest audio instead of blocking capture.
+        """
+        with self.ring_cond:
+            self.ring_cond.wait_for(lambda: self.ring_end > position, timeout)
+            oldest = self.ring_end - len(self.ring)
+            start = max(position, oldest)
+            chunks = list(itertools.islice(self.ring, start - oldest, None))
+            return chunks, self.ring_end
+
     def stop_stream(self):
         """Stops the audio stream and cleanly releases hardware resources."""
+        self.capturing = False
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout=1.0)
+            self.capture_thread = None
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
@@ -1,12 +1,93 @@
 #!/usr/bin/env python
 import qwiic_vl53l5cx
 import time
+import threading
 import numpy as np
 import warnings
 
 
+class TofWindow:
+    """
+    Rolling window of the last K ToF matrices in a preallocated (K, 8, 8)
+    array, with a running per-zone median.
+
+    Each zone also keeps its window values in a sorted row. A new frame only
+    replaces the value of the frame it evicts, so the median is a constant
+    time gather instead of a full nanmedian over the stack. Invalid zones
+    (0 from the driver) are stored as +inf so they sort to the end and are
+    left out of the median.
+    """
+
+    def __init__(self, size=15, shape=(8, 8)):
+        self.size = size
+        self.shape = shape
+        zones = shape[0] * shape[1]
+
+        self.frames = np.zeros((size, *shape), dtype=np.float32)
+        self.timestamps = np.zeros(size, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+
+        self._sorted = np.full((zones, size), np.inf, dtype=np.float32)
+        self._valid = np.zeros(zones, dtype=np.intp)
+        self._rows = np.arange(zones)
+        self.median = np.zeros(shape, dtype=np.float32)
+
+    def push(self, timestamp, matrix):
+        new = np.asarray(matrix, dtype=np.float32).reshape(-1)
+        new_sorted = np.where(new > 0, new, np.inf)
+
+        if self.count >= self.size:
+            # Replace the evicted frame's value in every sorted row
+            old = self.frames[self.index].reshape(-1)
+            old_sorted = np.where(old > 0, old, np.inf)
+            slot = np.argmax(self._sorted == old_sorted[:, None], axis=1)
+            self._valid -= np.isfinite(old_sorted)
+        else:
+            # Window not full yet: fill the first free (+inf) slot
+            slot = np.full(self._rows.size, self.count, dtype=np.intp)
+
+        self._sorted[self._rows, slot] = new_sorted
+        self._valid += np.isfinite(new_sorted)
+        # Rows are sorted except for the one replaced value
+        self._sorted.sort(axis=1)
+
+        self.frames[self.index] = new.reshape(self.shape)
+        self.timestamps[self.index] = timestamp
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+
+        # Median of the first _valid entries of each row (0 if none)
+        lo = np.maximum((self._valid - 1) // 2, 0)
+        hi = np.maximum(self._valid // 2, 0)
+        hi = np.minimum(hi, self.size - 1)
+        median = 0.5 * (self._sorted[self._rows, lo] + self._sorted[self._rows, hi])
+        median[self._valid == 0] = 0.0
+        self.median[:] = median.reshape(self.shape)
+
+    def latest(self):
+        """Most recent (timestamp, matrix), or None when empty."""
+        if self.count == 0:
+            return None
+        last = (self.index - 1) % self.size
+        return self.timestamps[last], self.frames[last]
+
+    def recent_median(self, frames):
+        """Median over only the last `frames` matrices (ignores zeros)."""
+        frames = min(frames, self.count, self.size)
+        if frames >= min(self.count, self.size):
+            return self.median.copy()
+        idx = (self.index - 1 - np.arange(frames)) % self.size
+        stack = self.frames[idx].copy()
+        stack[stack == 0] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            stable = np.nanmedian(stack, axis=0)
+        return np.nan_to_num(stable, nan=0.0)
+
+
 class Tof:
-    def __init__(self, sensor_height_mm=1220):
+    def __init__(self, sensor_height_mm=1220, window_size=15):
         print("[Tof] Initializing Tof in 8x8 mode (Safe)...")
         self.sensor = qwiic_vl53l5cx.QwiicVL53L5CX()
 
@@ -25,9 +106,93 @@ class Tof:
         self.sensor.set_ranging_frequency_hz(5)
         self.sensor.set_integration_time_ms(150)
         self.sensor.set_sharpener_percent(50)
+        self.ranging_frequency_hz = 5
 
         self.sensor.start_ranging()
 
+        # Rolling window filled by the acquisition thread. The condition
+        # wakes up readers waiting for new frames instead of polling.
+        self.window = TofWindow(size=window_size)
+        self.condition = threading.Condition()
+        self.acquisition_thread = None
+        self.is_acquiring = False
+
+    def start_acquisition(self):
+        """Starts a background thread that streams matrices into the window."""
+        if self.acquisition_thread is not None and self.acquisition_thread.is_alive():
+            return
+        self.is_acquiring = True
+        self.acquisition_thread = threading.Thread(
+            target=self._acquisition_loop, daemon=True
+        )
+        self.acquisition_thread.start()
+
+    def stop_acquisition(self):
+        self.is_acquiring = False
+
+    def _acquisition_loop(self):
+        # Poll at twice the ranging frequency: often enough not to add
+        # latency, rarely enough not to hog the I2C bus.
+        poll_interval = 1.0 / (2 * self.ranging_frequency_hz)
+        while self.is_acquiring:
+            try:
+                matrix = self.get_matrix()
+                if matrix is not None:
+                    with self.condition:
+                        self.window.push(time.time(), matrix)
+                        self.condition.notify_all()
+                    continue
+            except Exception as e:
+                print(f"[Tof] Acquisition error: {e}")
+            time.sleep(poll_interval)
+
+    def latest(self):
+        """
+        Returns the last (timestamp, matrix) pair in constant time without
+        blocking, or None if the sensor has not produced a frame yet.
+        """
+        with self.condition:
+            frame = self.window.latest()
+            if frame is None:
+                return None
+            return frame[0], frame[1].copy()
+
+    def running_median(self):
+        """Per-zone median over the rolling window (0 where never valid)."""
+        with self.condition:
+            return self.window.median.copy()
+
+    def wait_for_frames(self, frames, timeout=None):
+        """Blocks until `frames` new matrices have arrived. Returns success."""
+        with self.condition:
+            target = self.window.count + frames
+            return self.condition.wait_for(
+                lambda: self.window.count >= target, timeout=timeout
+            )
+
+    def record(self, path, seconds=10.0):
+        """Records timestamped matrices to an .npz file for offline replay."""
+        self.start_acquisition()
+        timestamps, matrices = [], []
+        end_time = time.time() + seconds
+        last_count = 0
+        with self.condition:
+            last_count = self.window.count
+        while time.time() < end_time:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.window.count > last_count,
+                    timeout=end_time - time.time(),
+                )
+                if self.window.count == last_count:
+                    continue
+                last_count = self.window.count
+                timestamp, matrix = self.window.latest()
+                timestamps.append(timestamp)
+                matrices.append(matrix.copy())
+        np.savez(path, timestamps=np.array(timestamps), matrices=np.array(matrices))
+        print(f"[Tof] Recorded {len(matrices)} frames to {path}")
+
     def get_matrix(self):
         if self.sensor.check_data_ready():
             measurement_data = self.sensor.get_ranging_data()
@@ -43,24 +208,15 @@ class Tof:
             return np.where(mask, dist_matrix, 0)
         return None
 
-    def get_stable_matrix(self, frames=15):
-        samples = []
-        for _ in range(frames):
-            matrix = None
-            while matrix is None:
-                matrix = self.get_matrix()
-                time.sleep(0.01)
-            samples.append(matrix)
-            time.sleep(0.05)
-
-        stack = np.array(samples, dtype=float)
-        stack[stack == 0] = np.nan
-
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", category=RuntimeWarning)
-            stable = np.nanmedian(stack, axis=0)
-
-        return np.nan_to_num(stable, nan=0.0)
+    def get_stable_matrix(self, frames=15, timeout=10.0):
+        """
+        Median of `frames` fresh matrices. Waits on the acquisition thread
+        instead of busy-polling the sensor.
+        """
+        self.start_acquisition()
+        self.wait_for_frames(frames, timeout=timeout)
+        with self.condition:
+            return self.window.recent_median(frames)
 
 
 if __name__ == "__main__":
@@ -31,6 +31,9 @@ class AudioInterface:
                 text = message.get("text")
                 if text:
                     self.speak_fast_background(text)
+            elif action == "pause":
+                # Silence between scripted messages (sound demo)
+                time.sleep(message.get("seconds", 1.0))
             return
 
         if isinstance(message, str):
@@ -46,6 +49,9 @@ class AudioInterface:
     def speak(self, text, length_scale="1.0"):
         self.audio_driver.speak(text, length_scale=length_scale)
 
+    def prewarm(self, phrases):
+        self.audio_driver.prewarm(phrases)
+
     def stop(self):
         self.audio_driver.stop()
 
@@ -1,9 +1,8 @@
-import speech_recognition as sr
 import json
 import time
 from pathlib import Path
 from vosk import Model, KaldiRecognizer
-from src.drivers.microphone_driver import no_alsa_error
+from src.drivers.microphone_driver import MicrophoneDriver
 
 from src.core.priority_queue import AudioPriorityQueue
 
@@ -11,102 +10,192 @@ base_path = Path.cwd()
 
 
 class VoiceInterface:
-    def __init__(self, audio_queue):
-        self.audio_queue = audio_queue
-        self.recognizer = sr.Recognizer()
+    """
+    Offline speech recognition over an always-open microphone.
+
+    The microphone keeps capturing 16 kHz chunks into a ring; a listen only
+    marks where it starts reading and feeds the chunks to one reused Vosk
+    recognizer as they arrive. Vosk's endpointing closes the phrase shortly
+    after the user stops talking, so nothing waits for a fixed recording.
+    """
 
-        self.recognizer.pause_threshold = 0.5
-        self.recognizer.energy_threshold = 400
-        self.recognizer.dynamic_energy_threshold = False
+    def __init__(self, audio_queue, microphone=None):
+        self.audio_queue = audio_queue
+        self.microphone = microphone
+        self.recognizer = None
+        self.grammars = {}  # context -> (phrases, KaldiRecognizer)
 
         model_path = Path(base_path / "assets" / "vosk-model-small-es-0.42")
 
         if not model_path.exists():
             print(f"[Error] No se encontró el modelo Vosk en: {model_path}")
             self.vosk_model = None
-        else:
-            print(
-                "[VoiceInterface] Cargando modelo Vosk a la RAM... (Solo ocurre una vez)"
-            )
-            # Mantenemos el modelo vivo en memoria para latencia cero al presionar botones
-            # We load the model once and reuse it for all recognition tasks insuring less latency when pressing button pattern
-            self.vosk_model = Model(str(model_path))
-            print("[VoiceInterface] ¡Modelo Vosk listo!")
+            return
+
+        print(
+            "[VoiceInterface] Cargando modelo Vosk a la RAM... (Solo ocurre una vez)"
+        )
+        # We load the model once and reuse it for all recognition tasks insuring less latency when pressing button pattern
+        self.vosk_model = Model(str(model_path))
+        print("[VoiceInterface] ¡Modelo Vosk listo!")
+
+        if self.microphone is None:
+            self.microphone = MicrophoneDriver()
+        if not self.microphone.start_capture():
+            print("[VoiceInterface] Error: microphone not available.")
+            return
+
+        # Built for the rate the microphone actually opened with
+        self.recognizer = KaldiRecognizer(self.vosk_model, self.microphone.sample_rate)
+
+    def _beep(self):
+        self.audio_queue.put(
+            AudioPriorityQueue.VOICE_MENU,
+            {
+                "action": "sound",
+                "position": "center",
+                "sound_type": "ui",  # Llama al sonido agudo tipo radar
+            },
+        )
+
+    def grammar_recognizer(self, context, phrases):
+        """
+        Recognizer restricted to `phrases`, cached per context.
 
-    def listen_and_recognize(self):
+        Vosk then only decodes those phrases (anything else comes out as
+        "[unk]"), which is faster and far more accurate than the full
+        vocabulary. The recognizer is rebuilt only when the phrases of its
+        context change, e.g. after a new favorite is saved.
+        """
+        key = tuple(sorted(phrases))
+        cached = self.grammars.get(context)
+        if cached is None or cached[0] != key:
+            grammar = json.dumps(list(key) + ["[unk]"], ensure_ascii=False)
+            recognizer = KaldiRecognizer(
+                self.vosk_model, self.microphone.sample_rate, grammar
+            )
+            recognizer.SetWords(True)  # Per-word confidences
+            self.grammars[context] = (key, recognizer)
+            print(f"[VoiceInterface] Grammar '{context}' built ({len(key)} phrases).")
+        return self.grammars[context][1]
+
+    def recognize_command(
+        self, phrases, context, timeout=5.0, phrase_time_limit=5.0, start=None
+    ):
         """
-        Listens to the microphone and uses VOSK 100% OFFLINE to convert audio to text.
+        Listens for one of `phrases` ({spoken phrase: command id}). Phrases
+        mapped to None are decoded but never returned as a command.
+        Returns (command_id, confidence); command_id is None if nothing in
+        the grammar was said, and confidence is 0.0 if nothing was heard.
+        start: microphone position to decode from instead of beeping and
+            listening from now (audio already said after a wake word).
         """
-        if self.vosk_model is None:
-            print("[VoiceInterface] Error: Cannot listen, Vosk model is missing.")
+        if self.recognizer is None:
+            print("[VoiceInterface] Error: Cannot listen, Vosk model or microphone is missing.")
+            return None, 0.0
+
+        recognizer = self.grammar_recognizer(context, phrases)
+        result = self._listen(recognizer, timeout, phrase_time_limit, start)
+        if not result:
+            return None, 0.0
+
+        text = result.get("text", "")
+        words = result.get("result", [])
+        # Confidence of the in-grammar words; only [unk] means something else was said
+        known = [w for w in words if w["word"] != "[unk]"] or words
+        confidence = sum(w["conf"] for w in known) / len(known) if known else 0.0
+
+        command_id = phrases.get(text)
+        if command_id is None:
+            # Surrounding [unk] words: keep the longest phrase that was said
+            spoken = [
+                p
+                for p, command in phrases.items()
+                if command is not None and f" {p} " in f" {text} "
+            ]
+            if spoken:
+                command_id = phrases[max(spoken, key=len)]
+        print(f"[VoiceInterface] Command: {command_id} (confidence {confidence:.2f})")
+        return command_id, confidence
+
+    def listen_and_recognize(self, timeout=5.0, phrase_time_limit=5.0):
+        """
+        Listens to the microphone and uses VOSK 100% OFFLINE to convert audio to
+        free text (full vocabulary). Returns the text, or None if nothing was said.
+        """
+        if self.recognizer is None:
+            print("[VoiceInterface] Error: Cannot listen, Vosk model or microphone is missing.")
+            return None
+
+        result = self._listen(self.recognizer, timeout, phrase_time_limit)
+        if not result:
             return None
+        return result.get("text") or None
 
-        with no_alsa_error():
-            # ¡AQUÍ ESTÁ LA MAGIA!
-            # Forzamos los 16000Hz para Vosk y el chunk_size de 8192 para evitar los cortes
-            source = sr.Microphone(chunk_size=8192)
+    def _listen(self, recognizer, timeout, phrase_time_limit, start=None):
+        """
+        Feeds live audio to `recognizer` until the end of the phrase.
 
-        with source:
-            print("[VoiceInterface] Calibrating for ambient noise...")
+        timeout: seconds to wait for speech to start.
+        phrase_time_limit: maximum length of the phrase once speech started.
+        start: microphone position to read from; None beeps and starts now.
+        Returns Vosk's result dict, or None if nothing was said.
+        """
+        if start is None:
+            # 1. Start signal. Audio captured until the beep has played is
+            # dropped so the microphone does not recognize the beep itself
+            self._beep()
+            self.audio_queue.wait_for_priority(
+                AudioPriorityQueue.VOICE_MENU, timeout=2.0
+            )
+            position = self.microphone.position()
+        else:
+            position = start
+        recognizer.Reset()
+        print("[VoiceInterface] Listening... (Speak now!)")
+
+        started = time.monotonic()
+        speech_started = None
+        partial = ""
+        result = None
+        try:
+            while result is None:
+                chunks, position = self.microphone.read_from(position, timeout=0.5)
+                for chunk in chunks:
+                    if recognizer.AcceptWaveform(chunk):
+                        # Endpoint: the user stopped talking
+                        candidate = json.loads(recognizer.Result())
+                        if candidate.get("text"):
+                            result = candidate
+                            break
+                        continue
+
+                    current = json.loads(recognizer.PartialResult()).get("partial", "")
+                    if current and current != partial:
+                        partial = current
+                        if speech_started is None:
+                            speech_started = time.monotonic()
+                        print(f"[VoiceInterface] ... {partial}")
+
+                now = time.monotonic()
+                if result is None and speech_started is None and now - started > timeout:
+                    print("[VoiceInterface] Timeout: No speech detected.")
+                    return None
+                if (
+                    result is None
+                    and speech_started is not None
+                    and now - speech_started > phrase_time_limit
+                ):
+                    result = json.loads(recognizer.FinalResult())
+        except Exception as e:
+            print(f"[VoiceInterface] Recognition error: {e}")
+            return None
 
-            print("[VoiceInterface] Listening... (Speak now!)")
+        # 2. End signal when it finishes capturing
+        self._beep()
 
-            # 1. Start signal via spatial sound queue instead of speaking "Bip"
-            start_cmd = {
-                "action": "sound",
-                "position": "center",
-                "sound_type": "ui",  # Llama al sonido agudo tipo radar
-            }
-
-            self.audio_queue.put(AudioPriorityQueue.VOICE_MENU, start_cmd)
-
-            # Wait for it to play so microphone doesn't record the beep itself
-            time.sleep(0.5)
-
-            try:
-                # Capture the audio (stops if user stops talking, or forcefully after 7 seconds)
-                audio_data = self.recognizer.listen(
-                    source, timeout=5, phrase_time_limit=5
-                )
-
-                # Save the captured audio to a file for debugging purposes
-                debug_audio_path = (
-                    base_path / "assets" / "recordings" / "debug_audio.wav"
-                )
-                debug_audio_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(debug_audio_path, "wb") as f:
-                    f.write(audio_data.get_wav_data())
-                print(f"[VoiceInterface] Saved debug audio to {debug_audio_path}")
-
-                # 2. End signal when it finishes capturing
-                end_cmd = {
-                    "action": "sound",
-                    "position": "center",
-                    "sound_type": "ui",  # Llama al sonido agudo tipo radar
-                }
-                self.audio_queue.put(AudioPriorityQueue.VOICE_MENU, end_cmd)
-
-                print("[VoiceInterface] Processing audio offline...")
-
-                # Use KaldiRecognizer directly with the pre-loaded Vosk model
-                rec = KaldiRecognizer(self.vosk_model, 16000)
-                rec.AcceptWaveform(
-                    audio_data.get_raw_data(convert_rate=16000, convert_width=2)
-                )
-                vosk_json = rec.Result()
-
-                # Vosk returns a JSON string, convert it to a Python dict
-                result_dict = json.loads(vosk_json)
-
-                # Extract only the "text" key
-                text = result_dict.get("text", "")
-
-                print(f"[VoiceInterface] Recognized text: '{text}'")
-                return text
-
-            except sr.WaitTimeoutError:
-                print("[VoiceInterface] Timeout: No speech detected.")
-            except Exception as e:
-                print(f"[VoiceInterface] Recognition error: {e}")
-
-        return None
+        print(
+            f"[VoiceInterface] Recognized text: '{result.get('text', '')}' "
+            f"({time.monotonic() - started:.2f} s)"
+        )
+        return result
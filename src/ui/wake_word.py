@@ -0,0 +1,262 @@
+import json
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Two common words the model knows, and neither is a menu command
+WAKE_PHRASE = "hola asistente"
+
+
+class WakeWordSpotter:
+    """
+    Hands-free trigger for the voice menu.
+
+    Reads the shared microphone ring and decodes a one-phrase grammar. To
+    keep the CPU cost low the recognizer only sees audio while a simple
+    energy gate detects sound; silent chunks cost one RMS and are otherwise
+    skipped. A few chunks before the gate opened are kept as pre-roll so the
+    first syllable is not lost.
+
+    On detection `on_wake(position)` is called with the ring position where
+    the utterance started, so the command recognizer can decode the same
+    audio and the user can say the command in the same breath.
+    """
+
+    def __init__(
+        self,
+        model,
+        source,
+        on_wake=None,
+        phrase=WAKE_PHRASE,
+        pre_roll_chunks=3,
+        hangover_s=0.8,
+        min_rms=300.0,
+        snr=3.0,
+        stats_interval_s=300.0,
+    ):
+        """
+        source: MicrophoneDriver (sample_rate, position(), read_from()).
+        hangover_s: quiet time that ends an utterance.
+        min_rms, snr: the gate opens above max(min_rms, snr * noise floor).
+        """
+        # Imported here so the menu can import WAKE_PHRASE without Vosk
+        from vosk import KaldiRecognizer
+
+        self.source = source
+        self.on_wake = on_wake
+        self.phrase = phrase
+        self.sample_rate = source.sample_rate
+        self.hangover_s = hangover_s
+        self.min_rms = min_rms
+        self.snr = snr
+        self.stats_interval_s = stats_interval_s
+
+        grammar = json.dumps([phrase, "[unk]"], ensure_ascii=False)
+        self.recognizer = KaldiRecognizer(model, self.sample_rate, grammar)
+
+        self.pre_roll = deque(maxlen=pre_roll_chunks)  # (position, chunk)
+        self.noise_rms = min_rms / snr
+        self.in_speech = False
+        self.speech_start = None
+        self.last_loud_s = 0.0
+        self.refractory = False  # After a detection, until the speaker pauses
+
+        # CPU budget: thread CPU time spent per second of audio
+        self.audio_s = 0.0
+        self.decoded_s = 0.0
+        self.cpu_s = 0.0
+        self.detections = 0
+        self.last_stats_s = 0.0
+
+        self.running = False
+        self.paused = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        print(f"[WakeWord] Listening for '{self.phrase}'.")
+
+    def stop(self):
+        self.running = False
+
+    def pause(self):
+        """Stops spotting, e.g. while the voice menu is using the microphone."""
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def cpu_load(self):
+        """Fraction of one core used, measured on the processed audio."""
+        return self.cpu_s / self.audio_s if self.audio_s else 0.0
+
+    def _loop(self):
+        position = self.source.position()
+        while self.running:
+            chunks, end = self.source.read_from(position, timeout=0.5)
+            if self.paused:
+                # Audio heard while paused is never decoded later
+                self._end_utterance()
+                self.pre_roll.clear()
+                position = end
+                continue
+
+            first = end - len(chunks)
+            for offset, chunk in enumerate(chunks):
+                start = self.process_chunk(chunk, first + offset)
+                if start is not None and self.on_wake is not None:
+                    self.on_wake(start)
+            position = end
+
+    def process_chunk(self, chunk, position):
+        """
+        Feeds one chunk of 16-bit mono audio. Returns the ring position of the
+        start of the utterance when the wake phrase is heard, else None.
+        """
+        cpu_start = time.thread_time()
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        chunk_s = len(samples) / self.sample_rate
+        self.audio_s += chunk_s
+        rms = math.sqrt(float(np.mean(samples * samples))) if len(samples) else 0.0
+
+        detected = None
+        loud = rms > max(self.min_rms, self.snr * self.noise_rms)
+        if loud:
+            self.last_loud_s = self.audio_s
+
+        if self.refractory:
+            # The rest of the utterance that woke us belongs to the command
+            if self.audio_s - self.last_loud_s > self.hangover_s:
+                self.refractory = False
+        elif not self.in_speech:
+            if not loud:
+                # Slowly track the background noise while nobody talks
+                self.noise_rms = 0.95 * self.noise_rms + 0.05 * rms
+                self.pre_roll.append((position, chunk))
+            else:
+                self.in_speech = True
+                self.speech_start = self.pre_roll[0][0] if self.pre_roll else position
+                self.recognizer.Reset()
+                for _, previous in self.pre_roll:
+                    self.recognizer.AcceptWaveform(previous)
+                    self.decoded_s += chunk_s
+                self.pre_roll.clear()
+
+        if self.in_speech:
+            self.decoded_s += chunk_s
+            if self.recognizer.AcceptWaveform(chunk):
+                text = json.loads(self.recognizer.Result()).get("text", "")
+                ended = True
+            else:
+                text = json.loads(self.recognizer.PartialResult()).get("partial", "")
+                ended = self.audio_s - self.last_loud_s > self.hangover_s
+
+            if self.phrase in text:
+                self.detections += 1
+                detected = self.speech_start
+                self._end_utterance()
+                self.refractory = True
+            elif ended:
+                self._end_utterance()
+
+        self.cpu_s += time.thread_time() - cpu_start
+
+        if self.audio_s - self.last_stats_s >= self.stats_interval_s:
+            self.last_stats_s = self.audio_s
+            print(
+                f"[WakeWord] CPU {self.cpu_load() * 100:.1f}% of one core, "
+                f"decoding {self.decoded_s / self.audio_s * 100:.0f}% of the audio, "
+                f"{self.detections} detections."
+            )
+        return detected
+
+    def _end_utterance(self):
+        if self.in_speech:
+            self.recognizer.Reset()
+        self.in_speech = False
+        self.speech_start = None
+
+
+def read_wav_chunks(path, chunk_s=0.1):
+    """Chunks of a 16-bit mono WAV file, plus its sample rate."""
+    import wave
+
+    with wave.open(str(path), "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        rate = wav.getframerate()
+        frames = max(int(rate * chunk_s), 1)
+        chunks = []
+        while True:
+            data = wav.readframes(frames)
+            if not data:
+                break
+            chunks.append(data)
+    return chunks, rate
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    from vosk import KaldiRecognizer, Model, SetLogLevel
+
+    # Replay recorded WAV files (16-bit mono, e.g. 16 kHz) through the spotter:
+    #   python -m src.ui.wake_word assets/recordings/*.wav
+    # Files whose name contains "wake" are expected to contain the phrase.
+    SetLogLevel(-1)
+    model = Model(str(Path.cwd() / "assets" / "vosk-model-small-es-0.42"))
+
+    class _Source:
+        def __init__(self, sample_rate):
+            self.sample_rate = sample_rate
+
+    failures = 0
+    total_audio = total_cpu = 0.0
+    for path in sys.argv[1:]:
+        chunks, rate = read_wav_chunks(path)
+        spotter = WakeWordSpotter(model, _Source(rate))
+        hits = []
+        for position, chunk in enumerate(chunks):
+            start = spotter.process_chunk(chunk, position)
+            if start is not None:
+                hits.append((start, position))
+
+        expected = "wake" in Path(path).name
+        ok = bool(hits) == expected
+        failures += not ok
+        total_audio += spotter.audio_s
+        total_cpu += spotter.cpu_s
+
+        line = f"{'OK  ' if ok else 'FAIL'} {Path(path).name}: "
+        if hits:
+            line += ", ".join(
+                f"heard at {end * 0.1:.1f} s (utterance from {start * 0.1:.1f} s)"
+                for start, end in hits
+            )
+        else:
+            line += "no wake phrase"
+        line += f" | CPU {spotter.cpu_load() * 100:.1f}%"
+        print(line)
+
+        # Hand-off: what the command recognizer gets after the first detection
+        if hits:
+            recognizer = KaldiRecognizer(model, rate)
+            for chunk in chunks[hits[0][0] :]:
+                recognizer.AcceptWaveform(chunk)
+            text = json.loads(recognizer.FinalResult()).get("text", "")
+            print(f"     same breath: '{text}'")
+
+    if total_audio:
+        print(
+            f"{failures} failures, {total_audio:.0f} s of audio, "
+            f"average CPU {total_cpu / total_audio * 100:.1f}% of one core"
+        )
+    sys.exit(1 if failures else 0)